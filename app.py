@@ -1,11 +1,19 @@
-from flask import Flask, render_template, redirect, url_for, request, flash
+from flask import (
+    Blueprint, Flask, current_app, render_template, redirect, url_for, request, flash, jsonify, abort,
+    Response, stream_with_context
+)
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User, Plan, Activity, UserActivity, DailyLog
-import importlib
+from sqlalchemy import inspect, text
+from werkzeug.exceptions import HTTPException
+from werkzeug.local import LocalProxy
+from models import db, User, UserActivity, UserStats, Job, CatalogVersion
+import asyncio
+import io
 import os
+import click
 from forms import LoginForm, RegistrationForm, EditProfileForm
+from levels import LEVELS, POINTS_MAPPING, points
 from flask_bcrypt import Bcrypt
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import date, timedelta
 from utils.scoring import (
     calculate_daily_score,
@@ -16,33 +24,197 @@ from utils.scoring import (
     streak_count,
     days_completed
 )
+from utils.aggregates import dates_between, plan_report, rebuild_aggregates, refresh_aggregates, user_log_dates
+from utils.aio import AsyncDatabase
+from utils.archive import archive_logs, storage_report
+from utils.api import (
+    fetch_log_version, api_etag, api_last_modified, fetch_day, fetch_summary, fetch_trend,
+    parse_log_batch, save_log_batch
+)
+from utils.cache import make_cache
+from utils.catalog import PlanCatalog, load_plan_catalog
+from utils.database import configure_database, install_sqlite_pragmas
+from utils.export import EXPORT_FORMATS, export_logs
+from utils.dashboard import (
+    build_dashboard, build_log_page, build_trend, dashboard_cache_key, trend_cache_key, mark_logs_changed
+)
+from utils.identity import IdentityCache
+from utils.jobs import JobRunner, job_dict
+from utils.importer import IMPORT_FORMATS, import_logs, read_records
+from utils.leaderboard import (
+    METRICS, make_leaderboards, refresh_leaderboard_entry, rebuild_leaderboards, start_periodic_rebuild
+)
+from utils.logs import save_day_logs
+from utils.migrate import upgrade_database
+from utils.perf import PerfMonitor
+from utils.rollups import refresh_daily_scores, rebuild_daily_scores, rebuild_all_daily_scores
+from utils.security import PasswordHasher, HasherBusy
+from utils.stats import profile_stats, refresh_user_stats, rebuild_user_stats
+
+
+# ----------------- Extensions -----------------
+# Created unbound at import; create_app() binds them (and registers `bp`).
+bp = Blueprint("main", __name__, cli_group=None)
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+bcrypt = Bcrypt()
+perf_monitor = PerfMonitor()
+job_runner = JobRunner()
+login_manager = LoginManager()
+login_manager.login_view = "main.home"   # redirect to home if not logged in
+login_manager.blueprint_login_views = {"api": None}   # ...except API calls, which get a 401
+
+# Built from each app's config in create_app(), reached through the current app
+dashboard_cache = LocalProxy(lambda: current_app.extensions["dashboard_cache"])
+identity_cache = LocalProxy(lambda: current_app.extensions["identity_cache"])
+password_hasher = LocalProxy(lambda: current_app.extensions["password_hasher"])
+leaderboards = LocalProxy(lambda: current_app.extensions["leaderboards"])
+plan_catalog = LocalProxy(lambda: current_app.extensions["plan_catalog"])
+async_db = LocalProxy(lambda: current_app.extensions["async_db"])
+
+
+# ----------------- App Factory -----------------
+def create_app(config=None):
+    """Build and configure the app; `config` overrides the defaults below."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "supersecretkey123"
+    app.config["RELATIONSHIP_LOADING"] = "selectin"   # "selectin", "joined" or "lazy"
+
+    # Dashboard view-model cache: "memory://" (per-process LRU), "local://" or "redis://..."
+    app.config["DASHBOARD_CACHE_URL"] = os.environ.get("DASHBOARD_CACHE_URL", "memory://")
+    app.config["DASHBOARD_CACHE_SIZE"] = 1024
+    app.config["DASHBOARD_CACHE_TTL"] = 300   # seconds
+
+    # Dashboard log grid: the last N days inline, earlier pages from /dashboard/logs
+    app.config["DASHBOARD_LOG_DAYS"] = 14
+    app.config["DASHBOARD_LOG_DAYS_LIMIT"] = 90
+
+    # Trend chart payload (/dashboard/trend)
+    app.config["TREND_MAX_POINTS"] = 366     # default LTTB target per series
+    app.config["TREND_MAX_POINTS_LIMIT"] = 2000
+
+    # Log exports (streamed; rows fetched per chunk) and bulk imports
+    app.config["EXPORT_CHUNK_SIZE"] = 1000
+    app.config["IMPORT_CHUNK_SIZE"] = 10000   # rows per upsert + commit
+    app.config["ADMIN_EMAILS"] = {e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+    # Leaderboards: "memory://" (per-process, synced from the DB) or "redis://..."
+    app.config["LEADERBOARD_URL"] = os.environ.get("LEADERBOARD_URL", "memory://")
+    app.config["LEADERBOARD_SYNC_INTERVAL"] = 5        # seconds between pulls of other workers' updates
+    app.config["LEADERBOARD_PAGE_SIZE"] = 25
+    app.config["LEADERBOARD_REBUILD_INTERVAL"] = int(os.environ.get("LEADERBOARD_REBUILD_INTERVAL", 0))   # seconds, 0 = cron only
+
+    # Background jobs: "thread" (in-process pool), "worker" (separate `flask run-jobs`) or "inline"
+    app.config["JOBS_MODE"] = os.environ.get("JOBS_MODE", "thread")
+    app.config["JOBS_WORKERS"] = int(os.environ.get("JOBS_WORKERS", 2))
+    app.config["JOBS_POLL_INTERVAL"] = 1.0      # seconds between idle polls
+    app.config["JOBS_COALESCE_DELAY"] = 0.5     # a new job waits this long so a burst merges into it
+    app.config["JOBS_RETRY_BASE"] = 2.0         # retry n waits base**n seconds
+    app.config["JOBS_HEARTBEAT_INTERVAL"] = 60  # running jobs touch their row this often
+    app.config["JOBS_STALE_AFTER"] = 300        # running this long without a heartbeat → requeued
+    app.config["JOBS_KEEP_FINISHED"] = 86400    # done jobs kept for the status API
+
+    # Plan/activity/cohort rollups behind the admin report, refreshed per changed date
+    app.config["AGGREGATES_DELAY"] = 60    # seconds a refresh waits so writes in between merge into it
+    app.config["REPORT_DAYS"] = 30         # default window of the admin report
+
+    # Log archive (`flask archive-logs`, e.g. nightly from cron): older logs move to a compact cold table
+    app.config["ARCHIVE_AFTER_DAYS"] = int(os.environ.get("ARCHIVE_AFTER_DAYS", 365))
+    app.config["ARCHIVE_PREVIOUS_PLANS"] = True   # also logs from before a user's current plan start
+
+    # Per-process cache of the session user (0 disables)
+    app.config["IDENTITY_CACHE_TTL"] = 30    # seconds
+    app.config["IDENTITY_CACHE_SIZE"] = 4096
+
+    # Password hashing: werkzeug method ("pbkdf2:sha256:600000", "scrypt:32768:8:1") or "bcrypt"
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+    app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+    app.config["PASSWORD_HASH_QUEUE"] = 32   # pending hashes before logins get "busy"
+
+    # Opt-in request instrumentation (Server-Timing header + admin-only /debug/perf)
+    app.config["PERF_INSTRUMENTATION"] = os.environ.get("PERF_INSTRUMENTATION") == "1"
+    app.config["PERF_N_PLUS_ONE_THRESHOLD"] = 5   # same statement more often than this → flagged
+    app.config["PERF_SLOW_STATEMENTS"] = 10
+
+    # Plan catalog (plans/*.py): loaded at startup when its files changed, or via `flask load-plans`
+    app.config["PLAN_CATALOG_DIR"] = os.path.join(app.root_path, "plans")
+    app.config["PLAN_CATALOG_AUTOLOAD"] = os.environ.get("PLAN_CATALOG_AUTOLOAD", "1") == "1"
+    app.config["PLAN_CATALOG_CHECK_INTERVAL"] = 30   # seconds between checks for a newer catalog version
+
+    # JSON API (/api/v1): async views on one shared event loop, DB through aiosqlite / asyncpg
+    app.config["API_MAX_BATCH"] = 500   # logs per POST /api/v1/logs
+
+    app.config.update(config or {})
+
+    # DB URI (DATABASE_URL), SQLite pragmas / server pool options
+    configure_database(app)
+    db.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    job_runner.init_app(app)
+    app.extensions["dashboard_cache"] = make_cache(
+        app.config["DASHBOARD_CACHE_URL"],
+        maxsize=app.config["DASHBOARD_CACHE_SIZE"],
+        ttl=app.config["DASHBOARD_CACHE_TTL"],
+    )
+    app.extensions["identity_cache"] = IdentityCache(
+        maxsize=app.config["IDENTITY_CACHE_SIZE"],
+        ttl=app.config["IDENTITY_CACHE_TTL"],
+    )
+    app.extensions["password_hasher"] = PasswordHasher(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_QUEUE"],
+        bcrypt=bcrypt,
+    )
+    app.extensions["leaderboards"] = make_leaderboards(
+        app.config["LEADERBOARD_URL"],
+        sync_interval=app.config["LEADERBOARD_SYNC_INTERVAL"],
+    )
+    app.extensions["plan_catalog"] = PlanCatalog(check_interval=app.config["PLAN_CATALOG_CHECK_INTERVAL"])
+    AsyncDatabase(app)
+    app.register_blueprint(bp)
+    app.register_blueprint(api)
 
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config.get("SQLITE_PRAGMAS"))
+        perf_monitor.init_app(app, db.engine)
+        if app.config["PLAN_CATALOG_AUTOLOAD"]:
+            autoload_plan_catalog(app)
 
-# ----------------- App Init -----------------
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///wellness_app.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SECRET_KEY"] = "supersecretkey123"
+    if app.config["LEADERBOARD_REBUILD_INTERVAL"]:
+        start_periodic_rebuild(app, app.config["LEADERBOARD_REBUILD_INTERVAL"], app.extensions["leaderboards"])
+    return app
 
-db.init_app(app)
-bcrypt = Bcrypt(app)
 
+def autoload_plan_catalog(app):
+    """Load plans/*.py if they changed since the last load (one SELECT when they did not)."""
+    if not inspect(db.engine).has_table(CatalogVersion.__tablename__):
+        # schema changes stay a deploy step, so workers starting together never race on DDL
+        app.logger.warning("Plan catalog not loaded: run `flask upgrade-db` to create the schema")
+        return
+    counts = load_plan_catalog(app.config["PLAN_CATALOG_DIR"])
+    if counts is not None:
+        app.logger.info("Plan catalog loaded: %s", counts)
+    # build the in-memory copy now rather than on the first request
+    app.extensions["plan_catalog"].refresh(force=True)
 
-# ----------------- Login Manager -----------------
-login_manager = LoginManager(app)
-login_manager.login_view = "home"   # redirect to home if not logged in
 
+# ----------------- Login Manager -----------------
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # plan + selected activities come with the user, so routes and templates don't lazy-load them
+    options = User.graph_options(current_app.config["RELATIONSHIP_LOADING"])
+    return identity_cache.load(user_id, lambda: User.query.options(*options).get(int(user_id)))
 
 
 # ----------------- Routes -----------------
-@app.route("/", methods=["GET", "POST"])
+@bp.route("/", methods=["GET", "POST"])
 def home():
     # If already logged in → go straight to dashboard
     if current_user.is_authenticated:
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("main.dashboard"))
 
     login_form = LoginForm()
     register_form = RegistrationForm()
@@ -53,10 +225,16 @@ def home():
         password = request.form.get("password")
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        try:
+            valid = verify_login(user, password)
+        except HasherBusy:
+            flash("Too many sign-ins right now, please try again in a moment.", "warning")
+            return render_template("home.html", login_form=login_form, register_form=register_form), 503
+
+        if valid:
             login_user(user)
             flash("Login successful!", "success")
-            return redirect(url_for("dashboard"))
+            return redirect(url_for("main.dashboard"))
         else:
             flash("Invalid email or password", "danger")
 
@@ -72,25 +250,42 @@ def home():
         elif password != confirm_password:
             flash("Passwords must match!", "danger")
         else:
-            hashed_password = generate_password_hash(password, method="pbkdf2:sha256")
+            try:
+                hashed_password = password_hasher.hash(password)
+            except HasherBusy:
+                flash("Too many sign-ups right now, please try again in a moment.", "warning")
+                return render_template("home.html", login_form=login_form, register_form=register_form), 503
             new_user = User(username=username, email=email, password=hashed_password)
             db.session.add(new_user)
             db.session.commit()
             flash("Registration successful! Please log in.", "success")
-            return redirect(url_for("home"))
+            return redirect(url_for("main.home"))
 
     return render_template("home.html", login_form=login_form, register_form=register_form)
 
-@app.route("/logout")
+def verify_login(user, password):
+    """Check the password (may raise HasherBusy), upgrading an outdated hash on success."""
+    valid = user is not None and password_hasher.verify(user.password, password or "")
+    if valid and password_hasher.needs_rehash(user.password):
+        # hashing parameters changed since this hash was made → upgrade it now,
+        # unless the pool is saturated: the login stands, a later one upgrades it
+        try:
+            user.password = password_hasher.hash(password)
+        except HasherBusy:
+            return valid
+        db.session.commit()
+    return valid
+
+@bp.route("/logout")
 @login_required
 def logout():
     logout_user()
     flash("Logged out.", "info")
-    return redirect(url_for("home"))
+    return redirect(url_for("main.home"))
 
 
 # ----------------- Dashboard -----------------
-@app.route("/dashboard", methods=["GET", "POST"])
+@bp.route("/dashboard", methods=["GET", "POST"])
 @login_required
 def dashboard():
     today = date.today()
@@ -100,219 +295,197 @@ def dashboard():
         log_date_str = request.form.get("log_date")
         log_date = date.fromisoformat(log_date_str) if log_date_str else today
 
-        for ua in current_user.user_activities:
-            status = request.form.get(f"activity_{ua.activity.id}", "not_done")
-
-            existing_log = DailyLog.query.filter_by(
-                user_id=current_user.id,
-                activity_id=ua.activity.id,
-                log_date=log_date
-            ).first()
-
-            if existing_log:
-                existing_log.status = status
-            else:
-                new_log = DailyLog(
-                    user_id=current_user.id,
-                    activity_id=ua.activity.id,
-                    log_date=log_date,
-                    status=status
-                )
-                db.session.add(new_log)
-
+        statuses = {
+            ua.activity_id: request.form.get(f"activity_{ua.activity_id}", "not_done")
+            for ua in current_user.user_activities
+        }
+        if not set(statuses.values()) <= set(LEVELS):
+            flash("Unknown status.", "danger")
+            return redirect(url_for("main.dashboard"))
+        save_day_logs(current_user.id, log_date, statuses)
+
+        # The dashboard reads DailyLog directly; rollup and ranking follow in a job
+        enqueue_score_refresh(current_user.id, dates=[log_date])
+        mark_logs_changed(current_user, dashboard_cache, today)
+        identity_cache.invalidate(current_user.id)
         db.session.commit()
         flash(f"Log saved for {log_date}!", "success")
-        return redirect(url_for("dashboard"))
-
-    # --- Prepare Summary Logs ---
-    summary = {}
-    all_days = []
-    if current_user.plan_start_date:
-        all_days = [current_user.plan_start_date + timedelta(days=i)
-                    for i in range((today - current_user.plan_start_date).days + 1)]
-
-        for d in all_days:
-            logs = DailyLog.query.filter_by(user_id=current_user.id, log_date=d).all()
-            summary[d] = {log.activity_id: log.status for log in logs}
-
-    # --- Plan Progress ---
-    days_passed = (today - current_user.plan_start_date).days + 1 if current_user.plan_start_date else 0
-    total_days = current_user.plan.duration_days if current_user.plan else 0
-    completion_pct = round((days_passed / total_days) * 100, 1) if total_days else 0
-
-    # --- Score Calculation Helpers ---
-    score_map = {"not_done": 0, "L1": 5, "L2": 10, "L3": 15}
-
-    overall_score = 0
-    best_score = 0
-    streak = 0
-    current_streak = 0
-    best_activity = None
-    worst_activity = None
-
-    # Activity-wise scores
-    activity_scores = {ua.activity.id: [] for ua in current_user.user_activities}
-    overall_scores_by_day = []
-
-    for d in all_days:
-        logs = summary.get(d, {})
-        day_score = 0
-
-        for ua in current_user.user_activities:
-            status = logs.get(ua.activity.id, "not_done")
-            pts = score_map.get(status, 0)
-            activity_scores[ua.activity.id].append(pts)
-            day_score += pts
-
-        overall_scores_by_day.append(day_score)
-        overall_score += day_score
-        best_score = max(best_score, day_score)
-
-        # streak calc
-        if day_score > 0:
-            current_streak += 1
-            streak = max(streak, current_streak)
-        else:
-            current_streak = 0
-
-    # Find best/worst activities by avg score
-    activity_avgs = {aid: (sum(scores)/len(scores) if scores else 0)
-                     for aid, scores in activity_scores.items()}
-    if activity_avgs:
-        best_activity_id = max(activity_avgs, key=activity_avgs.get)
-        worst_activity_id = min(activity_avgs, key=activity_avgs.get)
-        best_activity = next((ua.activity.name for ua in current_user.user_activities if ua.activity.id == best_activity_id), None)
-        worst_activity = next((ua.activity.name for ua in current_user.user_activities if ua.activity.id == worst_activity_id), None)
-
-    # --- Trend Data for Chart.js ---
-    # Ensure JSON safe values (lists of ints only)
-    trend_data = {
-        "dates": [d.strftime("%Y-%m-%d") for d in all_days],
-        "overall": overall_scores_by_day or []
-    }
-    for ua in current_user.user_activities:
-        trend_data[f"activity_{ua.activity.id}"] = activity_scores.get(ua.activity.id, [])
+        return redirect(url_for("main.dashboard"))
+
+    # The identity may come from a per-process cache; read the write version fresh
+    db.session.refresh(current_user, ["log_version"])
+    view = dashboard_cache.get_or_build(
+        dashboard_cache_key(current_user, today),
+        lambda: build_dashboard(current_user, today, current_app.config["DASHBOARD_LOG_DAYS"])
+    )
 
     return render_template(
         "dashboard.html",
         plan=current_user.plan,
         activities=current_user.user_activities,
-        summary=summary,
         today=today,
-        # Progress stats
-        days_passed=days_passed,
-        total_days=total_days,
-        completion_pct=completion_pct,
-        # Scores
-        overall_score=overall_score,
-        best_score=best_score,
-        streak=streak,
-        best_activity=best_activity,
-        worst_activity=worst_activity,
-        # Trend data
-        trend_data=trend_data
+        **view
     )
 
 
+@bp.route("/dashboard/logs")
+@login_required
+def dashboard_logs():
+    """JSON page of the daily log grid (?end, default today; ?days, default DASHBOARD_LOG_DAYS)."""
+    today = date.today()
+    try:
+        end = date.fromisoformat(request.args["end"]) if request.args.get("end") else today
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    days = request.args.get("days", current_app.config["DASHBOARD_LOG_DAYS"], type=int)
+    days = min(max(1, days), current_app.config["DASHBOARD_LOG_DAYS_LIMIT"])
+    return jsonify(build_log_page(current_user, min(end, today), days))
+
+
+def _max_points_arg():
+    """?max_points= clamped to 3..TREND_MAX_POINTS_LIMIT (LTTB needs 3 to downsample at all)."""
+    value = request.args.get("max_points", current_app.config["TREND_MAX_POINTS"], type=int)
+    return min(max(3, value), current_app.config["TREND_MAX_POINTS_LIMIT"])
+
+
+@bp.route("/dashboard/trend")
+@login_required
+def dashboard_trend():
+    """JSON trend series for the dashboard chart (?series, start, end, bucket, max_points)."""
+    today = date.today()
+    series = request.args.get("series", "overall")
+    bucket = request.args.get("bucket", "day")
+    try:
+        start = date.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = date.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    max_points = _max_points_arg()
+
+    db.session.refresh(current_user, ["log_version"])
+    try:
+        payload = dashboard_cache.get_or_build(
+            trend_cache_key(current_user, today, series, start, end, bucket, max_points),
+            lambda: build_trend(current_user, today, series, start, end, bucket, max_points)
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(payload)
+
+
 
 
 # ----------------- Plans -----------------
-@app.route("/view_plan/<int:plan_id>")
+# Plans and activities come from the in-memory catalog (no SQL)
+@bp.route("/view_plan/<int:plan_id>")
 @login_required
 def view_plan(plan_id):
-    plan = Plan.query.get(plan_id)
+    plan = plan_catalog.get(plan_id)
     if not plan:
         flash("Plan not found.", "danger")
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("main.dashboard"))
     return render_template("view_plan.html", plan=plan, activities=plan.activities)
 
 
-@app.route("/plans")
+@bp.route("/plans")
 @login_required
 def plans():
-    plans = Plan.query.all()
-    return render_template("plans.html", plans=plans)
+    return render_template("plans.html", plans=plan_catalog.plans())
 
 
-@app.route("/select_plan/<int:plan_id>", methods=["GET", "POST"])
+@bp.route("/select_plan/<int:plan_id>", methods=["GET", "POST"])
 @login_required
 def select_plan(plan_id):
-    plan = Plan.query.get(plan_id)
+    plan = plan_catalog.get(plan_id)
+    if not plan:
+        flash("Plan not found.", "danger")
+        return redirect(url_for("main.plans"))
     activities = plan.activities
 
     if request.method == "POST":
         selected = request.form.getlist("activities")
         start_date = request.form.get("plan_start_date")
+        try:
+            activity_ids = [int(a_id) for a_id in selected]
+            start_date = date.fromisoformat(start_date) if start_date else None
+        except ValueError:
+            flash("Invalid selection.", "danger")
+            return redirect(url_for("main.select_plan", plan_id=plan.id))
 
-        levels = {}
-        total_points = 0
-        for a_id in selected:
-            level = request.form.get(f"level_{a_id}") or "L2"
-            levels[a_id] = level
-
-            if level == "L1":
-                total_points += 5
-            elif level == "L2":
-                total_points += 10
-            elif level == "L3":
-                total_points += 15
+        levels = {a_id: request.form.get(f"level_{a_id}") or "L2" for a_id in selected}
+        total_points = sum(points(level) for level in levels.values())
 
         # Threshold validations
+        if not set(levels.values()) <= set(LEVELS[1:]):
+            flash("Pick L1, L2 or L3 for each activity.", "danger")
+            return redirect(url_for("main.select_plan", plan_id=plan.id))
+
+        if not set(activity_ids) <= plan.activity_ids or len(set(activity_ids)) != len(activity_ids):
+            flash("Select activities from this plan only.", "danger")
+            return redirect(url_for("main.select_plan", plan_id=plan.id))
+
         if len(selected) < plan.min_activities or \
            (plan.max_activities and len(selected) > plan.max_activities):
             flash(f"Select between {plan.min_activities} and {plan.max_activities} activities.", "danger")
-            return redirect(url_for("select_plan", plan_id=plan.id))
+            return redirect(url_for("main.select_plan", plan_id=plan.id))
 
         if total_points < plan.min_points or \
            (plan.max_points and total_points > plan.max_points):
             flash(f"Your plan must have at least {plan.min_points} points.", "danger")
-            return redirect(url_for("select_plan", plan_id=plan.id))
+            return redirect(url_for("main.select_plan", plan_id=plan.id))
 
         # Save selections
+        previous_cohort = (current_user.plan_id, current_user.plan_start_date)
         UserActivity.query.filter_by(user_id=current_user.id).delete()
-        for a_id in selected:
+        for a_id, activity_id in zip(selected, activity_ids):
             ua = UserActivity(
                 user_id=current_user.id,
-                activity_id=int(a_id),
+                activity_id=activity_id,
                 level=levels[a_id]
             )
             db.session.add(ua)
+        enqueue_score_refresh(current_user.id, rebuild=True)
+        mark_logs_changed(current_user, dashboard_cache, date.today())
+        identity_cache.invalidate(current_user.id)
 
         # Assign plan + start date
-        current_user.plan = plan
+        current_user.plan_id = plan.id
         if start_date:
-            from datetime import datetime
-            current_user.plan_start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            current_user.plan_start_date = start_date
+        enqueue_aggregate_refresh(cohorts=[previous_cohort, (current_user.plan_id, current_user.plan_start_date)])
 
         db.session.commit()
         flash("Plan locked successfully!", "success")
-        return redirect(url_for("my_plan"))
+        return redirect(url_for("main.my_plan"))
 
-    return render_template("select_plan.html", plan=plan, activities=activities)
+    return render_template("select_plan.html", plan=plan, activities=activities, points=POINTS_MAPPING)
 
 
-@app.route("/my_plan")
+@bp.route("/my_plan")
 @login_required
 def my_plan():
     if not current_user.plan:
         flash("No plan selected yet.", "warning")
-        return redirect(url_for("plans"))
+        return redirect(url_for("main.plans"))
     return render_template("my_plan.html", plan=current_user.plan, activities=current_user.user_activities)
 
 
-@app.route("/about")
+@bp.route("/about")
 def about():
     return render_template("about.html")
 
-@app.route("/profile")
+@bp.route("/profile")
 @login_required
 def profile():
+    # badges and streaks come from the user's stats row, not from their logs
+    stats = profile_stats(db.session.get(UserStats, current_user.id), date.today())
     return render_template("profile.html",
                            user=current_user,
                            plan=current_user.plan,
-                           activities=current_user.user_activities)
+                           activities=current_user.user_activities,
+                           stats=stats)
 
-@app.route("/edit_profile", methods=["GET", "POST"])
+@bp.route("/edit_profile", methods=["GET", "POST"])
 @login_required
 def edit_profile():
     form = EditProfileForm(obj=current_user)  # prefill with existing data
@@ -323,77 +496,520 @@ def edit_profile():
         current_user.bio = form.bio.data
 
         db.session.commit()
+        identity_cache.invalidate(current_user.id)
         flash("Profile updated successfully!", "success")
-        return redirect(url_for("profile"))
+        return redirect(url_for("main.profile"))
 
     return render_template("edit_profile.html", form=form)
 
 
 
 # ----------------- Daily Log (per activity, old route) -----------------
-@app.route("/daily_log/<int:activity_id>", methods=["POST"])
+@bp.route("/daily_log/<int:activity_id>", methods=["POST"])
 @login_required
 def daily_log(activity_id):
     status = request.form.get("status")
     notes = request.form.get("notes")
+    if status not in LEVELS:
+        flash("Unknown status.", "danger")
+        return redirect(url_for("main.dashboard"))
 
-    existing_log = DailyLog.query.filter_by(
-        user_id=current_user.id,
-        activity_id=activity_id,
-        log_date=date.today()
-    ).first()
+    save_day_logs(current_user.id, date.today(),
+                  {activity_id: status}, notes={activity_id: notes})
 
-    if existing_log:
-        existing_log.status = status
-        existing_log.notes = notes
+    enqueue_score_refresh(current_user.id, dates=[date.today()])
+    mark_logs_changed(current_user, dashboard_cache, date.today())
+    identity_cache.invalidate(current_user.id)
+    db.session.commit()
+    flash("Log saved successfully!", "success")
+    return redirect(url_for("main.dashboard"))
+
+
+# ----------------- Background Jobs -----------------
+def _merge_score_refresh(old, new):
+    """Coalesce queued refreshes for one user: union of dates, or a full rebuild."""
+    if old.get("rebuild") or new.get("rebuild"):
+        return {"user_id": new["user_id"], "rebuild": True}
+    return {"user_id": new["user_id"],
+            "dates": sorted(set(old.get("dates", [])) | set(new.get("dates", [])))}
+
+
+@job_runner.task("refresh_user_scores", merge=_merge_score_refresh)
+def refresh_user_scores(user_id, dates=(), rebuild=False):
+    """Bring the user's DailyScore rollup, leaderboard entry and UserStats up to date with their logs."""
+    user = db.session.get(User, user_id)
+    if user is None:
+        return {"skipped": "user deleted"}
+    if rebuild:
+        rebuild_daily_scores(user_id)
+        changed = user_log_dates(user_id)
     else:
-        new_log = DailyLog(
-            user_id=current_user.id,
-            activity_id=activity_id,
-            log_date=date.today(),
-            status=status,
-            notes=notes
-        )
-        db.session.add(new_log)
+        changed = [date.fromisoformat(d) for d in dates]
+        refresh_daily_scores(user_id, changed)
+    ranking = refresh_leaderboard_entry(user, date.today())
+    refresh_user_stats(user_id)
+    enqueue_aggregate_refresh(dates=changed)
+    db.session.commit()
+    leaderboards.record(ranking)
+    return {"dates": len(dates), "rebuild": rebuild}
 
+
+@job_runner.task("rebuild_user_stats", max_attempts=1)
+def rebuild_user_stats_job():
+    """Repair: recompute every UserStats row from DailyLog."""
+    rows, corrected = rebuild_user_stats()
+    return {"rows": rows, "corrected": corrected}
+
+
+@job_runner.task("archive_logs", max_attempts=1)
+def archive_logs_job(days=None):
+    """Move logs past the archive horizon (and from previous plans) to the archive table."""
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    return archive_logs(date.today() - timedelta(days=days),
+                        previous_plans=current_app.config["ARCHIVE_PREVIOUS_PLANS"])
+
+
+def _merge_aggregate_refresh(old, new):
+    return {"dates": sorted(set(old.get("dates", [])) | set(new.get("dates", []))),
+            "cohorts": sorted({tuple(c) for c in old.get("cohorts", []) + new.get("cohorts", [])})}
+
+
+@job_runner.task("refresh_aggregates", merge=_merge_aggregate_refresh)
+def refresh_aggregates_job(dates=(), cohorts=()):
+    """Recompute the plan/activity/cohort rollups of changed dates and cohorts."""
+    refresh_aggregates([date.fromisoformat(d) for d in dates],
+                       [(plan_id, date.fromisoformat(cohort)) for plan_id, cohort in cohorts])
     db.session.commit()
-    flash("Log saved successfully!", "success")
-    return redirect(url_for("dashboard"))
+    return {"dates": len(dates), "cohorts": len(cohorts)}
+
+
+def enqueue_aggregate_refresh(dates=(), cohorts=()):
+    """
+    Mark dates and (plan_id, cohort_date) cohorts for the shared rollup
+    refresh. One job for everyone, delayed by AGGREGATES_DELAY, so a busy
+    day costs one recompute of that date per delay, not one per write.
+    """
+    cohorts = [(plan_id, cohort) for plan_id, cohort in cohorts if plan_id and cohort]
+    if not dates and not cohorts:
+        return None
+    payload = {"dates": sorted({d.isoformat() for d in dates}),
+               "cohorts": sorted({(plan_id, cohort.isoformat()) for plan_id, cohort in cohorts})}
+    return job_runner.enqueue("refresh_aggregates", payload, key="aggregates",
+                              delay=current_app.config["AGGREGATES_DELAY"])
+
+
+def enqueue_score_refresh(user_id, dates=(), rebuild=False):
+    """Queue (or merge into the queued) score refresh for a user, in the current transaction."""
+    payload = {"user_id": user_id, "rebuild": True} if rebuild else \
+              {"user_id": user_id, "dates": [d.isoformat() for d in dates]}
+    return job_runner.enqueue("refresh_user_scores", payload, key=f"scores:{user_id}", user_id=user_id)
+
+
+def is_admin(user):
+    return user.email.lower() in current_app.config["ADMIN_EMAILS"]
+
+
+@bp.route("/jobs/<int:job_id>")
+@login_required
+def job_status(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None or (job.user_id != current_user.id and not is_admin(current_user)):
+        abort(404)
+    return jsonify(job_dict(job))
+
+
+@bp.route("/admin/jobs")
+@login_required
+def jobs_overview():
+    if not is_admin(current_user):
+        abort(403)
+    # this process's dashboard/trend view cache counters ride along with the queue status
+    return jsonify({**job_runner.status(), "dashboard_cache": dashboard_cache.stats()})
+
+
+# ----------------- Leaderboards -----------------
+@bp.route("/leaderboard")
+@login_required
+def leaderboard():
+    metric = request.args.get("metric", "total_points")
+    if metric not in METRICS:
+        metric = "total_points"
+    plan_id = request.args.get("plan_id", type=int)
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = current_app.config["LEADERBOARD_PAGE_SIZE"]
+
+    rows, total = leaderboards.page(metric, plan_id, page, per_page)
+    names = dict(db.session.query(User.id, User.username)
+                 .filter(User.id.in_([user_id for _, user_id, _ in rows])))
+    return render_template(
+        "leaderboard.html",
+        metric=metric, metrics=METRICS,
+        plan_id=plan_id, plans=plan_catalog.plans(),
+        rows=[(rank, names.get(user_id, "?"), score, user_id == current_user.id)
+              for rank, user_id, score in rows],
+        page=page, pages=max(1, -(-total // per_page)), total=total,
+        my_rank=leaderboards.rank(metric, current_user.id, plan_id),
+    )
+
+
+@bp.route("/debug/perf", methods=["GET", "POST"])
+@login_required
+def debug_perf():
+    """Aggregated request timings (PERF_INSTRUMENTATION only); POST clears them."""
+    if not current_app.config["PERF_INSTRUMENTATION"]:
+        abort(404)
+    if not is_admin(current_user):
+        abort(403)
+    if request.method == "POST":
+        perf_monitor.reset()
+    return jsonify(perf_monitor.report())
+
+
+# ----------------- Admin Reports -----------------
+# Read from the aggregate rollup tables only, never from DailyLog
+def _admin_plan_report():
+    if not is_admin(current_user):
+        abort(403)
+    plans = plan_catalog.plans()
+    plan_id = request.args.get("plan_id", type=int) or (plans[0].id if plans else None)
+    plan = plan_catalog.get(plan_id)
+    if plan is None:
+        abort(404)
+    days = min(max(1, request.args.get("days", current_app.config["REPORT_DAYS"], type=int)), 366)
+    return plans, plan_report(plan, date.today(), days)
+
+
+@bp.route("/admin/reports")
+@login_required
+def admin_report():
+    plans, report = _admin_plan_report()
+    return render_template("admin_report.html", plans=plans, report=report)
+
+
+@bp.route("/admin/reports.json")
+@login_required
+def admin_report_json():
+    _, report = _admin_plan_report()
+    return jsonify(report)
+
+
+# ----------------- Export -----------------
+def _export_response(fmt, filename, **filters):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    chunks = export_logs(fmt, chunk_size=current_app.config["EXPORT_CHUNK_SIZE"], **filters)
+    # No Content-Length: the body goes out chunk by chunk as rows are fetched
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"},
+    )
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        abort(400, f"{name} must be YYYY-MM-DD")
+
+
+@bp.route("/export/logs.<fmt>")
+@login_required
+def export_my_logs(fmt):
+    return _export_response(fmt, f"daily_logs_{current_user.id}", user_id=current_user.id,
+                            start_date=_date_arg("start"), end_date=_date_arg("end"))
+
+
+@bp.route("/admin/export/logs.<fmt>")
+@login_required
+def export_all_logs(fmt):
+    if not is_admin(current_user):
+        abort(403)
+    start, end = _date_arg("start"), _date_arg("end")
+    return _export_response(fmt, f"daily_logs_{start or 'all'}_{end or 'all'}",
+                            start_date=start, end_date=end)
+
+
+# ----------------- Import -----------------
+@bp.route("/import/logs", methods=["POST"])
+@login_required
+def import_my_logs():
+    """Upload a CSV/NDJSON file (field "file") of the current user's logs; returns the report."""
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"error": "no file uploaded"}), 400
+    fmt = request.args.get("format") or upload.filename.rsplit(".", 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {IMPORT_FORMATS}"}), 400
+
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", newline="")
+    report = import_logs(read_records(stream, fmt), user_id=current_user.id,
+                         chunk_size=current_app.config["IMPORT_CHUNK_SIZE"])
+    # import_logs bumped log_version, so cached dashboards are already unreachable
+    identity_cache.invalidate(current_user.id)
+    enqueue_import_aggregates(report)
+    return jsonify(report.as_dict())
+
+
+def enqueue_import_aggregates(report):
+    """Queue the rollup refresh for every date an import may have touched."""
+    enqueue_aggregate_refresh(dates={day for first, last in report.users.values()
+                                     for day in dates_between(first, last)})
+    db.session.commit()
+
+
+# ----------------- JSON API (v1) -----------------
+# Async views: they run on the shared event loop (utils.aio) and read the DB
+# through async_db, so many slow requests can wait on the database at once.
+# The session user still comes from the sync user loader (identity cache).
+@api.errorhandler(HTTPException)
+def api_error(exc):
+    return jsonify({"error": exc.description}), exc.code
+
+
+def _json_body():
+    body = request.get_json(silent=True)
+    return body if isinstance(body, dict) else {}
+
+
+def _not_modified(etag, last_modified):
+    """True if the client's copy is current; If-None-Match takes precedence over If-Modified-Since."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+
+def _api_response(payload, etag, last_modified):
+    """JSON (or an empty 304 for payload None) with the validators; clients must revalidate."""
+    response = jsonify(payload) if payload is not None else current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+async def _conditional_get(build, *params):
+    """
+    Answer a GET from build(conn, today), unless the client already has it:
+    the validators come from one indexed read of the user row, so a 304 costs
+    no log queries at all. Payloads share the dashboard cache, keyed by ETag.
+    """
+    today = date.today()
+    async with async_db.engine.connect() as conn:
+        version, updated_at = await fetch_log_version(conn, current_user.id)
+        etag = api_etag(current_user.id, version, today, request.path, *params)
+        last_modified = api_last_modified(updated_at, today)
+        if _not_modified(etag, last_modified):
+            return _api_response(None, etag, last_modified)
+        payload = await dashboard_cache.get_or_build_async(f"api:{etag}", lambda: build(conn, today))
+    return _api_response(payload, etag, last_modified)
+
+
+def _after_api_write(user_id, dates):
+    """Sync follow-ups of an API write (job queue, identity cache); run off the event loop."""
+    enqueue_score_refresh(user_id, dates=sorted(dates))
+    db.session.commit()
+    identity_cache.invalidate(user_id)
+
+
+@api.route("/session", methods=["POST"])
+def api_login():
+    """{"email", "password"} → session cookie for the other API calls."""
+    body = _json_body()
+    user = User.query.filter_by(email=body.get("email")).first()
+    try:
+        valid = verify_login(user, body.get("password"))
+    except HasherBusy:
+        return jsonify({"error": "too many sign-ins right now, retry shortly"}), 503
+    if not valid:
+        return jsonify({"error": "invalid email or password"}), 401
+    login_user(user)
+    return jsonify({"id": user.id, "username": user.username})
+
+
+@api.route("/session", methods=["DELETE"])
+@login_required
+def api_logout():
+    logout_user()
+    return "", 204
+
+
+@api.route("/today")
+@login_required
+async def api_today():
+    """Selected activities with level and logged status for ?date= (default today)."""
+    day = _date_arg("date")
+    return await _conditional_get(lambda conn, today: fetch_day(conn, current_user, day or today), day)
+
+
+@api.route("/summary")
+@login_required
+async def api_summary():
+    """The dashboard's plan progress and scores."""
+    return await _conditional_get(lambda conn, today: fetch_summary(conn, current_user, today))
+
+
+@api.route("/trend")
+@login_required
+async def api_trend():
+    """Same parameters and payload as /dashboard/trend."""
+    series = request.args.get("series", "overall")
+    bucket = request.args.get("bucket", "day")
+    start, end = _date_arg("start"), _date_arg("end")
+    max_points = _max_points_arg()
+
+    async def build(conn, today):
+        try:
+            return await fetch_trend(conn, current_user, today, series, start, end, bucket, max_points)
+        except ValueError as exc:
+            abort(400, str(exc))
+
+    return await _conditional_get(build, series, start, end, bucket, max_points)
+
+
+@api.route("/logs", methods=["POST"])
+@login_required
+async def api_save_logs():
+    """
+    {"logs": [{"date", "activity_id", "status", "notes"?}, ...]}: a batch of
+    days (e.g. an offline client catching up) saved in one transaction, or
+    nothing saved and a 400 listing every invalid entry.
+    """
+    activity_ids = {ua.activity_id for ua in current_user.user_activities}
+    rows, errors = parse_log_batch(_json_body().get("logs"), activity_ids, current_app.config["API_MAX_BATCH"])
+    if errors:
+        return jsonify({"errors": errors}), 400
+
+    async with async_db.engine.begin() as conn:
+        version = await save_log_batch(conn, current_user.id, rows)
+    await asyncio.to_thread(_after_api_write, current_user.id, {row["log_date"] for row in rows})
+    return jsonify({"saved": len(rows), "log_version": version})
+
+
+# ---------------- CLI ----------------
+@bp.cli.command("rebuild-scores")
+def rebuild_scores_command():
+    """Backfill the DailyScore rollup from existing DailyLog rows."""
+    db.create_all()
+    rows = rebuild_all_daily_scores()
+    print(f"Rebuilt {rows} daily score rows.")
+
+
+@bp.cli.command("import-logs")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(IMPORT_FORMATS), help="Defaults to the file extension.")
+@click.option("--user-id", type=int, help="Import every row for this user instead of the user_id column.")
+@click.option("--chunk-size", type=int, default=None, help="Rows per upsert and commit.")
+@click.option("--no-notes", is_flag=True, help="Leave notes of existing logs untouched.")
+def import_logs_command(path, fmt, user_id, chunk_size, no_notes):
+    """Bulk-load DailyLog rows from a CSV/NDJSON file and refresh derived scores."""
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        raise click.BadParameter(f"cannot tell the format of {path}; pass --format")
+    with open(path, encoding="utf-8", newline="") as stream:
+        report = import_logs(read_records(stream, fmt), user_id=user_id,
+                             chunk_size=chunk_size or current_app.config["IMPORT_CHUNK_SIZE"],
+                             with_notes=not no_notes)
+    enqueue_import_aggregates(report)
+    print(f"Imported {report.accepted} rows for {len(report.users)} users in "
+          f"{report.elapsed:.1f}s ({report.rows_per_second:,.0f} rows/s); rejected {report.rejected}.")
+    for reason, count in report.reasons.most_common():
+        print(f"  {count:>9}  {reason}")
+    for line, reason in report.samples[:20]:
+        print(f"  line {line}: {reason}")
+
+
+@bp.cli.command("rebuild-leaderboards")
+def rebuild_leaderboards_command():
+    """Recompute every leaderboard entry from the rollup (run daily, e.g. from cron)."""
+    entries, corrected = rebuild_leaderboards(date.today())
+    print(f"Rebuilt {entries} leaderboard entries; {corrected} disagreed with the stored values.")
+
+
+@bp.cli.command("rebuild-stats")
+@click.option("--enqueue", is_flag=True, help="Queue the rebuild for the job workers instead.")
+def rebuild_stats_command(enqueue):
+    """Recompute every user's profile stats from their logs."""
+    if enqueue:
+        job = job_runner.enqueue("rebuild_user_stats", {}, key="rebuild_user_stats")
+        db.session.commit()
+        print(f"Queued job {job.id}.")
+        return
+    rows, corrected = rebuild_user_stats()
+    print(f"Rebuilt {rows} user stats rows; {corrected} were missing or disagreed with the logs.")
+
+
+@bp.cli.command("rebuild-aggregates")
+def rebuild_aggregates_command():
+    """Recompute the plan/activity/cohort rollups behind the admin report from scratch."""
+    counts = rebuild_aggregates()
+    print("Rebuilt " + ", ".join(f"{rows} {table} rows" for table, rows in counts.items()) + ".")
+
+
+@bp.cli.command("archive-logs")
+@click.option("--days", type=int, default=None, help="Archive logs older than this (default ARCHIVE_AFTER_DAYS).")
+@click.option("--enqueue", is_flag=True, help="Queue the archiving for the job workers instead.")
+@click.option("--vacuum", is_flag=True, help="VACUUM afterwards so the SQLite file shrinks.")
+def archive_logs_command(days, enqueue, vacuum):
+    """Move old logs to the archive table (reads keep seeing them)."""
+    if enqueue:
+        job = job_runner.enqueue("archive_logs", {"days": days}, key="archive_logs")
+        db.session.commit()
+        print(f"Queued job {job.id}.")
+        return
+    moved = archive_logs_job(days=days)
+    print(f"Archived {moved['logs']} logs of {moved['users']} users.")
+    if vacuum and db.engine.dialect.name == "sqlite":
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    for table, size in storage_report().items():
+        mib = f", {size['bytes'] / 2**20:,.1f} MiB with indexes" if size["bytes"] is not None else ""
+        print(f"  {table}: {size['rows']:,} rows{mib}")
+
+
+@bp.cli.command("run-jobs")
+@click.option("--once", is_flag=True, help="Run the jobs due now, then exit.")
+def run_jobs_command(once):
+    """Run a job worker in this process (use with JOBS_MODE=worker; start several for more throughput)."""
+    if once:
+        print(f"Ran {job_runner.run_pending()} jobs.")
+        return
+    job_runner.work()
+
+
+@bp.cli.command("load-plans")
+@click.option("--force", is_flag=True, help="Reload even if the plan files are unchanged.")
+def load_plans_command(force):
+    """Load plans/*.py into the Plan/Activity tables (skipped when the files are unchanged)."""
+    db.create_all()
+    counts = load_plan_catalog(current_app.config["PLAN_CATALOG_DIR"], force=force)
+    if counts is None:
+        print("Plan catalog unchanged.")
+        return
+    print("Plan catalog loaded: " + ", ".join(f"{n} {k.replace('_', ' ')}" for k, n in counts.items()))
+
+
+@bp.cli.command("upgrade-db")
+def upgrade_db_command():
+    """Dedupe rows and build missing tables/indexes on an existing database."""
+    removed = upgrade_database()
+    print(f"Removed {removed['daily_log']} duplicate logs and "
+          f"{removed['user_activity']} duplicate activity selections.")
+    for table, unknown in removed["levels"].items():
+        print(f"Stored {table} levels as integer codes ({unknown} unknown names became not_done).")
+    for column in removed["widened"]:
+        print(f"Widened {column}.")
+    if load_plan_catalog(current_app.config["PLAN_CATALOG_DIR"]) is not None:
+        print("Plan catalog loaded.")
 
 
 # ---------------- Main ----------------
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         db.create_all()
-
-        # load plans if empty
-        if not Plan.query.first():
-            plans_folder = "plans"
-            for filename in os.listdir(plans_folder):
-                if filename.endswith(".py"):
-                    module_name = filename[:-3]
-                    module = importlib.import_module(f"plans.{module_name}")
-
-                    plan = Plan(
-                        name=module.plan_name,
-                        min_activities=getattr(module, "min_activities", 1),
-                        max_activities=getattr(module, "max_activities", None),
-                        min_points=getattr(module, "min_points", 0),
-                        max_points=getattr(module, "max_points", None),
-                    )
-                    db.session.add(plan)
-                    db.session.commit()
-
-                    for act in module.activities:
-                        activity = Activity(
-                            name=act["name"],
-                            level1=act["level1"],
-                            level2=act["level2"],
-                            level3=act["level3"],
-                            recommended=act.get("recommended"),
-                            plan=plan
-                        )
-                        db.session.add(activity)
-                    db.session.commit()
+        load_plan_catalog(app.config["PLAN_CATALOG_DIR"])
 
     app.run(debug=True)
@@ -0,0 +1,156 @@
+# benchmarks/bench_aggregates.py
+"""
+Plan report from the aggregate rollups vs. the same numbers computed ad hoc
+from DailyLog/DailyScore joins, on a synthetic SQLite dataset (1M users by
+default), plus the cost of the incremental per-date refresh and a rebuild.
+
+    python benchmarks/bench_aggregates.py --users 1000000 --days 90
+    python benchmarks/bench_aggregates.py --users 100000 --logs-per-day 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import case, distinct, func, select
+from levels import CODES, POINTS_MAPPING
+from models import db, User, Plan, Activity, DailyLog, DailyScore
+from utils.aggregates import plan_report, rebuild_aggregates, refresh_aggregates
+from utils.catalog import PlanCatalog
+from utils.scoring import points_case
+
+PLANS, ACTIVITIES = 3, 6
+STATUSES = list(POINTS_MAPPING)
+
+
+# ----------------- Seeding -----------------
+def seed(users, days, logs_per_day, today, batch=200_000):
+    """
+    Users spread over PLANS plans and start dates in the last `days` days;
+    each day of plan is logged with a probability that decays like real
+    retention. DailyLog and the matching DailyScore rows go in through the
+    raw DBAPI connection, since ORM inserts would dominate the run.
+    """
+    for p in range(1, PLANS + 1):
+        db.session.add(Plan(id=p, name=f"Plan {p}", duration_days=30))
+        for a in range(ACTIVITIES):
+            db.session.add(Activity(id=(p - 1) * ACTIVITIES + a + 1, plan_id=p, name=f"P{p} activity {a}",
+                                    level1="l1", level2="l2", level3="l3"))
+    db.session.commit()
+
+    rng = random.Random(42)
+    conn = db.engine.raw_connection()
+    cur = conn.cursor()
+    user_rows, log_rows, score_rows = [], [], []
+
+    def flush():
+        cur.executemany("INSERT INTO user (id, username, email, password, plan_id, plan_start_date, log_version) "
+                        "VALUES (?, ?, ?, 'x', ?, ?, 0)", user_rows)
+        cur.executemany("INSERT INTO daily_log (user_id, activity_id, log_date, status) VALUES (?, ?, ?, ?)", log_rows)
+        cur.executemany("INSERT INTO daily_score (user_id, score_date, total_points, not_done_count, l1_count, "
+                        "l2_count, l3_count) VALUES (?, ?, ?, ?, ?, ?, ?)", score_rows)
+        user_rows.clear(), log_rows.clear(), score_rows.clear()
+
+    for user_id in range(1, users + 1):
+        plan_id = rng.randrange(1, PLANS + 1)
+        start = today - timedelta(days=rng.randrange(days))
+        user_rows.append((user_id, f"u{user_id}", f"u{user_id}@example.com", plan_id, start.isoformat()))
+        activities = rng.sample(range((plan_id - 1) * ACTIVITIES + 1, plan_id * ACTIVITIES + 1), logs_per_day)
+        for k in range((today - start).days + 1):
+            if rng.random() >= 0.7 * 0.85 ** k:
+                continue
+            day = (start + timedelta(days=k)).isoformat()
+            statuses = [rng.choice(STATUSES) for _ in activities]
+            log_rows.extend((user_id, a, day, CODES[s]) for a, s in zip(activities, statuses))
+            score_rows.append((user_id, day, sum(POINTS_MAPPING[s] for s in statuses),
+                               *(statuses.count(s) for s in STATUSES)))
+        if len(log_rows) >= batch:
+            flush()
+    flush()
+    conn.commit()
+    conn.close()
+
+
+# ----------------- Ad hoc -----------------
+def adhoc_report(plan_id, start, today):
+    """The report's numbers straight from the base tables (what the rollups replace)."""
+    active = db.session.execute(
+        select(DailyLog.log_date, func.count(distinct(DailyLog.user_id)), func.count(), func.sum(points_case()))
+        .join(User, User.id == DailyLog.user_id)
+        .where(User.plan_id == plan_id, DailyLog.log_date.between(start, today))
+        .group_by(DailyLog.log_date)).all()
+    activities = db.session.execute(
+        select(DailyLog.activity_id, func.count(), func.sum(case((DailyLog.status != "not_done", 1), else_=0)),
+               func.sum(points_case()))
+        .join(User, User.id == DailyLog.user_id)
+        .where(User.plan_id == plan_id, DailyLog.log_date.between(start, today))
+        .group_by(DailyLog.activity_id)).all()
+    cohorts = db.session.execute(
+        select(User.plan_start_date, DailyScore.score_date, func.count())
+        .join(User, User.id == DailyScore.user_id)
+        .where(User.plan_id == plan_id, DailyScore.score_date >= User.plan_start_date)
+        .group_by(User.plan_start_date, DailyScore.score_date)).all()
+    sizes = db.session.execute(
+        select(User.plan_start_date, func.count()).where(User.plan_id == plan_id)
+        .group_by(User.plan_start_date)).all()
+    return active, activities, cohorts, sizes
+
+
+def timed(fn, *args, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90, help="plan start dates spread over this many days")
+    parser.add_argument("--logs-per-day", type=int, default=2, help="activities logged on an active day")
+    parser.add_argument("--report-days", type=int, default=30)
+    args = parser.parse_args()
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            seconds, _ = timed(seed, args.users, args.days, args.logs_per_day, today)
+            counts = {model.__tablename__: db.session.scalar(select(func.count()).select_from(model))
+                      for model in (User, DailyLog, DailyScore)}
+            print(f"Seeded {counts} in {seconds:.0f}s")
+
+            seconds, rows = timed(rebuild_aggregates)
+            print(f"\nrebuild_aggregates (one-off backfill)       {seconds * 1000:>10.0f} ms  {rows}")
+            seconds, _ = timed(lambda: (refresh_aggregates([today]), db.session.commit()), repeat=5)
+            print(f"refresh_aggregates, 1 date (per job run)     {seconds * 1000:>10.1f} ms")
+            seconds, _ = timed(lambda: (refresh_aggregates([today - timedelta(days=d) for d in range(7)]),
+                                        db.session.commit()), repeat=3)
+            print(f"refresh_aggregates, 7 dates                  {seconds * 1000:>10.1f} ms")
+
+            catalog = PlanCatalog(check_interval=0)
+            start = today - timedelta(days=args.report_days - 1)
+            print(f"\n{'plan':>4} | {'ad hoc ms':>10} | {'rollups ms':>10} {'speedup':>8} | same DAU")
+            for plan_id in range(1, PLANS + 1):
+                adhoc_s, (active, *_) = timed(adhoc_report, plan_id, start, today)
+                plan = catalog.get(plan_id)
+                rollup_s, report = timed(plan_report, plan, today, args.report_days, repeat=5)
+                same = {r[0].isoformat(): r[1] for r in active} == \
+                       {r["date"]: r["active_users"] for r in report["daily_active"] if r["active_users"]}
+                print(f"{plan_id:>4} | {adhoc_s * 1000:>10.0f} | {rollup_s * 1000:>10.1f} "
+                      f"{adhoc_s / rollup_s:>7.0f}x | {same}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
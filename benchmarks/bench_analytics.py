@@ -0,0 +1,140 @@
+# benchmarks/bench_analytics.py
+"""
+Dashboard score computation on 1-, 5- and 10-year histories: the previous
+path (ORM log load + per-cell Python loop) vs. the current one (column
+load + NumPy points matrix from utils/analytics.py). Also reports the
+compute step alone, starting from the same summary pivot.
+
+    python benchmarks/bench_analytics.py --activities 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from levels import POINTS_MAPPING
+from models import db, DailyLog
+from utils.analytics import PointsMatrix, summarize
+from utils.logs import load_log_summary
+
+
+def legacy_loop(all_days, summary, activity_ids):
+    """The loop dashboard() used before utils/analytics.py."""
+    score_map = {"not_done": 0, "L1": 5, "L2": 10, "L3": 15}
+    overall_score = best_score = streak = current_streak = 0
+    activity_scores = {aid: [] for aid in activity_ids}
+    overall_scores_by_day = []
+    for d in all_days:
+        logs = summary.get(d, {})
+        day_score = 0
+        for aid in activity_ids:
+            pts = score_map.get(logs.get(aid, "not_done"), 0)
+            activity_scores[aid].append(pts)
+            day_score += pts
+        overall_scores_by_day.append(day_score)
+        overall_score += day_score
+        best_score = max(best_score, day_score)
+        if day_score > 0:
+            current_streak += 1
+            streak = max(streak, current_streak)
+        else:
+            current_streak = 0
+    avgs = {aid: (sum(s) / len(s) if s else 0) for aid, s in activity_scores.items()}
+    best = max(avgs, key=avgs.get) if avgs else None
+    worst = min(avgs, key=avgs.get) if avgs else None
+    return overall_score, best_score, streak, best, worst, overall_scores_by_day
+
+
+def matrix_path(all_days, summary, activity_ids):
+    matrix = PointsMatrix.from_summary(all_days, summary, activity_ids)
+    stats = summarize(matrix)
+    return (stats["overall_score"], stats["best_score"], stats["longest_streak"],
+            stats["best_activity_id"], stats["worst_activity_id"], stats["totals"].tolist())
+
+
+def synthetic(days, activities, seed=7):
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=days - 1)
+    all_days = [start + timedelta(days=i) for i in range(days)]
+    statuses = list(POINTS_MAPPING)
+    summary = {d: ({aid: rng.choice(statuses) for aid in range(1, activities + 1) if rng.random() < 0.8}
+                   if rng.random() < 0.9 else {})
+               for d in all_days}
+    return all_days, summary, list(range(1, activities + 1))
+
+
+def best_of(fn, args, repeat=7):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def legacy_end_to_end(user, today, activity_ids):
+    """ORM rows → summary → loop, as dashboard() did before."""
+    all_days = [user.plan_start_date + timedelta(days=i)
+                for i in range((today - user.plan_start_date).days + 1)]
+    summary = {d: {} for d in all_days}
+    for log in DailyLog.query.filter(DailyLog.user_id == user.id,
+                                     DailyLog.log_date >= all_days[0],
+                                     DailyLog.log_date <= today):
+        summary[log.log_date][log.activity_id] = log.status
+    return legacy_loop(all_days, summary, activity_ids)
+
+
+def matrix_end_to_end(user, today, activity_ids):
+    all_days, summary = load_log_summary(user, today)
+    return matrix_path(all_days, summary, activity_ids)
+
+
+def seed_user(all_days, summary):
+    db.session.execute(DailyLog.__table__.insert(), [
+        {"user_id": 1, "activity_id": aid, "log_date": d, "status": status}
+        for d, logs in summary.items() for aid, status in logs.items()
+    ])
+    db.session.commit()
+    return SimpleNamespace(id=1, plan_start_date=all_days[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--activities", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'history':<10} {'logs':>7} | {'compute: loop':>13} {'matrix':>8} | "
+          f"{'end-to-end: old':>15} {'new':>8} {'speedup':>8}")
+    for years in (1, 5, 10):
+        all_days, summary, activity_ids = synthetic(365 * years, args.activities)
+        loop_ms, expected = best_of(legacy_loop, (all_days, summary, activity_ids))
+        matrix_ms, actual = best_of(matrix_path, (all_days, summary, activity_ids))
+        assert actual == expected, "matrix results differ from the loop"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Flask(__name__)
+            app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            db.init_app(app)
+            with app.app_context():
+                db.create_all()
+                user = seed_user(all_days, summary)
+                today = all_days[-1]
+                old_ms, expected = best_of(legacy_end_to_end, (user, today, activity_ids), repeat=3)
+                new_ms, actual = best_of(matrix_end_to_end, (user, today, activity_ids), repeat=3)
+                assert actual == expected, "end-to-end results differ"
+                db.session.remove()
+                db.engine.dispose()
+
+        logs = sum(len(v) for v in summary.values())
+        print(f"{years:>2} years   {logs:>7} | {loop_ms:>10.2f} ms {matrix_ms:>5.2f} ms | "
+              f"{old_ms:>12.2f} ms {new_ms:>5.2f} ms {old_ms / new_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# benchmarks/bench_api.py
+"""
+Compare the sync HTML/JSON routes with the async /api/v1 routes over real
+HTTP (threaded werkzeug server on a throwaway SQLite database), at several
+client concurrencies: throughput, latency percentiles and response bytes.
+
+    python benchmarks/bench_api.py --users 32 --days 180 --requests 40
+    python benchmarks/bench_api.py --concurrency 1 8 32 --json api.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from loadtest import PASSWORD, STATUSES, seed, percentile   # noqa: E402
+
+BATCH_DAYS = 7   # days per POST /api/v1/logs (an offline client catching up)
+
+
+# ----------------- Client -----------------
+class Client:
+    """One logged-in user on a keep-alive connection."""
+
+    def __init__(self, port, n):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port)
+        self.cookie = None
+        status, _, headers = self.request("POST", "/api/v1/session",
+                                          {"email": f"load{n}@example.com", "password": PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"login failed: HTTP {status}")
+        self.cookie = headers["Set-Cookie"].split(";", 1)[0]
+
+    def request(self, method, url, body=None, form=False, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if body is not None and form:
+            body = urlencode(body, doseq=True)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self.conn.request(method, url, body=body, headers=headers)
+        response = self.conn.getresponse()
+        payload = response.read()
+        return response.status, payload, response.headers
+
+
+# ----------------- Scenarios -----------------
+def scenarios(activity_ids):
+    """name → (method, url, body builder or None, as form?, expected status, logs written per request)."""
+    def day_form(rng):
+        form = {"log_date": (date.today() - timedelta(days=rng.randrange(30))).isoformat()}
+        form.update({f"activity_{a}": rng.choice(STATUSES) for a in activity_ids})
+        return form
+
+    def batch(rng):
+        first = rng.randrange(30)
+        return {"logs": [{"date": (date.today() - timedelta(days=first + d)).isoformat(),
+                          "activity_id": a, "status": rng.choice(STATUSES)}
+                         for d in range(BATCH_DAYS) for a in activity_ids]}
+
+    return {
+        "sync  GET /dashboard": ("GET", "/dashboard", None, False, 200, 0),
+        "async GET /api/v1/summary": ("GET", "/api/v1/summary", None, False, 200, 0),
+        "sync  GET /dashboard/trend": ("GET", "/dashboard/trend?bucket=week", None, False, 200, 0),
+        "async GET /api/v1/trend": ("GET", "/api/v1/trend?bucket=week", None, False, 200, 0),
+        "async GET /api/v1/summary 304": ("GET", "/api/v1/summary", None, False, 304, 0),
+        "sync  POST /dashboard (1 day)": ("POST", "/dashboard", day_form, True, 302, len(activity_ids)),
+        f"async POST /api/v1/logs ({BATCH_DAYS} days)": ("POST", "/api/v1/logs", batch, False, 200,
+                                                         BATCH_DAYS * len(activity_ids)),
+    }
+
+
+def run_scenario(clients, spec, requests_per_client):
+    method, url, build, form, expect, _ = spec
+    latencies, sizes, errors = [], [], []
+
+    def worker(n, client):
+        rng = random.Random(n)
+        headers = {}
+        if expect == 304:
+            _, _, first = client.request(method, url)
+            headers["If-None-Match"] = first["ETag"]
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            status, payload, _ = client.request(method, url, build(rng) if build else None, form, headers)
+            latencies.append(time.perf_counter() - started)
+            sizes.append(len(payload))
+            if status != expect:
+                errors.append(status)
+
+    threads = [threading.Thread(target=worker, args=(n, c)) for n, c in enumerate(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(f"{method} {url}: unexpected HTTP {sorted(set(errors))}")
+    latencies = sorted(ms * 1000 for ms in latencies)
+    return {"requests": len(latencies), "req_per_s": round(len(latencies) / wall, 1),
+            "p50_ms": round(percentile(latencies, 50), 2), "p95_ms": round(percentile(latencies, 95), 2),
+            "bytes": round(sum(sizes) / len(sizes))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--activities", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=40, help="requests per client per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench_api.db')}"
+        os.environ.setdefault("JOBS_MODE", "worker")   # rollups queue up; nobody runs them mid-benchmark
+        import app as appmod
+        from models import db
+        from werkzeug.serving import make_server
+        app = appmod.create_app()
+        with app.app_context():
+            _, activity_ids, user_ids = seed(appmod, max(args.users, max(args.concurrency)),
+                                             args.days, args.activities, 0)
+        print(f"Seeded {len(user_ids)} users x {args.days} days x {len(activity_ids)} activities")
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)   # no access log per request
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results = {}
+        for concurrency in args.concurrency:
+            clients = [Client(server.server_port, n) for n in range(concurrency)]
+            print(f"\nconcurrency {concurrency}")
+            print(f"{'scenario':<36} {'n':>6} {'req/s':>8} {'logs/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'bytes':>7}")
+            for name, spec in scenarios(activity_ids).items():
+                row = run_scenario(clients, spec, args.requests)
+                row["logs_per_s"] = round(row["req_per_s"] * spec[5], 1)
+                results.setdefault(str(concurrency), {})[name] = row
+                print(f"{name:<36} {row['requests']:>6} {row['req_per_s']:>8} {row['logs_per_s'] or '':>8} "
+                      f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['bytes']:>7}")
+            for client in clients:
+                client.conn.close()
+
+        server.shutdown()
+        with app.app_context():
+            app.extensions["async_db"].dispose()
+            db.engine.dispose()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"results": results, "params": vars(args)}, fh, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/bench_archive.py
+"""
+Storage and query latency before vs. after moving old logs to the archive
+table, on a synthetic SQLite dataset: users with two years of history whose
+current plan started in the last few months.
+
+    python benchmarks/bench_archive.py --users 5000 --days 730
+    python benchmarks/bench_archive.py --users 1000 --after-days 180
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+from levels import CODES, LEVELS
+from models import db, User, Plan, Activity
+from utils.aggregates import refresh_aggregates
+from utils.analytics import load_points_matrix
+from utils.archive import archive_logs, storage_report
+from utils.export import export_query
+from utils.logs import load_log_summary, save_day_logs
+from utils.stats import refresh_user_stats
+
+ACTIVITIES = 6
+STATUSES = [CODES[name] for name in LEVELS]   # raw inserts store the codes
+
+
+# ----------------- Seeding -----------------
+def seed(users, days, logs_per_day, plan_days, today, batch=200_000):
+    """One plan; every user logs `logs_per_day` activities on ~70% of `days` days."""
+    db.session.add(Plan(id=1, name="Plan", duration_days=30))
+    for a in range(1, ACTIVITIES + 1):
+        db.session.add(Activity(id=a, plan_id=1, name=f"activity {a}", level1="l1", level2="l2", level3="l3"))
+    db.session.commit()
+
+    rng = random.Random(42)
+    conn = db.engine.raw_connection()
+    cur = conn.cursor()
+    user_rows, selection_rows, log_rows = [], [], []
+
+    def flush():
+        cur.executemany("INSERT INTO user (id, username, email, password, plan_id, plan_start_date, log_version) "
+                        "VALUES (?, ?, ?, 'x', 1, ?, 0)", user_rows)
+        cur.executemany("INSERT INTO user_activity (user_id, activity_id, level) VALUES (?, ?, ?)", selection_rows)
+        cur.executemany("INSERT INTO daily_log (user_id, activity_id, log_date, status) VALUES (?, ?, ?, ?)", log_rows)
+        user_rows.clear(), selection_rows.clear(), log_rows.clear()
+
+    first = today - timedelta(days=days - 1)
+    for user_id in range(1, users + 1):
+        start = today - timedelta(days=rng.randrange(plan_days))
+        user_rows.append((user_id, f"u{user_id}", f"u{user_id}@example.com", start.isoformat()))
+        activities = rng.sample(range(1, ACTIVITIES + 1), logs_per_day)
+        selection_rows.extend((user_id, a, CODES["L2"]) for a in activities)
+        for k in range(days):
+            if rng.random() < 0.7:
+                day = (first + timedelta(days=k)).isoformat()
+                log_rows.extend((user_id, a, day, rng.choice(STATUSES)) for a in activities)
+        if len(log_rows) >= batch:
+            flush()
+    flush()
+    conn.commit()
+    conn.close()
+
+
+# ----------------- Measurements -----------------
+def timed_ms(fn, samples):
+    """Median milliseconds of fn(arg) over the samples."""
+    times = []
+    for arg in samples:
+        started = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - started) * 1000)
+    db.session.rollback()
+    return statistics.median(times)
+
+
+def measure(users, today, rng):
+    sample = [db.session.get(User, u) for u in rng.sample(range(1, users + 1), 50)]
+    window = today - timedelta(days=29)
+
+    def write_today(user):
+        save_day_logs(user.id, today, {ua.activity_id: "L2" for ua in user.user_activities})
+        db.session.commit()
+
+    return {
+        "dashboard grid (plan window)": timed_ms(lambda u: load_log_summary(u, today), sample),
+        "points matrix, last 30 days": timed_ms(lambda u: load_points_matrix(u, window, today), sample),
+        "points matrix, full history": timed_ms(lambda u: load_points_matrix(u), sample[:20]),
+        "profile stats refresh (all days)": timed_ms(lambda u: refresh_user_stats(u.id), sample[:20]),
+        "export one user": timed_ms(lambda u: db.session.execute(export_query(user_id=u.id)).all(), sample[:20]),
+        "save today's logs (upsert)": timed_ms(write_today, sample),
+        "activity rollup of today": timed_ms(lambda _: refresh_aggregates([today]), range(5)),
+    }
+
+
+def file_size(path):
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=730, help="days of history per user")
+    parser.add_argument("--logs-per-day", type=int, default=3)
+    parser.add_argument("--plan-days", type=int, default=120, help="current plan started within this many days")
+    parser.add_argument("--after-days", type=int, default=365, help="archive horizon (ARCHIVE_AFTER_DAYS)")
+    args = parser.parse_args()
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            seed(args.users, args.days, args.logs_per_day, args.plan_days, today)
+            print(f"Seeded {args.users} users x {args.days} days in {time.perf_counter() - started:.0f}s")
+
+            before_size, before_tables = file_size(path), storage_report()
+            before = measure(args.users, today, random.Random(1))
+
+            started = time.perf_counter()
+            moved = archive_logs(today - timedelta(days=args.after_days))
+            seconds = time.perf_counter() - started
+            print(f"archive_logs: {moved['logs']:,} logs of {moved['users']} users in {seconds:.1f}s "
+                  f"({moved['logs'] / seconds:,.0f} logs/s)")
+
+            after_size, after_tables = file_size(path), storage_report()
+            after = measure(args.users, today, random.Random(1))
+
+            print(f"\n{'table':<20} {'rows before':>12} {'MiB before':>11} {'rows after':>12} {'MiB after':>10}")
+            for table in before_tables:
+                b, a = before_tables[table], after_tables[table]
+                print(f"{table:<20} {b['rows']:>12,} {(b['bytes'] or 0) / 2**20:>11.1f} "
+                      f"{a['rows']:>12,} {(a['bytes'] or 0) / 2**20:>10.1f}")
+            print(f"{'database file':<20} {'':>12} {before_size / 2**20:>11.1f} {'':>12} {after_size / 2**20:>10.1f}")
+
+            print(f"\n{'query (median)':<34} {'before ms':>10} {'after ms':>10}")
+            for name in before:
+                print(f"{name:<34} {before[name]:>10.2f} {after[name]:>10.2f}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
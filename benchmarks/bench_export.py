@@ -0,0 +1,122 @@
+# benchmarks/bench_export.py
+"""
+Stream a large DailyLog export (CSV and NDJSON) and check that peak Python
+memory stays under a fixed ceiling however many rows are exported.
+Exits non-zero if a format goes over the ceiling or loses rows.
+
+    python benchmarks/bench_export.py --rows 1000000 --ceiling-mb 32
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from levels import POINTS_MAPPING
+from models import db, User, Plan, Activity, DailyLog
+from utils.export import export_logs
+
+ACTIVITIES = 8
+BATCH = 50_000
+
+
+def seed(rows, seed=11):
+    """Users x activities x days of logs, about `rows` in total."""
+    rng = random.Random(seed)
+    days = 2000
+    users = max(1, -(-rows // (ACTIVITIES * days)))
+    plan = Plan(name="Bench")
+    db.session.add(plan)
+    db.session.flush()
+    activity_ids = []
+    for i in range(ACTIVITIES):
+        activity = Activity(name=f"Activity {i}", level1="easy", level2="medium", level3="hard", plan=plan)
+        db.session.add(activity)
+        db.session.flush()
+        activity_ids.append(activity.id)
+    for u in range(users):
+        db.session.add(User(username=f"user{u}", email=f"user{u}@example.com", password="x"))
+    db.session.commit()
+
+    statuses = list(POINTS_MAPPING)
+    start = date.today() - timedelta(days=days)
+    batch, written = [], 0
+    for user_id in range(1, users + 1):
+        for d in range(days):
+            for activity_id in activity_ids:
+                if written == rows:
+                    break
+                batch.append({"user_id": user_id, "activity_id": activity_id,
+                              "log_date": start + timedelta(days=d),
+                              "status": rng.choice(statuses), "notes": "note" if d % 10 == 0 else None})
+                written += 1
+                if len(batch) == BATCH:
+                    db.session.execute(DailyLog.__table__.insert(), batch)
+                    batch = []
+    if batch:
+        db.session.execute(DailyLog.__table__.insert(), batch)
+    db.session.commit()
+    return written
+
+
+def measure(fmt, chunk_size):
+    """
+    (lines, bytes, seconds, peak MB) for a full export. Timed on a plain
+    pass; the peak comes from a second pass under tracemalloc, which is slow.
+    """
+    started = time.perf_counter()
+    for _ in export_logs(fmt, chunk_size=chunk_size):
+        pass
+    elapsed = time.perf_counter() - started
+
+    lines = size = 0
+    tracemalloc.start()
+    for piece in export_logs(fmt, chunk_size=chunk_size):
+        lines += piece.count("\n")
+        size += len(piece)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lines, size, elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--ceiling-mb", type=float, default=32.0)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            rows = seed(args.rows)
+            print(f"seeded {rows} logs in {time.perf_counter() - started:.1f}s")
+            db.session.remove()
+
+            print(f"{'format':<8} {'rows':>9} {'MB out':>8} {'seconds':>8} {'peak MB':>8}")
+            for fmt, header_lines in (("csv", 1), ("ndjson", 0)):
+                lines, size, elapsed, peak = measure(fmt, args.chunk_size)
+                ok = lines - header_lines == rows and peak <= args.ceiling_mb
+                failed |= not ok
+                print(f"{fmt:<8} {lines - header_lines:>9} {size / 2 ** 20:>8.1f} "
+                      f"{elapsed:>8.1f} {peak:>8.2f}{'' if ok else '  FAIL'}")
+                db.session.remove()
+            db.engine.dispose()
+
+    print(f"ceiling {args.ceiling_mb} MB: {'FAIL' if failed else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_hashing.py
+"""
+Logins per second for each password hashing method, inline vs. on the
+PasswordHasher pool.
+
+    python benchmarks/bench_hashing.py --seconds 3
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask_bcrypt import Bcrypt
+from utils.security import PasswordHasher
+
+METHODS = ["pbkdf2:sha256:600000", "pbkdf2:sha256:260000", "scrypt:32768:8:1", "bcrypt"]
+
+
+def logins_per_second(verify, hashed, seconds, clients):
+    """Run `clients` concurrent login loops for `seconds`; return verifications/s."""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        done = 0
+        while time.perf_counter() < deadline:
+            verify(hashed, "correct horse battery staple")
+            done += 1
+        return done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        total = sum(pool.map(lambda _: client(), range(clients)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["BCRYPT_LOG_ROUNDS"] = 12
+    bcrypt = Bcrypt(app)
+    cores = os.cpu_count() or 1
+    print(f"{cores} cores, pool of {args.workers} workers, {args.workers * 2} concurrent clients\n")
+    print(f"{'method':<24} {'1 thread':>10} {'pool':>10} {'pool/core':>10}")
+
+    for method in METHODS:
+        hasher = PasswordHasher(method, workers=args.workers, max_pending=args.workers * 4, bcrypt=bcrypt)
+        hashed = hasher.hash("correct horse battery staple")
+        inline = logins_per_second(lambda h, p: PasswordHasher._verify(bcrypt, h, p), hashed, args.seconds, 1)
+        pooled = logins_per_second(hasher.verify, hashed, args.seconds, args.workers * 2)
+        hasher.shutdown()
+        print(f"{method:<24} {inline:>10.1f} {pooled:>10.1f} {pooled / min(cores, args.workers):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
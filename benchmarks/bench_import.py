@@ -0,0 +1,112 @@
+# benchmarks/bench_import.py
+"""
+Bulk import throughput: write a synthetic CSV or NDJSON file of daily logs
+(with a small share of invalid rows), import it with utils/importer.py
+and report rows/s, rejects and the rollup refresh.
+
+    python benchmarks/bench_import.py --rows 10000000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from levels import POINTS_MAPPING
+from models import db, User, Plan, Activity, UserActivity, DailyLog, DailyScore
+from utils.database import DEFAULT_SQLITE_PRAGMAS, install_sqlite_pragmas
+from utils.importer import import_logs, read_records
+
+ACTIVITIES = 8
+DAYS = 3650
+
+
+def seed_users(rows):
+    users = max(1, -(-rows // (ACTIVITIES * DAYS)))
+    plan = Plan(name="Bench")
+    db.session.add(plan)
+    db.session.flush()
+    activities = [Activity(name=f"Activity {i}", level1="a", level2="b", level3="c", plan=plan)
+                  for i in range(ACTIVITIES)]
+    db.session.add_all(activities)
+    db.session.flush()
+    for u in range(users):
+        user = User(username=f"user{u}", email=f"user{u}@example.com", password="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(UserActivity(user_id=user.id, activity_id=a.id, level="L2") for a in activities)
+    db.session.commit()
+    return users, [a.id for a in activities]
+
+
+def write_file(path, fmt, rows, users, activity_ids, bad_share, seed=5):
+    """Users x days x activities, in order; about bad_share of rows are invalid."""
+    rng = random.Random(seed)
+    statuses = list(POINTS_MAPPING)
+    start = date.today() - timedelta(days=DAYS)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(DAYS)]
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out) if fmt == "csv" else None
+        if writer:
+            writer.writerow(("user_id", "activity_id", "log_date", "status", "notes"))
+        written = 0
+        for user_id in range(1, users + 1):
+            for log_date in dates:
+                for activity_id in activity_ids:
+                    if written == rows:
+                        return
+                    status = rng.choice(statuses) if rng.random() >= bad_share else "L9"
+                    record = (user_id, activity_id, log_date, status, "")
+                    if writer:
+                        writer.writerow(record)
+                    else:
+                        out.write(json.dumps(dict(zip(("user_id", "activity_id", "log_date", "status", "notes"),
+                                                      record))) + "\n")
+                    written += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--bad-share", type=float, default=0.001)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            install_sqlite_pragmas(db.engine, DEFAULT_SQLITE_PRAGMAS)
+            db.create_all()
+            users, activity_ids = seed_users(args.rows)
+            path = os.path.join(tmp, f"logs.{args.format}")
+            started = time.perf_counter()
+            write_file(path, args.format, args.rows, users, activity_ids, args.bad_share)
+            print(f"wrote {args.rows} rows ({os.path.getsize(path) / 2 ** 20:.0f} MB) "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+            with open(path, encoding="utf-8", newline="") as stream:
+                report = import_logs(read_records(stream, args.format), chunk_size=args.chunk_size)
+            print(f"imported {report.accepted} rows for {len(report.users)} users in {report.elapsed:.1f}s "
+                  f"→ {report.rows_per_second:,.0f} rows/s; rejected {report.rejected} {dict(report.reasons)}")
+            print(f"daily_log rows {DailyLog.query.count()}, daily_score rows {DailyScore.query.count()}")
+
+            # re-import the same file: every row is now an update
+            with open(path, encoding="utf-8", newline="") as stream:
+                report = import_logs(read_records(stream, args.format), chunk_size=args.chunk_size)
+            print(f"re-import (all updates) {report.elapsed:.1f}s → {report.rows_per_second:,.0f} rows/s")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
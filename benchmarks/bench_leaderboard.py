@@ -0,0 +1,87 @@
+# benchmarks/bench_leaderboard.py
+"""
+"My rank" lookups: SortedRanking (bisect over the in-process board) vs.
+counting better LeaderboardEntry rows in SQL, for growing user counts.
+
+    python benchmarks/bench_leaderboard.py --users 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func, or_, select
+from models import db, LeaderboardEntry
+from utils.leaderboard import SortedRanking
+
+
+def sql_rank(user_id, score):
+    """1 + rows ahead of (score, user_id) — a scan of everyone ranked above."""
+    return 1 + db.session.execute(
+        select(func.count()).select_from(LeaderboardEntry).where(or_(
+            LeaderboardEntry.total_points > score,
+            (LeaderboardEntry.total_points == score) & (LeaderboardEntry.user_id < user_id),
+        ))
+    ).scalar()
+
+
+def per_call_us(fn, args_list):
+    started = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - started) / len(args_list) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'users':>9} | {'load s':>7} {'add µs':>8} {'rank µs':>8} | {'SQL rank µs':>11} {'same':>5}")
+    for n in args.users:
+        rng = random.Random(n)
+        scores = {user_id: rng.randrange(0, 50_000) for user_id in range(1, n + 1)}
+
+        board = SortedRanking()
+        started = time.perf_counter()
+        board.load(scores.items())
+        load_s = time.perf_counter() - started
+
+        sample = rng.sample(range(1, n + 1), args.lookups)
+        add_us = per_call_us(board.add, [(u, scores[u] + 15) for u in sample])
+        for u in sample:
+            board.add(u, scores[u])
+        rank_us = per_call_us(board.rank, [(u,) for u in sample])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Flask(__name__)
+            app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            db.init_app(app)
+            with app.app_context():
+                db.create_all()
+                db.session.execute(LeaderboardEntry.__table__.insert(), [
+                    {"user_id": u, "total_points": s, "current_streak": 0, "best_avg_7d": 0.0,
+                     "updated_at": datetime.utcnow()}
+                    for u, s in scores.items()
+                ])
+                db.session.execute(db.text(
+                    "CREATE INDEX ix_bench_points ON leaderboard_entry (total_points, user_id)"))
+                db.session.commit()
+                lookups = [(u, scores[u]) for u in sample[:20]]
+                sql_us = per_call_us(sql_rank, lookups)
+                same = all(sql_rank(u, s) == board.rank(u) + 1 for u, s in lookups)
+                db.session.remove()
+                db.engine.dispose()
+
+        print(f"{n:>9} | {load_s:>7.2f} {add_us:>8.2f} {rank_us:>8.2f} | {sql_us:>11.1f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
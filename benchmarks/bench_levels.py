@@ -0,0 +1,156 @@
+# benchmarks/bench_levels.py
+"""
+Log statuses stored as names ('L1', VARCHAR) vs. small-integer codes, on a
+synthetic SQLite daily_log: table size, the points aggregates the scoring
+and rollup code runs, and the one-off conversion done by `flask upgrade-db`.
+
+    python benchmarks/bench_levels.py --users 2000 --days 365
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import text
+from levels import CODES, LEVELS, POINTS_MAPPING, POINTS_PER_LEVEL
+from models import db, DailyLog
+from utils.migrate import convert_level_columns
+
+ACTIVITIES = 6
+
+# The daily_log table as older versions created it (status as a name)
+LEGACY_DAILY_LOG = """
+CREATE TABLE daily_log (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES user (id),
+    activity_id INTEGER NOT NULL REFERENCES activity (id),
+    log_date DATE NOT NULL,
+    status VARCHAR(20),
+    notes TEXT
+)
+"""
+
+# The same aggregates per storage: what points_case() compiled to before and after
+POINTS_SQL = {
+    "names": "CASE status " + " ".join(f"WHEN '{name}' THEN {p}" for name, p in POINTS_MAPPING.items()) + " ELSE 0 END",
+    "codes": f"COALESCE(status, 0) * {POINTS_PER_LEVEL}",
+}
+DONE_SQL = {"names": "status <> 'not_done'", "codes": f"status <> {CODES['not_done']}"}
+
+
+# ----------------- Seeding -----------------
+def seed(users, days, logs_per_day, today, batch=200_000):
+    """Legacy daily_log: every user logs `logs_per_day` activities on ~70% of `days` days."""
+    db.create_all()
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE daily_log"))
+        conn.execute(text(LEGACY_DAILY_LOG))
+        for index in DailyLog.__table__.indexes:
+            index.create(conn)
+
+    rng = random.Random(42)
+    conn = db.engine.raw_connection()
+    cur = conn.cursor()
+    rows = []
+    first = today - timedelta(days=days - 1)
+    for user_id in range(1, users + 1):
+        activities = rng.sample(range(1, ACTIVITIES + 1), logs_per_day)
+        for k in range(days):
+            if rng.random() < 0.7:
+                day = (first + timedelta(days=k)).isoformat()
+                rows.extend((user_id, a, day, rng.choice(LEVELS)) for a in activities)
+        if len(rows) >= batch:
+            cur.executemany("INSERT INTO daily_log (user_id, activity_id, log_date, status) VALUES (?, ?, ?, ?)", rows)
+            rows.clear()
+    cur.executemany("INSERT INTO daily_log (user_id, activity_id, log_date, status) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+# ----------------- Measurements -----------------
+def timed_ms(fn, samples):
+    """Median milliseconds of fn(arg) over the samples."""
+    times = []
+    for arg in samples:
+        started = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def table_bytes(conn, table):
+    return conn.execute(text(
+        "SELECT SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name WHERE m.tbl_name = :t"
+    ), {"t": table}).scalar()
+
+
+def measure(conn, storage, users, rng):
+    points = POINTS_SQL[storage]
+    sample = rng.sample(range(1, users + 1), 50)
+    per_day = text(f"SELECT log_date, SUM({points}) FROM daily_log WHERE user_id = :u GROUP BY log_date")
+    per_activity = text(f"SELECT activity_id, SUM({points}), SUM({DONE_SQL[storage]}) FROM daily_log GROUP BY activity_id")
+    statuses = text("SELECT status FROM daily_log WHERE user_id = :u")
+
+    def python_points(user_id):
+        values = conn.execute(statuses, {"u": user_id}).scalars().all()
+        if storage == "codes":
+            return np.asarray(values, dtype=np.int32) * POINTS_PER_LEVEL
+        return np.asarray([POINTS_MAPPING.get(v, 0) for v in values], dtype=np.int32)
+
+    rows = conn.execute(text("SELECT COUNT(*) FROM daily_log")).scalar()
+    return {
+        "bytes/row (table + indexes)": table_bytes(conn, "daily_log") / rows,
+        "points per day, one user (ms)": timed_ms(lambda u: conn.execute(per_day, {"u": u}).all(), sample),
+        "points per activity, all logs (ms)": timed_ms(lambda _: conn.execute(per_activity).all(), range(5)),
+        "points in Python, one user (ms)": timed_ms(python_points, sample),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365, help="days of history per user")
+    parser.add_argument("--logs-per-day", type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+        db.init_app(app)
+        with app.app_context():
+            started = time.perf_counter()
+            seed(args.users, args.days, args.logs_per_day, today)
+            print(f"Seeded {args.users} users x {args.days} days in {time.perf_counter() - started:.0f}s")
+
+            with db.engine.connect() as conn:
+                before = measure(conn, "names", args.users, random.Random(1))
+
+            started = time.perf_counter()
+            with db.engine.begin() as conn:
+                unknown = convert_level_columns(conn)
+                rows = conn.execute(text("SELECT COUNT(*) FROM daily_log")).scalar()
+            seconds = time.perf_counter() - started
+            print(f"convert_level_columns: {rows:,} logs in {seconds:.1f}s ({rows / seconds:,.0f} logs/s), "
+                  f"unknown names {unknown}")
+
+            with db.engine.connect() as conn:
+                after = measure(conn, "codes", args.users, random.Random(1))
+
+            print(f"\n{'measure (median)':<38} {'names':>10} {'codes':>10}")
+            for name in before:
+                print(f"{name:<38} {before[name]:>10.2f} {after[name]:>10.2f}")
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_scoring.py
+"""
+Time the utils/scoring.py aggregates against synthetic DailyLog tables.
+
+    python benchmarks/bench_scoring.py --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from levels import POINTS_MAPPING
+from models import db, User, Activity, UserActivity, DailyLog
+from utils import scoring
+
+ACTIVITIES = 8
+USERS = 10          # logs are spread over this many users; user 1 is measured
+
+
+def seed(total_rows):
+    """Insert total_rows logs (USERS x days x ACTIVITIES) with bulk executemany."""
+    statuses = list(POINTS_MAPPING)
+    days = max(1, total_rows // (USERS * ACTIVITIES))
+    start = date.today() - timedelta(days=days)
+
+    for uid in range(1, USERS + 1):
+        db.session.add(User(id=uid, username=f"user{uid}", email=f"user{uid}@example.com", password="x"))
+    for aid in range(1, ACTIVITIES + 1):
+        db.session.add(Activity(id=aid, name=f"Activity {aid}"))
+        db.session.add(UserActivity(user_id=1, activity_id=aid, level="L2"))
+    db.session.commit()
+
+    rng = random.Random(42)
+    batch = []
+    for uid in range(1, USERS + 1):
+        for d in range(days):
+            log_date = start + timedelta(days=d)
+            for aid in range(1, ACTIVITIES + 1):
+                batch.append({"user_id": uid, "activity_id": aid,
+                              "log_date": log_date, "status": rng.choice(statuses)})
+            if len(batch) >= 50_000:
+                db.session.execute(DailyLog.__table__.insert(), batch)
+                batch = []
+    if batch:
+        db.session.execute(DailyLog.__table__.insert(), batch)
+    db.session.commit()
+    return days * USERS * ACTIVITIES
+
+
+def timed(fn, repeat=5):
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(total_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            rows = seed(total_rows)
+            user = db.session.get(User, 1)
+            results = {
+                "daily_score": timed(lambda: scoring.calculate_daily_score(user)),
+                "overall_score": timed(lambda: scoring.calculate_overall_score(user)),
+                "best_daily_score": timed(lambda: scoring.best_daily_score(user)),
+                "activity_score": timed(lambda: scoring.calculate_activity_score(user, 1)),
+                "best_and_worst": timed(lambda: scoring.best_and_worst_activities(user)),
+                "streak_count": timed(lambda: scoring.streak_count(user)),
+                "days_completed": timed(lambda: scoring.days_completed(user)),
+            }
+            db.session.remove()
+            db.engine.dispose()
+    return rows, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for total in args.rows:
+        rows, results = run(total)
+        print(f"\n{rows:,} log rows ({rows // USERS:,} for the measured user)")
+        for name, ms in results.items():
+            print(f"  {name:<18} {ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_sqlite_writers.py
+"""
+Concurrent writer throughput on SQLite: the previous default connection
+settings vs. the pragmas from utils/database.py. Each worker process mimics
+a dashboard save (one bulk upsert of a day's logs, committed) in a loop,
+alongside reader processes loading a dashboard date range.
+
+    python benchmarks/bench_sqlite_writers.py --writers 4 --readers 2 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from models import db, DailyLog
+from utils.database import DEFAULT_SQLITE_PRAGMAS, install_sqlite_pragmas
+
+ACTIVITIES = 8
+
+
+def make_engine(url, tuned):
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, connect_args={"timeout": DEFAULT_SQLITE_PRAGMAS["busy_timeout"] / 1000})
+    install_sqlite_pragmas(engine, DEFAULT_SQLITE_PRAGMAS)
+    return engine
+
+
+def writer(url, tuned, user_id, seconds, results):
+    engine = make_engine(url, tuned)
+    table = DailyLog.__table__
+    rng = random.Random(user_id)
+    commits = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        log_date = date.today() - timedelta(days=rng.randrange(365))
+        rows = [{"user_id": user_id, "activity_id": a, "log_date": log_date,
+                 "status": rng.choice(["not_done", "L1", "L2", "L3"])} for a in range(1, ACTIVITIES + 1)]
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id", "activity_id", "log_date"],
+                                          set_={"status": stmt.excluded.status})
+        try:
+            with engine.begin() as conn:
+                conn.execute(stmt)
+            commits += 1
+        except OperationalError:
+            errors += 1
+    results.put(("write", commits, errors))
+
+
+def reader(url, tuned, seconds, results):
+    engine = make_engine(url, tuned)
+    table = DailyLog.__table__
+    reads = errors = 0
+    deadline = time.perf_counter() + seconds
+    since = date.today() - timedelta(days=180)
+    while time.perf_counter() < deadline:
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(table).where(table.c.user_id == 1, table.c.log_date >= since)).all()
+            reads += 1
+        except OperationalError:
+            errors += 1
+    results.put(("read", reads, errors))
+
+
+def run(tuned, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'writers.db')}"
+        engine = make_engine(url, tuned)
+        db.metadata.create_all(engine, tables=[DailyLog.__table__])
+        engine.dispose()
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=writer, args=(url, tuned, n + 1, seconds, results))
+                 for n in range(writers)]
+        procs += [multiprocessing.Process(target=reader, args=(url, tuned, seconds, results))
+                  for _ in range(readers)]
+        for p in procs:
+            p.start()
+        totals = {"write": [0, 0], "read": [0, 0]}
+        for _ in procs:
+            kind, done, errors = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for p in procs:
+            p.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer + {args.readers} reader processes, {args.seconds:g}s each\n")
+    print(f"{'settings':<22} {'commits/s':>10} {'write errs':>11} {'reads/s':>9} {'read errs':>10}")
+    for label, tuned in (("rollback journal", False), ("WAL + pragmas", True)):
+        totals = run(tuned, args.writers, args.readers, args.seconds)
+        (commits, write_errors), (reads, read_errors) = totals["write"], totals["read"]
+        print(f"{label:<22} {commits / args.seconds:>10.1f} {write_errors:>11} "
+              f"{reads / args.seconds:>9.1f} {read_errors:>10}")
+
+
+if __name__ == "__main__":
+    main()
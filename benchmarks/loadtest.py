@@ -0,0 +1,203 @@
+# benchmarks/loadtest.py
+"""
+Seed a throwaway SQLite database and drive the real routes through the Flask
+test client, reporting latency percentiles, throughput and SQL statements
+per route. Runs fully offline.
+
+    python benchmarks/loadtest.py --users 20 --days 180 --activities 6 --rounds 20
+    python benchmarks/loadtest.py --json bench_output.json   # keep for regression diffs
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = "loadtest-password"
+STATUSES = ["not_done", "L1", "L2", "L3"]
+
+
+# ----------------- Seeding -----------------
+def seed(appmod, users, days, activities, plan_index):
+    """N users x M days x K activities on one of the plans from plans/*.py."""
+    from flask import current_app
+    from models import db, User, Plan, UserActivity, DailyLog
+    from utils.catalog import load_plan_catalog
+    from utils.rollups import rebuild_all_daily_scores
+
+    db.create_all()
+    load_plan_catalog(current_app.config["PLAN_CATALOG_DIR"])
+    plan = Plan.query.order_by(Plan.id).all()[plan_index]
+    plan_activities = plan.activities[:activities]
+    start = date.today() - timedelta(days=days - 1)
+    hashed = appmod.password_hasher.hash(PASSWORD)   # one KDF run shared by every user
+
+    for n in range(users):
+        db.session.add(User(username=f"load{n}", email=f"load{n}@example.com",
+                            password=hashed, plan_id=plan.id, plan_start_date=start))
+    db.session.flush()
+
+    user_ids = [u.id for u in User.query.order_by(User.id)]
+    db.session.execute(UserActivity.__table__.insert(), [
+        {"user_id": uid, "activity_id": a.id, "level": "L2"}
+        for uid in user_ids for a in plan_activities
+    ])
+
+    rng = random.Random(1234)
+    batch = []
+    for uid in user_ids:
+        for d in range(days):
+            for a in plan_activities:
+                batch.append({"user_id": uid, "activity_id": a.id,
+                              "log_date": start + timedelta(days=d), "status": rng.choice(STATUSES)})
+        if len(batch) >= 50_000:
+            db.session.execute(DailyLog.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(DailyLog.__table__.insert(), batch)
+    db.session.commit()
+    rebuild_all_daily_scores()
+    return plan.id, [a.id for a in plan_activities], user_ids
+
+
+# ----------------- SQL Counting -----------------
+class QueryCounter:
+    """Counts statements per thread, so concurrent clients don't mix counts."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+# ----------------- Driving -----------------
+def run_client(app, counter, n, plan_id, activity_ids, rounds, samples):
+    """One virtual user: log in, then loop over the benchmarked routes."""
+    client = app.test_client()
+    rng = random.Random(n)
+
+    def hit(name, method, url, data=None, expect=(200, 302)):
+        counter.reset()
+        started = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        elapsed = time.perf_counter() - started
+        if response.status_code not in expect:
+            raise RuntimeError(f"{name}: HTTP {response.status_code}")
+        samples[name].append((elapsed, counter.count))
+
+    hit("login POST", "POST", "/", {"login-submit": "1", "email": f"load{n}@example.com", "password": PASSWORD})
+
+    select_form = {"activities": [str(a) for a in activity_ids],
+                   "plan_start_date": (date.today() - timedelta(days=30)).isoformat()}
+    select_form.update({f"level_{a}": "L2" for a in activity_ids})
+
+    for _ in range(rounds):
+        hit("dashboard GET", "GET", "/dashboard")
+        hit("dashboard trend GET", "GET", "/dashboard/trend?bucket=week")
+        log_form = {"log_date": (date.today() - timedelta(days=rng.randrange(30))).isoformat()}
+        log_form.update({f"activity_{a}": rng.choice(STATUSES) for a in activity_ids})
+        hit("dashboard POST", "POST", "/dashboard", log_form)
+        hit("dashboard GET (after write)", "GET", "/dashboard")
+        hit("plans GET", "GET", "/plans")
+        hit("select_plan GET", "GET", f"/select_plan/{plan_id}")
+    hit("select_plan POST", "POST", f"/select_plan/{plan_id}", select_form)
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report(samples, wall):
+    rows = {}
+    for name, values in samples.items():
+        latencies = sorted(v[0] * 1000 for v in values)
+        rows[name] = {
+            "requests": len(values),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "req_per_s": round(len(values) / (sum(latencies) / 1000), 1),
+            "sql_per_request": round(sum(v[1] for v in values) / len(values), 1),
+        }
+    total = sum(len(v) for v in samples.values())
+
+    print(f"\n{'route':<30} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'sql':>6}")
+    for name, r in rows.items():
+        print(f"{name:<30} {r['requests']:>6} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['req_per_s']:>8} {r['sql_per_request']:>6}")
+    print(f"\n{total} requests in {wall:.2f}s → {total / wall:.1f} req/s overall")
+    return {"routes": rows, "total_requests": total, "wall_seconds": round(wall, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--activities", type=int, default=6)
+    parser.add_argument("--plan", type=int, default=0, help="index into the loaded plans")
+    parser.add_argument("--rounds", type=int, default=10, help="route loops per virtual user")
+    parser.add_argument("--concurrency", type=int, default=1, help="virtual users running at once")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        import app as appmod
+        from models import db
+        app = appmod.create_app()
+
+        with app.app_context():
+            started = time.perf_counter()
+            plan_id, activity_ids, user_ids = seed(appmod, args.users, args.days, args.activities, args.plan)
+            print(f"Seeded {len(user_ids)} users x {args.days} days x {len(activity_ids)} activities "
+                  f"in {time.perf_counter() - started:.1f}s")
+            counter = QueryCounter(db.engine)
+
+        try:
+            samples = defaultdict(list)
+            started = time.perf_counter()
+            pending = list(range(len(user_ids)))
+            while pending:
+                wave, pending = pending[:args.concurrency], pending[args.concurrency:]
+                threads = [threading.Thread(target=run_client,
+                                            args=(app, counter, n, plan_id, activity_ids, args.rounds, samples))
+                           for n in wave]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+            results = report(samples, time.perf_counter() - started)
+        finally:
+            # JOBS_MODE=thread: let the workers finish before the database file goes away
+            appmod.job_runner.stop(timeout=30)
+            with app.app_context():
+                db.engine.dispose()
+
+    if args.json:
+        results["params"] = vars(args)
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from sqlalchemy import Integer, SmallInteger, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+# ------------------------
+# Activity Levels
+# ------------------------
+# One definition for log statuses (DailyLog.status) and selected levels
+# (UserActivity.level). The database stores the code (the index here);
+# Python code, forms, templates and the API keep using the names.
+LEVELS = ("not_done", "L1", "L2", "L3")
+CODES = {name: code for code, name in enumerate(LEVELS)}
+NOT_DONE = CODES["not_done"]
+
+# Points grow linearly with the level: points = code * POINTS_PER_LEVEL
+POINTS_PER_LEVEL = 5
+POINTS_MAPPING = {name: code * POINTS_PER_LEVEL for name, code in CODES.items()}
+
+
+def points(level):
+    """Points of a level name (unknown names and None score 0)."""
+    return POINTS_MAPPING.get(level, 0)
+
+
+def level_code(column):
+    """A Level column as its plain integer code in SQL, for SUMs and arithmetic."""
+    return type_coerce(column, Integer)
+
+
+class Level(TypeDecorator):
+    """Level names in Python, small-integer codes in the database."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return CODES[value]
+        except KeyError:
+            raise ValueError(f"unknown level {value!r}; expected one of {LEVELS}") from None
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else LEVELS[value]
@@ -1,9 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from datetime import date
+from sqlalchemy.orm import joinedload, lazyload, selectinload
+from datetime import date, datetime
+from levels import Level, points
 
 db = SQLAlchemy()
 
+# Loader strategies for collection relationships, selected per route or via
+# the RELATIONSHIP_LOADING config key ("selectin", "joined" or "lazy").
+LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "lazy": lazyload,
+}
+
 # ----------------------------
 # User Model
 # ----------------------------
@@ -11,7 +21,7 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), nullable=False, unique=True)
     email = db.Column(db.String(150), nullable=False, unique=True)
-    password = db.Column(db.String(150), nullable=False)
+    password = db.Column(db.String(255), nullable=False)   # scrypt hashes exceed 150 chars
 
     bio = db.Column(db.Text, nullable=True)
 
@@ -19,17 +29,37 @@ class User(db.Model, UserMixin):
     plan_id = db.Column(db.Integer, db.ForeignKey("plan.id"))
     plan_start_date = db.Column(db.Date, nullable=True)
 
+    # Bumped on every write to the user's logs/selection; versions cached views
+    log_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    logs_updated_at = db.Column(db.DateTime, nullable=True)   # UTC time of that write (Last-Modified)
+
     # Relationships
     plan = db.relationship("Plan", backref="users")   # a plan can have many users
     user_activities = db.relationship("UserActivity", backref="user", lazy=True)
     daily_logs = db.relationship("DailyLog", backref="user", lazy=True)
 
+    __table_args__ = (
+        # plan cohort sizes (utils/aggregates.py)
+        db.Index("ix_user_plan_start", "plan_id", "plan_start_date"),
+    )
+
+    @staticmethod
+    def graph_options(strategy="selectin"):
+        """Loader options for the user's plan and selected activities (with Activity rows)."""
+        if strategy == "lazy":
+            return []
+        return [
+            joinedload(User.plan),
+            LOADERS[strategy](User.user_activities).joinedload(UserActivity.activity),
+        ]
+
   # ------------------------
 # Plan Model
 # ------------------------
 class Plan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    slug = db.Column(db.String(100), nullable=True)   # plans/<slug>.py it was loaded from
 
     # thresholds
     min_activities = db.Column(db.Integer, default=3)
@@ -42,6 +72,15 @@ class Plan(db.Model):
     # A plan has many activities
     activities = db.relationship("Activity", backref="plan", lazy=True)
 
+    __table_args__ = (
+        db.Index("ix_plan_slug", "slug", unique=True),
+    )
+
+    @staticmethod
+    def graph_options(strategy="selectin"):
+        """Loader options for the plan's activities."""
+        return [LOADERS[strategy](Plan.activities)]
+
 # ------------------------
 # Activity Model
 # ------------------------
@@ -72,28 +111,196 @@ class UserActivity(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), nullable=False)
 
-    # Store which level was selected (L1/L2/L3)
-    level = db.Column(db.String(10), nullable=False)
+    # Store which level was selected (L1/L2/L3, see levels.py)
+    level = db.Column(Level, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_user_activity_user_activity", "user_id", "activity_id", unique=True),
+    )
 
 # ------------------------
 # DailyLog Model
 # ------------------------
-POINTS_MAPPING = {
-    "not_done": 0,
-    "L1": 5,
-    "L2": 10,
-    "L3": 15
-}
-
-
 class DailyLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), nullable=False)
     log_date = db.Column(db.Date, default=date.today, nullable=False)
-    status = db.Column(db.String(20), default="not_done")  # "not_done", "L1", "L2", "L3"
+    status = db.Column(Level, default="not_done")  # "not_done", "L1", "L2", "L3" (stored as 0-3)
     notes = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        # one log per user/activity/day; also serves upsert lookups and per-activity scans
+        db.Index("ix_daily_log_user_activity_date", "user_id", "activity_id", "log_date", unique=True),
+        # date-range reads (dashboard window, daily totals)
+        db.Index("ix_daily_log_user_date", "user_id", "log_date"),
+        # per-day activity aggregates, answered from the index alone
+        db.Index("ix_daily_log_date_activity", "log_date", "activity_id", "status"),
+    )
+
     def get_points(self):
         """Return points for this log based on status."""
-        return POINTS_MAPPING.get(self.status, 0)
\ No newline at end of file
+        return points(self.status)
+
+# ------------------------
+# DailyScore Model (per-user daily rollup of DailyLog)
+# ------------------------
+class DailyScore(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    score_date = db.Column(db.Date, nullable=False)
+
+    # Points and per-level counts for the user's selected activities
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    not_done_count = db.Column(db.Integer, nullable=False, default=0)
+    l1_count = db.Column(db.Integer, nullable=False, default=0)
+    l2_count = db.Column(db.Integer, nullable=False, default=0)
+    l3_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_daily_score_user_date", "user_id", "score_date", unique=True),
+        # per-day plan/cohort aggregates
+        db.Index("ix_daily_score_date", "score_date"),
+    )
+
+# ------------------------
+# ArchivedLog Model (cold tier of DailyLog, see utils/archive.py)
+# ------------------------
+class ArchivedLog(db.Model):
+    # Same columns as DailyLog minus the id, clustered on the primary key
+    # (no rowid table). A user's date is in one tier only.
+    __tablename__ = "daily_log_archive"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    log_date = db.Column(db.Date, primary_key=True)
+    activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), primary_key=True)
+    status = db.Column(Level, nullable=False)
+    notes = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        # per-date rollup refreshes (utils/aggregates.py)
+        db.Index("ix_daily_log_archive_date", "log_date"),
+        {"sqlite_with_rowid": False},
+    )
+
+# ------------------------
+# LeaderboardEntry Model (per-user ranking metrics, refreshed on log writes)
+# ------------------------
+class LeaderboardEntry(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    plan_id = db.Column(db.Integer, db.ForeignKey("plan.id"), nullable=True)
+
+    # Over the user's plan window (plan start .. as_of), selected activities only
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    best_avg_7d = db.Column(db.Float, nullable=False, default=0.0)
+    as_of = db.Column(db.Date, nullable=True)   # the day current_streak was computed for
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_leaderboard_entry_plan", "plan_id"),
+        # incremental sync of in-process rankings: rows changed since the last sync
+        db.Index("ix_leaderboard_entry_updated_at", "updated_at"),
+    )
+
+# ------------------------
+# Aggregate rollups for the admin report (per plan/activity/cohort and day, see utils/aggregates.py)
+# ------------------------
+class PlanDailyStat(db.Model):
+    plan_id = db.Column(db.Integer, db.ForeignKey("plan.id"), primary_key=True)
+    stat_date = db.Column(db.Date, primary_key=True)
+    active_users = db.Column(db.Integer, nullable=False, default=0)   # users of the plan who logged that day
+    logs = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_plan_daily_stat_date", "stat_date"),
+    )
+
+
+class ActivityDailyStat(db.Model):
+    activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), primary_key=True)
+    stat_date = db.Column(db.Date, primary_key=True)
+    logs = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)     # logs with a level (not "not_done")
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_activity_daily_stat_date", "stat_date"),
+    )
+
+
+class CohortDailyStat(db.Model):
+    # cohort = users of a plan with the same plan_start_date; day_index 0 is that date
+    plan_id = db.Column(db.Integer, db.ForeignKey("plan.id"), primary_key=True)
+    cohort_date = db.Column(db.Date, primary_key=True)
+    day_index = db.Column(db.Integer, primary_key=True)
+    stat_date = db.Column(db.Date, nullable=False)              # cohort_date + day_index
+    active_users = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_cohort_daily_stat_date", "stat_date"),
+    )
+
+
+class PlanCohort(db.Model):
+    plan_id = db.Column(db.Integer, db.ForeignKey("plan.id"), primary_key=True)
+    cohort_date = db.Column(db.Date, primary_key=True)
+    users = db.Column(db.Integer, nullable=False, default=0)
+
+# ------------------------
+# UserStats Model (lifetime log stats for the profile, see utils/stats.py)
+# ------------------------
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+
+    # Over all of the user's logs, any activity
+    days_logged = db.Column(db.Integer, nullable=False, default=0)      # dates with at least one log
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)   # consecutive days with points
+    current_streak = db.Column(db.Integer, nullable=False, default=0)   # the run ending on streak_end_date
+    streak_end_date = db.Column(db.Date, nullable=True)                 # last day with points
+    last_log_date = db.Column(db.Date, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def streak_on(self, today):
+        """current_streak if it is still alive on `today` (a day may pass unlogged so far), else 0."""
+        if self.streak_end_date is None or (today - self.streak_end_date).days > 1:
+            return 0
+        return self.current_streak
+
+# ------------------------
+# Job Model (background job queue, see utils/jobs.py)
+# ------------------------
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)        # registered task name
+    key = db.Column(db.String(200), nullable=True)          # dedupe key, e.g. "scores:42"
+    payload = db.Column(db.Text, nullable=False, default="{}")   # JSON
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default="queued")   # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)               # JSON
+
+    __table_args__ = (
+        # claim order: next due queued job
+        db.Index("ix_job_status_run_after", "status", "run_after"),
+        # coalescing: the queued job for a key
+        db.Index("ix_job_key_status", "key", "status"),
+    )
+
+# ------------------------
+# CatalogVersion Model (digest of the plans/*.py catalog last loaded, see utils/catalog.py)
+# ------------------------
+class CatalogVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)       # "plans"
+    digest = db.Column(db.String(64), nullable=False)       # sha256 of the definition files
+    version = db.Column(db.Integer, nullable=False, default=1)   # bumped on every change
+    loaded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
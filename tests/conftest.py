@@ -0,0 +1,112 @@
+# tests/conftest.py
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Plan, User
+from utils.catalog import load_plan_catalog
+
+PASSWORD = "secret1"
+
+
+@pytest.fixture
+def app_config():
+    """Config overrides for the app fixture; a test module redefines it to change them."""
+    return {}
+
+
+def make_app(database_uri, app_config=None):
+    """An app with the test settings on database_uri; jobs run inline."""
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "JOBS_MODE": "inline",
+        "AGGREGATES_DELAY": 0,
+        "PLAN_CATALOG_AUTOLOAD": False,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",   # fast hashes
+        **(app_config or {}),
+    })
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    """App on a fresh SQLite file with the plan catalog loaded; jobs run inline."""
+    app = make_app(f"sqlite:///{tmp_path / 'test.db'}", app_config)
+    with app.app_context():
+        db.create_all()
+        load_plan_catalog(app.config["PLAN_CATALOG_DIR"])
+        app.extensions["plan_catalog"].refresh(force=True)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def plan(app):
+    """The first catalog plan as (plan_id, [activity ids])."""
+    with app.app_context():
+        plan = db.session.scalars(db.select(Plan).order_by(Plan.id)).first()
+        return plan.id, [activity.id for activity in plan.activities]
+
+
+def sign_in(client, email="user@example.com", username="user"):
+    """Register and log in through the home form."""
+    client.post("/", data={"register-submit": "1", "username": username, "email": email,
+                           "password": PASSWORD, "confirm_password": PASSWORD})
+    response = client.post("/", data={"login-submit": "1", "email": email, "password": PASSWORD})
+    assert response.status_code == 302, response.data
+
+
+def choose_plan(client, plan, days_ago=0, level="L2"):
+    """Select every activity of the plan at one level, starting days_ago days back."""
+    plan_id, activity_ids = plan
+    data = {"activities": [str(a) for a in activity_ids],
+            "plan_start_date": (date.today() - timedelta(days=days_ago)).isoformat()}
+    data.update({f"level_{a}": level for a in activity_ids})
+    response = client.post(f"/select_plan/{plan_id}", data=data)
+    assert response.status_code == 302 and "/my_plan" in response.location, response.data
+
+
+def log_days(client, activity_ids, days, status="L2"):
+    """Log the activities on each of the last `days` days, through the batch API."""
+    logs = [{"date": (date.today() - timedelta(days=k)).isoformat(), "activity_id": a, "status": status}
+            for k in range(days) for a in activity_ids]
+    for start in range(0, len(logs), 500):
+        response = client.post("/api/v1/logs", json={"logs": logs[start:start + 500]})
+        assert response.status_code == 200, response.get_json()
+
+
+def user_id(app, email="user@example.com"):
+    with app.app_context():
+        return db.session.scalar(db.select(User.id).where(User.email == email))
+
+
+@contextmanager
+def count_queries(app):
+    """Count the SQL statements the app's engine runs in the block: `with count_queries(app) as n: ...; n[0]`."""
+    with app.app_context():
+        engine = db.engine
+    counter = [0]
+
+    def before_cursor_execute(*args):
+        counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,133 @@
+# tests/test_aggregates.py
+"""Report rollups against a fixture small enough to total by hand (5 points per level)."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from models import db, ActivityDailyStat, ArchivedLog, CohortDailyStat, DailyLog, PlanCohort, PlanDailyStat, \
+    User, UserActivity
+from utils.aggregates import plan_report, rebuild_aggregates, refresh_aggregates
+from utils.rollups import rebuild_all_daily_scores, rebuild_daily_scores
+
+D0, D1, D2 = date(2024, 3, 18), date(2024, 3, 19), date(2024, 3, 20)   # Monday to Wednesday
+
+
+@pytest.fixture
+def seeded(app, plan):
+    """
+    u1, u2 start on D0 and u3 on D2, all selecting activities a and b; u4 has no plan.
+    u3 also logs before its start (plan only, no cohort), an unselected activity c
+    (activity stats only) and keeps D2 in the archive tier.
+    """
+    plan_id, (a, b, c) = plan[0], plan[1][:3]
+    with app.app_context():
+        ids = {}
+        for name, start in (("u1", D0), ("u2", D0), ("u3", D2), ("u4", None)):
+            db.session.execute(User.__table__.insert(), {
+                "username": name, "email": f"{name}@example.com", "password": "x", "log_version": 0,
+                "plan_id": plan_id if start else None, "plan_start_date": start})
+            ids[name] = db.session.scalar(select(User.id).where(User.username == name))
+        db.session.execute(UserActivity.__table__.insert(), [
+            {"user_id": ids[name], "activity_id": activity, "level": "L2"}
+            for name in ("u1", "u2", "u3", "u4") for activity in (a, b)])
+        db.session.execute(DailyLog.__table__.insert(), [
+            {"user_id": ids[name], "log_date": day, "activity_id": activity, "status": status}
+            for name, day, activity, status in (
+                ("u1", D0, a, "L1"), ("u1", D0, b, "L2"), ("u1", D1, a, "not_done"), ("u1", D1, b, "L3"),
+                ("u2", D0, a, "L3"),
+                ("u3", D1, a, "L1"),
+                ("u4", D0, a, "L1"))])
+        db.session.execute(ArchivedLog.__table__.insert(), [
+            {"user_id": ids["u3"], "log_date": D2, "activity_id": activity, "status": status}
+            for activity, status in ((a, "L2"), (b, "not_done"), (c, "L3"))])
+        rebuild_all_daily_scores()
+        db.session.commit()
+    return plan_id, (a, b, c), ids
+
+
+def plan_stats():
+    return {row[0]: tuple(row[1:]) for row in db.session.execute(
+        select(PlanDailyStat.stat_date, PlanDailyStat.active_users, PlanDailyStat.logs, PlanDailyStat.points))}
+
+
+def cohort_stats():
+    return {(row[0], row[1]): tuple(row[2:]) for row in db.session.execute(
+        select(CohortDailyStat.cohort_date, CohortDailyStat.day_index,
+               CohortDailyStat.active_users, CohortDailyStat.points))}
+
+
+def activity_stats():
+    return {(row[0], row[1]): tuple(row[2:]) for row in db.session.execute(
+        select(ActivityDailyStat.activity_id, ActivityDailyStat.stat_date,
+               ActivityDailyStat.logs, ActivityDailyStat.done, ActivityDailyStat.points))}
+
+
+def all_stats():
+    return plan_stats(), cohort_stats(), activity_stats(), \
+        set(db.session.execute(select(PlanCohort.plan_id, PlanCohort.cohort_date, PlanCohort.users)))
+
+
+def test_rebuild_matches_hand_totals(app, seeded):
+    plan_id, (a, b, c), _ = seeded
+    with app.app_context():
+        assert rebuild_aggregates() == {"plan_daily_stat": 3, "cohort_daily_stat": 3,
+                                        "activity_daily_stat": 7, "plan_cohort": 2}
+        # (active users, logs, points); u3's D1 log predates its plan but counts for the plan
+        assert plan_stats() == {D0: (2, 3, 30), D1: (2, 3, 20), D2: (1, 2, 10)}
+        # (active users, points) by (cohort, day of plan); not u3's D1 log
+        assert cohort_stats() == {(D0, 0): (2, 30), (D0, 1): (1, 15), (D2, 0): (1, 10)}
+        # (logs, done, points): every log, any user, selected or not, hot or archived
+        assert activity_stats() == {
+            (a, D0): (3, 3, 25), (a, D1): (2, 1, 5), (a, D2): (1, 1, 10),
+            (b, D0): (1, 1, 10), (b, D1): (1, 1, 15), (b, D2): (1, 0, 0),
+            (c, D2): (1, 1, 15)}
+        assert set(db.session.execute(select(PlanCohort.plan_id, PlanCohort.cohort_date, PlanCohort.users))) == {
+            (plan_id, D0, 2), (plan_id, D2, 1)}
+
+
+def test_refresh_touches_only_the_given_dates(app, seeded):
+    _, (a, b, c), ids = seeded
+    with app.app_context():
+        rebuild_aggregates()
+        db.session.execute(update(DailyLog).where(DailyLog.user_id == ids["u1"], DailyLog.log_date == D1,
+                                                  DailyLog.activity_id == a).values(status="L2"))
+        db.session.execute(update(DailyLog).where(DailyLog.user_id == ids["u2"]).values(status="L1"))
+        rebuild_daily_scores(ids["u1"])
+        rebuild_daily_scores(ids["u2"])
+        refresh_aggregates(dates=[D1])
+        db.session.commit()
+
+        assert plan_stats() == {D0: (2, 3, 30), D1: (2, 3, 30), D2: (1, 2, 10)}   # D0 is stale until refreshed
+        assert cohort_stats()[(D0, 1)] == (1, 25)
+        assert activity_stats()[(a, D1)] == (2, 2, 15) and activity_stats()[(a, D0)] == (3, 3, 25)
+
+        refresh_aggregates(dates=[D0])
+        db.session.commit()
+        refreshed = all_stats()
+        rebuild_aggregates()
+        assert refreshed == all_stats()
+        assert plan_stats()[D0] == (2, 3, 20)
+
+
+def test_plan_report_from_the_rollups(app, seeded):
+    plan_id, (a, b, c), _ = seeded
+    with app.app_context():
+        rebuild_aggregates()
+        plan = app.extensions["plan_catalog"].get(plan_id)
+        report = plan_report(plan, D2, days=4)
+
+    assert report["users"] == 3
+    assert [(day["date"], day["active_users"], day["points"]) for day in report["daily_active"]] == [
+        ("2024-03-17", 0, 0), ("2024-03-18", 2, 30), ("2024-03-19", 2, 20), ("2024-03-20", 1, 10)]
+
+    activities = {activity["id"]: activity for activity in report["activities"]}
+    assert (activities[a]["logs"], activities[a]["done_rate"], activities[a]["avg_points"]) == (6, 0.8333, 6.6667)
+    assert (activities[b]["logs"], activities[b]["done_rate"], activities[b]["avg_points"]) == (3, 0.6667, 8.3333)
+    assert (activities[c]["logs"], activities[c]["done_rate"], activities[c]["avg_points"]) == (1, 1.0, 15.0)
+
+    # day 1: both cohorts (3 users, all logged); days 2-3: only the D0 cohort has reached them
+    assert [(day["eligible"], day["logged"], day["rate"]) for day in report["completion_by_day"][:4]] == [
+        (3, 3, 1.0), (2, 1, 0.5), (2, 0, 0.0), (0, 0, None)]
+    assert report["cohorts"] == [{"week": "2024-03-18", "users": 3,
+                                  "retention": {str(d): 0.5 if d == 1 else None
+                                                for d in report["retention_days"]}}]
@@ -0,0 +1,106 @@
+# tests/test_api.py
+"""/api/v1: batch-write validation and the ETag / Last-Modified revalidation of reads."""
+from datetime import date, timedelta
+
+import pytest
+from models import db, DailyLog
+from conftest import choose_plan, sign_in
+
+TODAY = date.today().isoformat()
+YESTERDAY = (date.today() - timedelta(days=1)).isoformat()
+
+
+@pytest.fixture
+def signed_in(client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=10)
+    return client
+
+
+def post_logs(client, logs):
+    return client.post("/api/v1/logs", json={"logs": logs})
+
+
+def test_invalid_entries_reject_the_whole_batch(app, signed_in, plan):
+    a, b = plan[1][:2]
+    response = post_logs(signed_in, [
+        {"date": TODAY, "activity_id": a, "status": "L2"},              # valid, but not saved
+        {"date": TODAY, "activity_id": b, "status": "L4"},
+        {"date": "2024-02-30", "activity_id": a, "status": "L1"},
+        {"date": None, "activity_id": a, "status": "L1"},
+        {"date": TODAY, "activity_id": 999999, "status": "L1"},
+        {"date": TODAY, "activity_id": str(a), "status": "L1"},
+        {"date": TODAY, "activity_id": b, "status": "L1", "notes": 5},
+        {"date": TODAY, "activity_id": a, "status": "L3"},              # same day and activity as 0
+        "L1",
+    ])
+    assert response.status_code == 400
+    assert [(e["index"], e["error"].split(" ")[0]) for e in response.get_json()["errors"]] == [
+        (1, "status"), (2, "date"), (3, "date"), (4, "activity_id"), (5, "activity_id"),
+        (6, "notes"), (7, "duplicate"), (8, "expected")]
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(DailyLog)) == 0
+
+
+@pytest.mark.parametrize("body", [{}, {"logs": []}, {"logs": {"date": TODAY}}, [1, 2]])
+def test_batch_must_be_a_non_empty_list(signed_in, body):
+    response = signed_in.post("/api/v1/logs", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [{"index": None, "error": "logs must be a non-empty list"}]
+
+
+def test_batch_size_limit(app, signed_in, plan):
+    app.config["API_MAX_BATCH"] = 2
+    logs = [{"date": (date.today() - timedelta(days=k)).isoformat(), "activity_id": plan[1][0], "status": "L1"}
+            for k in range(3)]
+    assert post_logs(signed_in, logs).status_code == 400
+    assert post_logs(signed_in, logs[:2]).status_code == 200
+
+
+def test_valid_batch_saves_and_keeps_notes(app, signed_in, plan):
+    a, b = plan[1][:2]
+    first = post_logs(signed_in, [{"date": YESTERDAY, "activity_id": a, "status": "L1", "notes": "rainy"},
+                                  {"date": YESTERDAY, "activity_id": b, "status": "L2"}])
+    assert first.status_code == 200 and first.get_json()["saved"] == 2
+    second = post_logs(signed_in, [{"date": YESTERDAY, "activity_id": a, "status": "L3"}])   # no "notes": kept
+    assert second.get_json()["log_version"] == first.get_json()["log_version"] + 1
+
+    day = signed_in.get(f"/api/v1/today?date={YESTERDAY}").get_json()
+    assert {x["id"]: x["status"] for x in day["activities"]}[a] == "L3"
+    with app.app_context():
+        assert db.session.scalar(db.select(DailyLog.notes).where(DailyLog.activity_id == a)) == "rainy"
+
+
+def test_requires_a_session(client):
+    assert client.post("/api/v1/logs", json={"logs": []}).status_code == 401
+    assert client.get("/api/v1/summary").status_code == 401
+
+
+@pytest.mark.parametrize("url", ["/api/v1/today", "/api/v1/summary", "/api/v1/trend?bucket=week"])
+def test_reads_revalidate_with_etag(signed_in, plan, url):
+    first = signed_in.get(url)
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = signed_in.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b"" and cached.headers["ETag"] == etag
+    assert signed_in.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+
+    assert post_logs(signed_in, [{"date": TODAY, "activity_id": plan[1][0], "status": "L3"}]).status_code == 200
+    changed = signed_in.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_etag_depends_on_the_query(signed_in):
+    today = signed_in.get("/api/v1/today").headers["ETag"]
+    other_day = signed_in.get(f"/api/v1/today?date={YESTERDAY}")
+    assert other_day.headers["ETag"] != today
+    assert signed_in.get(f"/api/v1/today?date={YESTERDAY}", headers={"If-None-Match": today}).status_code == 200
+
+
+@pytest.mark.parametrize("url", ["/api/v1/today?date=tomorrow", "/api/v1/trend?start=2024-13-01",
+                                 "/api/v1/trend?series=activity_999999"])
+def test_bad_read_parameters(signed_in, url):
+    response = signed_in.get(url)
+    assert response.status_code == 400 and response.get_json()["error"]
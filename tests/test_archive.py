@@ -0,0 +1,85 @@
+# tests/test_archive.py
+"""Logs without a status archive as not_done; the per-activity route no longer writes them."""
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, select
+from models import db, ArchivedLog, DailyLog, User
+from utils.archive import archive_logs
+from utils.logs import save_day_logs
+from conftest import choose_plan, log_days, sign_in, user_id
+
+
+def test_archive_null_status(app, plan):
+    activity_ids = plan[1]
+    old = date.today() - timedelta(days=400)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(),
+                           {"username": "u", "email": "u@example.com", "password": "x", "log_version": 0})
+        uid = db.session.scalar(db.select(User.id))
+        db.session.execute(DailyLog.__table__.insert(), [
+            {"user_id": uid, "activity_id": activity_ids[0], "log_date": old, "status": None},
+            {"user_id": uid, "activity_id": activity_ids[1], "log_date": old, "status": "L2"},
+        ])
+        db.session.commit()
+
+        assert archive_logs(date.today() - timedelta(days=365)) == {"logs": 2, "users": 1}
+        archived = dict(db.session.execute(db.select(ArchivedLog.activity_id, ArchivedLog.status)).all())
+        assert archived == {activity_ids[0]: "not_done", activity_ids[1]: "L2"}
+        assert db.session.scalar(db.select(db.func.count()).select_from(DailyLog)) == 0
+
+
+def test_daily_log_requires_status(app, client, plan):
+    sign_in(client)
+    activity_id = plan[1][0]
+    assert client.post(f"/daily_log/{activity_id}", data={"notes": "no status"}).status_code == 302
+    with client.session_transaction() as session:
+        assert ("danger", "Unknown status.") in session["_flashes"]
+
+    client.post(f"/daily_log/{activity_id}", data={"status": "L1"})
+    with app.app_context():
+        logs = db.session.execute(db.select(DailyLog.user_id, DailyLog.status)).all()
+    assert logs == [(user_id(app), "L1")]
+
+
+def test_tier_moves_without_returning(app, client, plan, monkeypatch):
+    """Databases without DELETE/UPDATE ... RETURNING archive and restore through SELECT, then DELETE."""
+    sign_in(client)
+    choose_plan(client, plan, days_ago=500)
+    old = date.today() - timedelta(days=400)
+    log_days(client, plan[1][:1], 1)   # also opens the API's async engine (dialect initialized)
+    with app.app_context():
+        save_day_logs(user_id(app), old, {plan[1][0]: "L1", plan[1][1]: "L2"})
+        db.session.commit()
+        engines = [db.engine, app.extensions["async_db"].engine.sync_engine]
+    for engine in engines:
+        monkeypatch.setattr(engine.dialect, "delete_returning", False)
+        monkeypatch.setattr(engine.dialect, "update_returning", False)
+
+    statements = []
+
+    def record(conn, cursor, sql, *args):
+        statements.append(sql)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        with app.app_context():
+            assert archive_logs(old + timedelta(days=1), previous_plans=False) == {"logs": 2, "users": 1}
+            save_day_logs(user_id(app), old, {plan[1][0]: "L3"})   # restores the day, then writes it
+            db.session.commit()
+            assert db.session.scalar(select(func.count()).select_from(ArchivedLog)) == 0
+
+            archive_logs(old + timedelta(days=1), previous_plans=False)
+        response = client.post("/api/v1/logs", json={"logs": [
+            {"date": old.isoformat(), "activity_id": plan[1][1], "status": "not_done"}]})
+        assert response.status_code == 200, response.get_json()
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+    assert statements and not any("RETURNING" in sql for sql in statements)
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(ArchivedLog)) == 0
+        day = dict(db.session.execute(select(DailyLog.activity_id, DailyLog.status)
+                                      .where(DailyLog.log_date == old)).all())
+    assert day == {plan[1][0]: "L3", plan[1][1]: "not_done"}
@@ -0,0 +1,78 @@
+# tests/test_cache.py
+import threading
+
+from sqlalchemy import select, update
+from models import db, User
+from utils.cache import make_cache
+from utils.dashboard import mark_logs_changed
+from conftest import choose_plan, log_days, sign_in, user_id
+
+
+def test_view_cache_counts_hits_and_misses():
+    for url in ("memory://", "local://"):
+        cache = make_cache(url)
+        assert cache.get_or_build("k", lambda: {"v": 1}) == {"v": 1}
+        assert cache.get_or_build("k", lambda: {"v": 2}) == {"v": 1}
+        cache.delete("k")
+        assert cache.get_or_build("k", lambda: {"v": 3}) == {"v": 3}
+        assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
+def test_admin_jobs_reports_dashboard_cache(app, client, plan):
+    app.config["ADMIN_EMAILS"] = {"user@example.com"}
+    sign_in(client)
+    choose_plan(client, plan)
+    before = client.get("/admin/jobs").get_json()["dashboard_cache"]
+
+    client.get("/dashboard")
+    client.get("/dashboard")
+    log_days(client, plan[1], 1)   # a write invalidates the cached view
+    client.get("/dashboard")
+
+    after = client.get("/admin/jobs").get_json()["dashboard_cache"]
+    assert after["misses"] - before["misses"] == 2
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_admin_jobs_forbidden_for_users(client):
+    sign_in(client)
+    assert client.get("/admin/jobs").status_code == 403
+
+
+def test_log_version_bump_is_atomic(app, client, plan):
+    """A writer holding a stale copy of the user still moves log_version forward."""
+    sign_in(client)
+    choose_plan(client, plan)
+    with app.app_context():
+        stale = db.session.get(User, user_id(app))
+        db.session.expunge(stale)   # e.g. an identity snapshot taken before another worker's write
+        start = stale.log_version
+
+        db.session.execute(update(User).where(User.id == stale.id)
+                           .values(log_version=User.log_version + 1))
+        db.session.commit()
+
+        user = db.session.merge(stale, load=False)
+        assert mark_logs_changed(user) == start + 2
+        db.session.commit()
+        assert db.session.scalar(select(User.log_version).where(User.id == user.id)) == start + 2
+        assert user.log_version == start + 2 and not db.session.dirty
+
+
+def test_view_cache_counters_are_exact_across_threads():
+    cache = make_cache("memory://")
+    cache.get_or_build("k", lambda: 1)
+
+    def lookups():
+        for _ in range(2000):
+            cache.get_or_build("k", lambda: 1)
+            cache.get_or_build("missing", lambda: None)   # None is never cached: always a miss
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == 8 * 2000
+    assert cache.stats()["misses"] == 1 + 8 * 2000
+
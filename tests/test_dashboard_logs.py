@@ -0,0 +1,60 @@
+# tests/test_dashboard_logs.py
+"""The dashboard renders only the last days of the log grid; earlier days page in from /dashboard/logs."""
+import re
+from datetime import date, timedelta
+from conftest import choose_plan, log_days, sign_in
+
+
+def grid_rows(html):
+    body = html[html.index('id="summaryRows"'):html.index("</tbody>")]
+    return re.findall(r"<td>(\d{4}-\d\d-\d\d)</td>", body)
+
+
+def test_page_size_does_not_grow_with_the_plan(app, client, plan):
+    sign_in(client)
+    sizes = {}
+    for days in (20, 300):
+        choose_plan(client, plan, days_ago=days - 1)
+        log_days(client, plan[1], days)
+        html = client.get("/dashboard").get_data(as_text=True)
+        sizes[days] = len(html)
+        rows = grid_rows(html)
+        assert len(rows) == app.config["DASHBOARD_LOG_DAYS"]
+        assert rows[-1] == date.today().isoformat()
+        assert f'data-end="{(date.today() - timedelta(days=14)).isoformat()}"' in html
+    assert sizes[300] - sizes[20] < 200   # only the numbers in the stats differ
+
+
+def test_short_plan_has_no_earlier_pages(client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=4)
+    html = client.get("/dashboard").get_data(as_text=True)
+    assert len(grid_rows(html)) == 5
+    assert 'data-end="" hidden' in html
+
+
+def test_pages_walk_back_to_the_plan_start(client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=39)
+    log_days(client, plan[1][:1], 40, status="L3")
+
+    end, seen = (date.today() - timedelta(days=14)).isoformat(), []
+    while end:
+        page = client.get(f"/dashboard/logs?end={end}").get_json()
+        assert page["days"][-1]["date"] == end
+        seen = [day["date"] for day in page["days"]] + seen
+        assert all(day["logs"] == {str(plan[1][0]): "L3"} for day in page["days"])
+        end = page["earlier_end"]
+
+    first = date.today() - timedelta(days=39)
+    assert seen == [(first + timedelta(days=k)).isoformat() for k in range(26)]
+
+
+def test_page_parameters(app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=200)
+    assert client.get("/dashboard/logs?end=yesterday").status_code == 400
+    assert len(client.get("/dashboard/logs?days=0").get_json()["days"]) == 1
+    assert len(client.get("/dashboard/logs?days=9999").get_json()["days"]) == app.config["DASHBOARD_LOG_DAYS_LIMIT"]
+    future = client.get("/dashboard/logs?end=2999-01-01&days=3").get_json()
+    assert future["days"][-1]["date"] == date.today().isoformat()   # clamped to today
@@ -0,0 +1,47 @@
+# tests/test_dashboard_queries.py
+"""The dashboard reads a user's plan window in a fixed number of queries, however long the history."""
+import pytest
+from conftest import choose_plan, count_queries, log_days, sign_in
+
+
+@pytest.fixture
+def app_config():
+    # inline jobs poll the queue after every request; count the route's own statements
+    return {"JOBS_MODE": "worker"}
+
+
+def dashboard_queries(app, client):
+    """(uncached, cached) statement counts of two GET /dashboard in a row."""
+    with count_queries(app) as uncached:
+        assert client.get("/dashboard").status_code == 200
+    with count_queries(app) as cached:
+        assert client.get("/dashboard").status_code == 200
+    return uncached[0], cached[0]
+
+
+def test_query_count_constant_as_history_grows(app, client, plan):
+    sign_in(client)
+    counts = {}
+    for days in (5, 60):
+        choose_plan(client, plan, days_ago=days - 1)
+        log_days(client, plan[1][:3], days)
+        counts[days] = dashboard_queries(app, client)
+
+    assert counts[5] == counts[60]
+    uncached, cached = counts[60]
+    assert uncached <= 4
+    assert cached <= 1   # the log_version refresh; the view model comes from the cache
+
+
+def test_query_count_constant_across_users(app, client, plan):
+    """A second user with a longer history costs the same number of queries."""
+    sign_in(client)
+    choose_plan(client, plan, days_ago=2)
+    log_days(client, plan[1], 3)
+    short = dashboard_queries(app, client)
+
+    other = app.test_client()
+    sign_in(other, email="other@example.com", username="other")
+    choose_plan(other, plan, days_ago=89)
+    log_days(other, plan[1], 90)
+    assert dashboard_queries(app, other) == short
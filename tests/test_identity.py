@@ -0,0 +1,50 @@
+# tests/test_identity.py
+"""Writes through a cached (stale) identity still invalidate every process's cached views."""
+from datetime import date
+
+import pytest
+from models import db, User
+from conftest import choose_plan, make_app, sign_in, user_id
+
+
+@pytest.fixture
+def other_app(app):
+    """A second app process on the same database, with its own identity and view caches."""
+    other = make_app(app.config["SQLALCHEMY_DATABASE_URI"])
+    with other.app_context():
+        other.extensions["plan_catalog"].refresh(force=True)
+    yield other
+    with other.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def today_badges(html):
+    row = html[html.index(f"<td>{date.today().isoformat()}</td>"):]
+    return row[:row.index("</tr>")]
+
+
+def save_today(client, plan, status):
+    data = {"log_date": date.today().isoformat(), **{f"activity_{a}": status for a in plan[1]}}
+    assert client.post("/dashboard", data=data).status_code == 302
+
+
+def test_write_through_stale_identity(app, other_app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan)
+    other = other_app.test_client()
+    other.set_cookie("session", client.get_cookie("session").value)   # same browser, another worker
+    with app.app_context():
+        start = db.session.get(User, user_id(app)).log_version
+
+    # both processes cache the identity and the dashboard
+    assert client.get("/dashboard").status_code == other.get("/dashboard").status_code == 200
+
+    save_today(other, plan, "L1")   # B writes...
+    save_today(client, plan, "L3")  # ...then A, through its snapshot from before B's write
+
+    with app.app_context():
+        assert db.session.get(User, user_id(app)).log_version == start + 2
+    for c in (client, other):
+        badges = today_badges(c.get("/dashboard").get_data(as_text=True))
+        assert "Extensive (L3)" in badges and "Beginner (L1)" not in badges
@@ -0,0 +1,94 @@
+# tests/test_importer.py
+"""Importer row validation: valid rows are upserted, the others are counted by reason with line numbers."""
+import io
+import json
+from datetime import date, timedelta
+
+from models import db, DailyLog, User
+from utils.importer import MAX_SAMPLES, import_logs, read_records
+from conftest import choose_plan, sign_in, user_id
+
+DAY = (date.today() - timedelta(days=1)).isoformat()
+
+
+def upload(client, name, text):
+    return client.post("/import/logs", data={"file": (io.BytesIO(text.encode()), name)},
+                       content_type="multipart/form-data")
+
+
+def stored_logs(app):
+    with app.app_context():
+        return dict(db.session.execute(db.select(DailyLog.activity_id, DailyLog.status)).all())
+
+
+def test_csv_import_reports_rejected_rows(app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=5)
+    a, b = plan[1][:2]
+    text = "\n".join([
+        "activity_id,log_date,status,notes",
+        f"{a},{DAY},L2,felt good",     # line 2: ok
+        f"{b},{DAY},L9,",              # 3: unknown status
+        f"x,{DAY},L1,",                # 4: bad id
+        f"{a},yesterday,L1,",          # 5: bad date
+        f"999999,{DAY},L1,",           # 6: not a selected activity
+        f"{b},{DAY},L3,",              # 7: ok
+        f"{a},{DAY},L3,",              # 8: ok, same key as line 2: the last row wins
+    ])
+    report = upload(client, "logs.csv", text).get_json()
+
+    assert (report["accepted"], report["rejected"]) == (3, 4)
+    assert report["reasons"] == {"unknown status": 1, "bad user_id, activity_id or log_date": 2,
+                                 "activity not selected by user": 1}
+    assert [sample["line"] for sample in report["samples"]] == [3, 4, 5, 6]
+    assert report["users"] == 1
+    assert stored_logs(app) == {a: "L3", b: "L3"}
+
+
+def test_ndjson_import_reports_rejected_rows(app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=5)
+    a = plan[1][0]
+    lines = [
+        json.dumps({"activity_id": a, "log_date": DAY, "status": "L1"}),
+        "{not json",
+        "",                                                   # blank lines are skipped
+        json.dumps({"activity_id": a, "status": "L1"}),
+        json.dumps([a, DAY, "L1"]),
+    ]
+    report = upload(client, "logs.ndjson", "\n".join(lines)).get_json()
+
+    assert (report["accepted"], report["rejected"]) == (1, 3)
+    assert report["samples"] == [{"line": 2, "reason": "malformed record"},
+                                 {"line": 4, "reason": "missing log_date"},
+                                 {"line": 5, "reason": "malformed record"}]
+    assert stored_logs(app) == {a: "L1"}
+
+
+def test_upload_errors(client):
+    sign_in(client)
+    assert client.post("/import/logs").status_code == 400
+    assert upload(client, "logs.xlsx", "x").status_code == 400
+
+
+def test_user_id_column_is_validated(app, client, plan):
+    """Without a fixed user (the CLI), every row names its user; unknown users are rejected."""
+    sign_in(client)
+    choose_plan(client, plan, days_ago=5)
+    uid, a = user_id(app), plan[1][0]
+    records = read_records(io.StringIO(f"user_id,activity_id,log_date,status\n"
+                                       f"{uid},{a},{DAY},L2\n999,{a},{DAY},L2\n,{a},{DAY},L2\n"), "csv")
+    with app.app_context():
+        version = db.session.get(User, uid).log_version
+        report = import_logs(records)
+        assert report.as_dict()["reasons"] == {"unknown user": 1, "bad user_id, activity_id or log_date": 1}
+        assert report.accepted == 1
+        db.session.expire_all()
+        assert db.session.get(User, uid).log_version == version + 1   # cached views invalidated
+
+
+def test_samples_are_capped(app):
+    records = ((line, None) for line in range(1, MAX_SAMPLES + 11))
+    with app.app_context():
+        report = import_logs(records)
+    assert report.rejected == MAX_SAMPLES + 10 and len(report.samples) == MAX_SAMPLES
@@ -0,0 +1,156 @@
+# tests/test_jobs.py
+"""The Job-table queue: coalescing on key, retries with backoff, exclusive claims, stale requeue."""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+from models import db, Job
+from utils.jobs import JobRunner
+
+
+@pytest.fixture
+def app_config():
+    return {"JOBS_MODE": "worker", "JOBS_COALESCE_DELAY": 0, "JOBS_RETRY_BASE": 2.0}
+
+
+@pytest.fixture
+def runner(app):
+    """A runner of its own, with test tasks; `calls` records every run."""
+    runner = JobRunner(app)
+    runner.calls = []
+
+    @runner.task("collect", merge=lambda old, new: {"dates": sorted(set(old["dates"]) | set(new["dates"]))})
+    def collect(dates):
+        runner.calls.append(("collect", dates))
+        return len(dates)
+
+    @runner.task("flaky", max_attempts=3)
+    def flaky():
+        runner.calls.append(("flaky",))
+        raise RuntimeError("boom")
+
+    @runner.task("slow", max_attempts=1)
+    def slow(seconds):
+        time.sleep(seconds)
+        runner.calls.append(("slow",))
+
+    with app.app_context():
+        yield runner
+
+
+def jobs():
+    db.session.expire_all()
+    return db.session.scalars(db.select(Job).order_by(Job.id)).all()
+
+
+def test_same_key_merges_into_the_queued_job(runner):
+    runner.enqueue("collect", {"dates": ["2024-01-02"]}, key="k")
+    runner.enqueue("collect", {"dates": ["2024-01-01", "2024-01-02"]}, key="k")
+    runner.enqueue("collect", {"dates": ["2024-01-03"]}, key="other")
+    db.session.commit()
+    assert [(job.key, job.payload) for job in jobs()] == [
+        ("k", '{"dates": ["2024-01-01", "2024-01-02"]}'), ("other", '{"dates": ["2024-01-03"]}')]
+
+    assert runner.run_pending() == 2
+    assert sorted(runner.calls) == [("collect", ["2024-01-01", "2024-01-02"]), ("collect", ["2024-01-03"])]
+
+
+def test_merge_racing_a_claim_queues_a_new_job(runner):
+    first = runner.enqueue("collect", {"dates": ["2024-01-01"]}, key="k")
+    db.session.commit()
+    first_id = first.id
+
+    engine = db.engine
+    claimed = []
+
+    def claim_first(conn, cursor, statement, *args):
+        """Another worker claims the job between enqueue's SELECT and its UPDATE."""
+        if statement.startswith("UPDATE job SET payload") and not claimed:
+            claimed.append(first_id)
+            with engine.begin() as other:
+                other.execute(update(Job).where(Job.id == first_id).values(status="running"))
+
+    event.listen(engine, "before_cursor_execute", claim_first)
+    try:
+        job = runner.enqueue("collect", {"dates": ["2024-01-02"]}, key="k")
+        db.session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", claim_first)
+
+    assert claimed and job.id != first_id
+    assert [(job.status, job.payload) for job in jobs()] == [
+        ("running", '{"dates": ["2024-01-01"]}'), ("queued", '{"dates": ["2024-01-02"]}')]
+
+
+def test_failures_retry_with_backoff_then_fail(runner):
+    runner.enqueue("flaky")
+    db.session.commit()
+
+    delays = []
+    for _ in range(3):
+        assert runner.run_pending() == 1
+        job = jobs()[0]
+        if job.status == "queued":
+            delays.append(round((job.run_after - job.updated_at).total_seconds()))
+            db.session.execute(update(Job).values(run_after=datetime.utcnow()))   # skip the wait
+            db.session.commit()
+    job = jobs()[0]
+    assert delays == [2, 4]                     # retry_base ** attempts
+    assert (job.status, job.attempts) == ("failed", 3) and "boom" in job.last_error
+    assert runner.calls == [("flaky",)] * 3 and runner.run_pending() == 0
+
+
+def test_claims_are_exclusive(app, runner):
+    for i in range(40):
+        runner.enqueue("collect", {"dates": [str(i)]})
+    db.session.commit()
+
+    claimed, errors = [], []
+
+    def worker():
+        with app.app_context():
+            try:
+                while (job := runner.claim()) is not None:
+                    claimed.append(job.id)
+            except Exception as exc:   # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert sorted(claimed) == sorted(job.id for job in jobs())
+    assert all(job.status == "running" and job.attempts == 1 for job in jobs())
+
+
+def test_maintenance_requeues_only_jobs_without_a_heartbeat(app, runner):
+    runner.stale_after, runner.heartbeat_interval = 0.3, 0.05
+    runner.enqueue("slow", {"seconds": 0.8})
+    dead = runner.enqueue("collect", {"dates": []})
+    db.session.commit()
+    dead_id = dead.id
+    db.session.execute(update(Job).where(Job.id == dead_id).values(
+        status="running", attempts=1, updated_at=datetime.utcnow() - timedelta(seconds=10)))
+    db.session.commit()
+
+    def run_slow():
+        with app.app_context():
+            runner.run_pending(limit=1)
+            db.session.remove()
+
+    thread = threading.Thread(target=run_slow)
+    thread.start()
+    time.sleep(0.6)   # the slow job has been running for longer than stale_after
+    requeued, _ = runner.maintenance()
+    thread.join()
+
+    assert requeued == 1
+    slow, dead = jobs()
+    assert (slow.status, slow.attempts) == ("done", 1) and runner.calls[-1] == ("slow",)
+    assert (dead.id, dead.status) == (dead_id, "queued")
@@ -0,0 +1,80 @@
+# tests/test_leaderboard.py
+"""A full rebuild followed by a sync: unchanged rows are not replayed, mass changes reload in bulk."""
+from datetime import date, datetime, timedelta
+
+import pytest
+from models import db, DailyScore, LeaderboardEntry, User
+from utils.leaderboard import METRICS, Leaderboards, SortedRanking, rebuild_leaderboards
+
+USERS = 1000
+DAYS = 10
+
+
+@pytest.fixture
+def seeded(app, plan):
+    """USERS users on the plan, each with DAYS days of scores ending today."""
+    today = date.today()
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"u{u}", "email": f"u{u}@example.com", "password": "x", "log_version": 0,
+             "plan_id": plan[0], "plan_start_date": today - timedelta(days=DAYS - 1)}
+            for u in range(USERS)])
+        user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+        db.session.execute(DailyScore.__table__.insert(), [
+            {"user_id": u, "score_date": today - timedelta(days=d), "total_points": 1 + u % 37}
+            for u in user_ids for d in range(DAYS)])
+        db.session.commit()
+    return user_ids
+
+
+def set_points(user_ids, points):
+    db.session.execute(DailyScore.__table__.update()
+                       .where(DailyScore.user_id.in_(user_ids)).values(total_points=points))
+    db.session.commit()
+
+
+def boards(leaderboards, plan_id):
+    return {(metric, p): leaderboards.page(metric, p, per_page=USERS)[0]
+            for metric in METRICS for p in (None, plan_id)}
+
+
+def test_rebuild_then_sync(app, plan, seeded, monkeypatch):
+    today = date.today()
+    with app.app_context():
+        rebuild_leaderboards(today)
+        # as if the first rebuild ran an hour ago
+        db.session.execute(LeaderboardEntry.__table__.update()
+                           .values(updated_at=datetime.utcnow() - timedelta(hours=1)))
+        db.session.commit()
+        leaderboards = Leaderboards(lambda key: SortedRanking(), sync_interval=3600)
+        leaderboards.sync(force=True)
+
+        recorded = []
+        record = leaderboards.record
+        monkeypatch.setattr(leaderboards, "record", lambda values: recorded.append(values) or record(values))
+        loads = []
+        load = leaderboards._load
+        monkeypatch.setattr(leaderboards, "_load", lambda entries: loads.append(len(entries)) or load(entries))
+
+        def rebuild_and_sync():
+            recorded.clear(), loads.clear()
+            rebuild_leaderboards(today)
+            leaderboards.sync(force=True)
+            fresh = Leaderboards(lambda key: SortedRanking())
+            assert boards(leaderboards, plan[0]) == boards(fresh, plan[0])
+
+        # nothing changed: no row is replayed
+        rebuild_and_sync()
+        assert recorded == [] and loads == []
+
+        # a few changes are applied one by one
+        set_points(seeded[:3], 100)
+        rebuild_and_sync()
+        assert sorted(values["user_id"] for values in recorded) == seeded[:3] and loads == []
+        assert leaderboards.rank("total_points", seeded[2]) == 3
+
+        # most rows changed: one bulk reload instead of USERS insorts
+        set_points(seeded[3:], 0)
+        rebuild_and_sync()
+        assert recorded == [] and loads == [USERS]
+        assert leaderboards.rank("current_streak", seeded[-1]) == USERS
@@ -0,0 +1,103 @@
+# tests/test_levels.py
+"""The Level column type (names in Python, codes in the database) and the migration of name-typed columns."""
+from datetime import date
+
+import pytest
+from sqlalchemy import MetaData, String, inspect, select, text
+from sqlalchemy.exc import StatementError
+from sqlalchemy.schema import CreateTable
+from levels import CODES, LEVELS, Level
+from models import db, ArchivedLog, DailyLog, User, UserActivity
+from utils.migrate import LEVEL_COLUMNS, convert_level_columns, upgrade_database
+
+
+def test_level_binds_codes_and_reads_names():
+    level, dialect = Level(), None
+    assert [level.process_bind_param(name, dialect) for name in LEVELS] == [0, 1, 2, 3]
+    assert [level.process_result_value(code, dialect) for code in range(len(LEVELS))] == list(LEVELS)
+    assert level.process_bind_param(None, dialect) is None and level.process_result_value(None, dialect) is None
+    assert level.process_bind_param(CODES["L2"], dialect) == 2   # codes pass through
+
+
+@pytest.mark.parametrize("name", ["L4", "l1", "", "done"])
+def test_unknown_level_names_raise(name):
+    with pytest.raises(ValueError, match="unknown level"):
+        Level().process_bind_param(name, None)
+
+
+def test_level_round_trip_through_the_database(app, plan):
+    with app.app_context():
+        db.session.execute(User.__table__.insert(),
+                           {"username": "u", "email": "u@example.com", "password": "x", "log_version": 0})
+        uid = db.session.scalar(select(User.id))
+        db.session.add_all(UserActivity(user_id=uid, activity_id=activity, level=name)
+                           for activity, name in zip(plan[1], LEVELS[1:]))
+        db.session.commit()
+        db.session.expire_all()
+
+        assert [row.level for row in db.session.scalars(select(UserActivity).order_by(UserActivity.id))] == \
+            ["L1", "L2", "L3"]
+        assert db.session.scalars(text("SELECT level FROM user_activity ORDER BY id")).all() == [1, 2, 3]
+        assert db.session.scalar(select(UserActivity.activity_id).where(UserActivity.level == "L2")) == plan[1][1]
+
+        with pytest.raises(StatementError, match="unknown level"):
+            db.session.execute(select(UserActivity).where(UserActivity.level == "L4"))
+
+
+def make_name_typed(conn):
+    """Recreate the level tables as older versions had them: names in VARCHAR columns, no indexes."""
+    metadata = MetaData()
+    for table in db.metadata.sorted_tables:   # foreign keys resolve within the copy
+        table.to_metadata(metadata)
+    for model, name in LEVEL_COLUMNS:
+        old = metadata.tables[model.__tablename__]
+        old.c[name].type = String(20)
+        old.indexes.clear()
+        conn.execute(text(f'DROP TABLE "{old.name}"'))
+        conn.execute(CreateTable(old))
+
+
+def test_upgrade_converts_name_typed_level_columns(app, plan):
+    a, b, c = plan[1][:3]
+    with app.app_context():
+        with db.engine.begin() as conn:
+            make_name_typed(conn)
+            conn.execute(text('INSERT INTO "user" (id, username, email, password, log_version) '
+                              "VALUES (1, 'u', 'u@example.com', 'x', 0)"))
+            conn.execute(text(
+                "INSERT INTO daily_log (user_id, activity_id, log_date, status) VALUES "
+                f"(1, {a}, '2024-03-18', 'L3'), (1, {b}, '2024-03-18', 'L4'), (1, {c}, '2024-03-18', NULL), "
+                f"(1, {a}, '2024-03-19', 'not_done')"))
+            conn.execute(text("INSERT INTO daily_log_archive (user_id, activity_id, log_date, status) "
+                              f"VALUES (1, {a}, '2023-01-02', 'L1')"))
+            conn.execute(text("INSERT INTO user_activity (user_id, activity_id, level) "
+                              f"VALUES (1, {a}, 'L2'), (1, {b}, 'bogus')"))
+
+        result = upgrade_database()
+        assert result["levels"] == {"daily_log": 1, "daily_log_archive": 0, "user_activity": 1}
+
+        # codes in the database; unknown names became not_done, NULL stayed NULL
+        stored = db.session.execute(text("SELECT activity_id, log_date, status FROM daily_log")).all()
+        assert sorted(stored, key=lambda row: (row[1], row[0])) == [
+            (a, "2024-03-18", 3), (b, "2024-03-18", 0), (c, "2024-03-18", None), (a, "2024-03-19", 0)]
+        assert db.session.scalar(text("SELECT status FROM daily_log_archive")) == 1
+        assert dict(db.session.execute(select(UserActivity.activity_id, UserActivity.level)).all()) == \
+            {a: "L2", b: "not_done"}
+        assert db.session.scalar(select(ArchivedLog.status)) == "L1"
+
+        inspector = inspect(db.engine)
+        for model, name in LEVEL_COLUMNS:
+            table = model.__table__
+            assert not isinstance(next(column["type"] for column in inspector.get_columns(table.name)
+                                       if column["name"] == name), String)
+            assert {index.name for index in table.indexes} <= \
+                {index["name"] for index in inspector.get_indexes(table.name)}
+        assert "daily_log__old" not in inspector.get_table_names()
+
+        # the rollups were rebuilt from the codes: 15 points on the 18th (L3 + not_done + NULL)
+        assert db.session.scalar(text("SELECT total_points FROM daily_score WHERE score_date = '2024-03-18'")) == 15
+
+        with db.engine.begin() as conn:
+            assert convert_level_columns(conn) == {}   # already converted: nothing to do
+        assert db.session.scalar(select(DailyLog.status).where(DailyLog.activity_id == a,
+                                                               DailyLog.log_date == date(2024, 3, 18))) == "L3"
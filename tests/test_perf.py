@@ -0,0 +1,48 @@
+# tests/test_perf.py
+import pytest
+from conftest import choose_plan, log_days, sign_in
+
+
+@pytest.fixture
+def app_config():
+    return {"PERF_INSTRUMENTATION": True, "ADMIN_EMAILS": {"admin@example.com"}}
+
+
+@pytest.fixture
+def admin(app, plan):
+    client = app.test_client()
+    sign_in(client, email="admin@example.com", username="admin")
+    choose_plan(client, plan, days_ago=20)
+    log_days(client, plan[1], 21)
+    return client
+
+
+def test_dashboard_times_the_scoring_path(admin):
+    response = admin.get("/dashboard")   # uncached: builds the points matrix and summary
+    assert "scoring;dur=" in response.headers["Server-Timing"]
+    assert admin.get("/dashboard/trend").status_code == 200
+
+    endpoints = admin.get("/debug/perf").get_json()["endpoints"]
+    assert endpoints["main.dashboard"]["avg_scoring_ms"] > 0
+    assert endpoints["main.dashboard_trend"]["avg_scoring_ms"] > 0
+
+
+def test_reset_is_post_only(admin):
+    admin.get("/dashboard")
+    assert admin.get("/debug/perf?reset=1").get_json()["endpoints"]
+    assert admin.post("/debug/perf").get_json()["endpoints"] == {}
+
+
+def test_report_is_admin_only(app, client):
+    assert client.get("/debug/perf").status_code == 302   # to the login page
+    sign_in(client)
+    assert client.get("/debug/perf").status_code == 403
+    assert client.post("/debug/perf").status_code == 403
+
+
+@pytest.mark.parametrize("app_config", [{"ADMIN_EMAILS": {"admin@example.com"}}])
+def test_report_absent_without_instrumentation(app, plan):
+    client = app.test_client()
+    sign_in(client, email="admin@example.com", username="admin")
+    assert client.get("/debug/perf").status_code == 404
+    assert "Server-Timing" not in client.get("/about").headers
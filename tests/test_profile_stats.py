@@ -0,0 +1,32 @@
+# tests/test_profile_stats.py
+"""Profile figures are lifetime totals; the dashboard scores the current plan window only."""
+from datetime import date, timedelta
+
+from models import db, DailyLog
+from utils.stats import refresh_user_stats
+from conftest import choose_plan, log_days, sign_in, user_id
+
+PLAN_DAYS = 5
+EARLIER_DAYS = 15   # logged right before the current plan started
+
+
+def test_profile_and_dashboard_scopes_differ(app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=PLAN_DAYS - 1)
+    uid = user_id(app)
+    with app.app_context():
+        db.session.execute(DailyLog.__table__.insert(), [
+            {"user_id": uid, "activity_id": plan[1][0], "status": "L1",
+             "log_date": date.today() - timedelta(days=PLAN_DAYS + k)}
+            for k in range(EARLIER_DAYS)])
+        refresh_user_stats(uid)
+        db.session.commit()
+    log_days(client, plan[1], PLAN_DAYS)
+
+    dashboard = client.get("/dashboard").get_data(as_text=True)
+    assert f"Current Streak: {PLAN_DAYS} days" in dashboard
+
+    profile = client.get("/profile").get_data(as_text=True)
+    assert f"Lifetime streak: {PLAN_DAYS + EARLIER_DAYS} days" in profile
+    assert f"{PLAN_DAYS + EARLIER_DAYS} days logged" in profile
+    assert "your dashboard streak counts the current plan only" in profile
@@ -0,0 +1,46 @@
+# tests/test_route_queries.py
+"""
+Plan pages run no SQL once the session user is cached: plans and activities
+come from the in-memory catalog, the user's plan graph from the identity cache.
+"""
+import pytest
+from conftest import choose_plan, count_queries, sign_in, user_id
+
+
+@pytest.fixture
+def app_config():
+    # inline jobs poll the queue after every request; count the route's own statements
+    return {"JOBS_MODE": "worker"}
+
+
+@pytest.fixture
+def signed_in(app, client, plan):
+    sign_in(client)
+    choose_plan(client, plan)
+    client.get("/about")   # loads the session user into the identity cache
+    return client
+
+
+def route_queries(app, client, url):
+    with count_queries(app) as n:
+        response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    return n[0]
+
+
+@pytest.mark.parametrize("url", ["/about", "/plans", "/my_plan", "/view_plan/{plan_id}", "/select_plan/{plan_id}"])
+def test_plan_pages_run_no_queries(app, signed_in, plan, url):
+    assert route_queries(app, signed_in, url.format(plan_id=plan[0])) == 0
+
+
+def test_about_anonymous_runs_no_queries(app, client):
+    assert route_queries(app, client, "/about") == 0
+
+
+@pytest.mark.parametrize("strategy, queries", [("selectin", 2), ("joined", 1)])
+@pytest.mark.parametrize("url", ["/my_plan", "/plans"])
+def test_uncached_identity_loads_graph_in_fixed_queries(app, signed_in, url, strategy, queries):
+    """Without the identity cache, the user, plan and activities load in one or two statements."""
+    app.config["RELATIONSHIP_LOADING"] = strategy
+    app.extensions["identity_cache"].invalidate(user_id(app))
+    assert route_queries(app, signed_in, url) == queries
@@ -0,0 +1,66 @@
+# tests/test_security.py
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+from werkzeug.security import generate_password_hash
+from models import db, User
+from utils.migrate import widen_ddl
+from utils.security import HasherBusy, PasswordHasher
+from conftest import PASSWORD, sign_in, user_id
+
+METHOD = "pbkdf2:sha256:1000"
+
+
+def test_needs_rehash_does_not_use_the_pool():
+    hasher = PasswordHasher(method=METHOD, workers=1, max_pending=0)
+    current = generate_password_hash("pw", method=METHOD)
+    assert hasher._slots.acquire(blocking=False)   # every slot taken: the pool is saturated
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.verify(current, "pw")
+        assert hasher.needs_rehash(current) is False
+        assert hasher.needs_rehash(generate_password_hash("pw", method="pbkdf2:sha256:2000")) is True
+    finally:
+        hasher._slots.release()
+        hasher.shutdown()
+
+
+def test_default_parameters_expand_into_the_prefix():
+    hasher = PasswordHasher(method="pbkdf2", workers=1)
+    try:
+        assert hasher.needs_rehash(hasher.hash("pw")) is False
+        assert hasher.needs_rehash(generate_password_hash("pw", method=METHOD)) is True
+    finally:
+        hasher.shutdown()
+
+
+def test_busy_pool_does_not_fail_a_verified_login(app, client, monkeypatch):
+    sign_in(client)
+    client.get("/logout")
+    outdated = generate_password_hash(PASSWORD, method="pbkdf2:sha256:2000")
+    with app.app_context():
+        db.session.get(User, user_id(app)).password = outdated
+        db.session.commit()
+    hasher = app.extensions["password_hasher"]
+
+    def busy(password):
+        raise HasherBusy()
+
+    monkeypatch.setattr(hasher, "hash", busy)
+    response = client.post("/", data={"login-submit": "1", "email": "user@example.com", "password": PASSWORD})
+    assert response.status_code == 302 and "/dashboard" in response.location
+    with app.app_context():
+        assert db.session.get(User, user_id(app)).password == outdated   # upgrade skipped this time
+
+    monkeypatch.undo()
+    client.get("/logout")
+    client.post("/", data={"login-submit": "1", "email": "user@example.com", "password": PASSWORD})
+    with app.app_context():
+        assert not hasher.needs_rehash(db.session.get(User, user_id(app)).password)
+
+
+@pytest.mark.parametrize("dialect, ddl", [
+    (postgresql.dialect(), 'ALTER TABLE "user" ALTER COLUMN password TYPE VARCHAR(255)'),
+    (mysql.dialect(), "ALTER TABLE user MODIFY password VARCHAR(255) NOT NULL"),
+])
+def test_upgrade_widens_the_password_column(dialect, ddl):
+    assert widen_ddl(dialect, User.__table__, User.__table__.c.password) == ddl
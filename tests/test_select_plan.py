@@ -0,0 +1,41 @@
+# tests/test_select_plan.py
+"""Malformed plan selections are rejected with a flash message, not a 500."""
+import pytest
+from models import db, User
+from conftest import choose_plan, sign_in, user_id
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop("_flashes", [])]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("activities", ["abc"]),
+    ("activities", ["1.5"]),
+    ("plan_start_date", "yesterday"),
+])
+def test_invalid_selection(app, client, plan, field, value):
+    sign_in(client)
+    flashes(client)
+    plan_id, activity_ids = plan
+    data = {"activities": [str(a) for a in activity_ids], **{f"level_{a}": "L2" for a in activity_ids}}
+    data[field] = value
+
+    response = client.post(f"/select_plan/{plan_id}", data=data)
+    assert response.status_code == 302 and response.location.endswith(f"/select_plan/{plan_id}")
+    assert flashes(client) == ["Invalid selection."]
+    with app.app_context():
+        assert db.session.get(User, user_id(app)).plan_id is None
+
+
+def test_duplicate_activity_is_rejected(app, client, plan):
+    sign_in(client)
+    flashes(client)
+    plan_id, activity_ids = plan
+    data = {"activities": [str(a) for a in activity_ids] + [f"0{activity_ids[0]}"],
+            **{f"level_{a}": "L2" for a in activity_ids}}
+    assert client.post(f"/select_plan/{plan_id}", data=data).status_code == 302
+    assert flashes(client) == ["Select activities from this plan only."]
+
+    choose_plan(client, plan)   # the well-formed selection still goes through
@@ -0,0 +1,32 @@
+# tests/test_trend.py
+import pytest
+from conftest import choose_plan, log_days, sign_in
+
+DAYS = 60
+
+
+@pytest.fixture
+def signed_in(client, plan):
+    sign_in(client)
+    choose_plan(client, plan, days_ago=DAYS - 1)
+    log_days(client, plan[1][:2], DAYS)
+    return client
+
+
+@pytest.mark.parametrize("url", ["/dashboard/trend", "/api/v1/trend"])
+@pytest.mark.parametrize("max_points, expected", [
+    ("10", 10),
+    ("0", 3),            # clamped up: 0 or less used to turn downsampling off
+    ("-5", 3),
+    ("abc", DAYS),       # not a number → TREND_MAX_POINTS (366), more than the series
+    ("999999", DAYS),    # clamped to TREND_MAX_POINTS_LIMIT
+])
+def test_max_points_is_clamped(signed_in, url, max_points, expected):
+    response = signed_in.get(f"{url}?max_points={max_points}")
+    assert response.status_code == 200
+    assert len(response.get_json()["values"]) == expected
+
+
+def test_max_points_limit(app, signed_in):
+    app.config["TREND_MAX_POINTS_LIMIT"] = 20
+    assert len(signed_in.get("/dashboard/trend?max_points=50").get_json()["values"]) == 20
@@ -0,0 +1,218 @@
+# utils/aggregates.py
+from datetime import timedelta
+import numpy as np
+from sqlalchemy import case, delete, func, select, tuple_
+from models import (
+    db, User, DailyScore, PlanDailyStat, ActivityDailyStat, CohortDailyStat, PlanCohort
+)
+from utils.archive import tiered
+from utils.scoring import points_case
+
+DATE_CHUNK = 100                           # dates per grouped query / delete
+RETENTION_DAYS = (1, 7, 14, 30, 60, 90)    # days after the plan start (day_index) in the cohort table
+
+
+# 1. Aggregation Queries
+def _plan_and_cohort_rows(dates=None):
+    """
+    (PlanDailyStat rows, CohortDailyStat rows) from the DailyScore rollup,
+    for the given dates or all of them. One grouped join: plan rows are
+    the sums of the cohort groups.
+    """
+    logs = DailyScore.not_done_count + DailyScore.l1_count + DailyScore.l2_count + DailyScore.l3_count
+    query = (
+        select(User.plan_id, User.plan_start_date, DailyScore.score_date,
+               func.count(), func.sum(logs), func.sum(DailyScore.total_points))
+        .join(User, User.id == DailyScore.user_id)
+        .where(User.plan_id.isnot(None))
+        .group_by(User.plan_id, User.plan_start_date, DailyScore.score_date)
+    )
+    if dates is not None:
+        query = query.where(DailyScore.score_date.in_(dates))
+
+    plans, cohorts = {}, []
+    for plan_id, cohort, day, users, logs, points in db.session.execute(query):
+        row = plans.setdefault((plan_id, day), {"plan_id": plan_id, "stat_date": day,
+                                                "active_users": 0, "logs": 0, "points": 0})
+        row["active_users"] += users
+        row["logs"] += logs
+        row["points"] += points
+        # logs from before the user's plan start count for the plan, not the cohort
+        if cohort is not None and day >= cohort:
+            cohorts.append({"plan_id": plan_id, "cohort_date": cohort, "day_index": (day - cohort).days,
+                            "stat_date": day, "active_users": users, "points": points})
+    return list(plans.values()), cohorts
+
+
+def _activity_rows(dates=None):
+    """ActivityDailyStat rows from the logs, hot and archived (every log, selected activity or not)."""
+    def build(logs):
+        query = (
+            select(logs.c.activity_id, logs.c.log_date, func.count(),
+                   func.sum(case((logs.c.status != "not_done", 1), else_=0)), func.sum(points_case(logs.c.status)))
+            .group_by(logs.c.log_date, logs.c.activity_id)
+        )
+        if dates is not None:
+            query = query.where(logs.c.log_date.in_(dates))
+        return query
+
+    # both tiers can hold logs of the same activity and date (different users)
+    rows = {}
+    for activity_id, day, logs, done, points in db.session.execute(tiered(build)):
+        row = rows.setdefault((activity_id, day), {"activity_id": activity_id, "stat_date": day,
+                                                   "logs": 0, "done": 0, "points": 0})
+        row["logs"] += logs
+        row["done"] += done
+        row["points"] += points
+    return list(rows.values())
+
+
+def _cohort_sizes(cohorts=None):
+    """PlanCohort rows from User (only the given (plan_id, cohort_date) pairs when set)."""
+    query = (
+        select(User.plan_id, User.plan_start_date, func.count())
+        .where(User.plan_id.isnot(None), User.plan_start_date.isnot(None))
+        .group_by(User.plan_id, User.plan_start_date)
+    )
+    if cohorts is not None:
+        query = query.where(tuple_(User.plan_id, User.plan_start_date).in_(cohorts))
+    return [{"plan_id": plan_id, "cohort_date": cohort, "users": users}
+            for plan_id, cohort, users in db.session.execute(query)]
+
+
+def _insert(model, rows):
+    if rows:
+        db.session.execute(model.__table__.insert(), rows)
+
+
+# 2. Incremental Refresh
+def refresh_aggregates(dates=(), cohorts=()):
+    """
+    Recompute the rollup rows of the given dates and the sizes of the given
+    (plan_id, cohort_date) cohorts. Every query is an indexed read of those
+    dates only, so the cost follows the day's activity, not the table size.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    dates = sorted(set(dates))
+    for start in range(0, len(dates), DATE_CHUNK):
+        chunk = dates[start:start + DATE_CHUNK]
+        plan_rows, cohort_rows = _plan_and_cohort_rows(chunk)
+        for model, rows in ((PlanDailyStat, plan_rows), (CohortDailyStat, cohort_rows),
+                            (ActivityDailyStat, _activity_rows(chunk))):
+            db.session.execute(delete(model).where(model.stat_date.in_(chunk)))
+            _insert(model, rows)
+
+    cohorts = sorted(set(cohorts))
+    if cohorts:
+        db.session.execute(delete(PlanCohort).where(tuple_(PlanCohort.plan_id, PlanCohort.cohort_date).in_(cohorts)))
+        _insert(PlanCohort, _cohort_sizes(cohorts))
+
+
+def dates_between(first, last):
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def user_log_dates(user_id):
+    """Every date the user logged (their contribution moves when their plan or start date does)."""
+    query = tiered(lambda logs: select(logs.c.log_date).where(logs.c.user_id == user_id).distinct())
+    return sorted(set(db.session.scalars(query)))
+
+
+# 3. Full Rebuild
+def rebuild_aggregates():
+    """Recompute every rollup table from DailyScore, the logs and User; returns row counts."""
+    counts = {}
+    plan_rows, cohort_rows = _plan_and_cohort_rows()
+    for model, rows in ((PlanDailyStat, plan_rows), (CohortDailyStat, cohort_rows),
+                        (ActivityDailyStat, _activity_rows()), (PlanCohort, _cohort_sizes())):
+        db.session.execute(delete(model))
+        _insert(model, rows)
+        counts[model.__tablename__] = len(rows)
+    db.session.commit()
+    return counts
+
+
+# 4. Report (rollup tables only)
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def plan_report(plan, today, days=30, cohort_weeks=12):
+    """
+    Operations report for one catalog plan (PlanInfo): daily active loggers
+    over the last `days` days, completion rate by day of plan, points per
+    activity and weekly-cohort retention.
+    """
+    start = today - timedelta(days=days - 1)
+    duration = plan.duration_days or 30
+
+    # --- Daily active loggers ---
+    daily = {row.stat_date: row for row in db.session.execute(
+        select(PlanDailyStat.stat_date, PlanDailyStat.active_users, PlanDailyStat.logs, PlanDailyStat.points)
+        .where(PlanDailyStat.plan_id == plan.id, PlanDailyStat.stat_date.between(start, today)))}
+    daily_active = []
+    for day in dates_between(start, today):
+        row = daily.get(day)
+        daily_active.append({"date": day.isoformat(), "active_users": row.active_users if row else 0,
+                             "logs": row.logs if row else 0, "points": row.points if row else 0})
+
+    # --- Activities ---
+    totals = {row.activity_id: row for row in db.session.execute(
+        select(ActivityDailyStat.activity_id, func.sum(ActivityDailyStat.logs).label("logs"),
+               func.sum(ActivityDailyStat.done).label("done"), func.sum(ActivityDailyStat.points).label("points"))
+        .where(ActivityDailyStat.activity_id.in_(plan.activity_ids),
+               ActivityDailyStat.stat_date.between(start, today))
+        .group_by(ActivityDailyStat.activity_id))}
+    activities = []
+    for activity in plan.activities:
+        row = totals.get(activity.id)
+        logs = row.logs if row else 0
+        activities.append({"id": activity.id, "name": activity.name, "logs": logs,
+                           "done_rate": _rate(row.done, logs) if row else None,
+                           "avg_points": _rate(row.points, logs) if row else None})
+
+    # --- Cohorts: (cohorts x day of plan) matrix of active users ---
+    sizes = db.session.execute(
+        select(PlanCohort.cohort_date, PlanCohort.users)
+        .where(PlanCohort.plan_id == plan.id, PlanCohort.cohort_date <= today)
+        .order_by(PlanCohort.cohort_date)).all()
+    index = {cohort: i for i, (cohort, _) in enumerate(sizes)}
+    active = np.zeros((len(sizes), duration), dtype=np.int64)
+    for cohort, day_index, count in db.session.execute(
+            select(CohortDailyStat.cohort_date, CohortDailyStat.day_index, CohortDailyStat.active_users)
+            .where(CohortDailyStat.plan_id == plan.id, CohortDailyStat.day_index < duration)):
+        if cohort in index:
+            active[index[cohort], day_index] = count
+    users = np.array([n for _, n in sizes], dtype=np.int64)
+    # cohort c has reached day k once c + k <= today
+    age = np.array([(today - cohort).days for cohort, _ in sizes], dtype=np.int64)
+    reached = age[:, None] >= np.arange(duration)[None, :]
+
+    eligible, logged = (users[:, None] * reached).sum(axis=0), active.sum(axis=0)
+    completion = [{"day": k + 1, "eligible": int(eligible[k]), "logged": int(logged[k]),
+                   "rate": _rate(int(logged[k]), int(eligible[k]))} for k in range(duration)]
+
+    # --- Retention by weekly cohort (week starting Monday) ---
+    first_week = today - timedelta(days=today.weekday() + 7 * (cohort_weeks - 1))
+    retention_days = [d for d in RETENTION_DAYS if d < duration]
+    weeks = {}
+    for i, (cohort, _) in enumerate(sizes):
+        if cohort >= first_week:
+            weeks.setdefault(cohort - timedelta(days=cohort.weekday()), []).append(i)
+    retention = [
+        {"week": week.isoformat(), "users": int(users[rows].sum()),
+         "retention": {str(d): _rate(int(active[rows, d].sum()), int((users[rows] * reached[rows, d]).sum()))
+                       for d in retention_days}}
+        for week, rows in sorted(weeks.items())
+    ]
+
+    return {
+        "plan": {"id": plan.id, "name": plan.name, "duration_days": duration},
+        "window": {"start": start.isoformat(), "end": today.isoformat()},
+        "users": int(users.sum()),
+        "daily_active": daily_active,
+        "completion_by_day": completion,
+        "activities": activities,
+        "retention_days": retention_days,
+        "cohorts": retention,
+    }
@@ -0,0 +1,113 @@
+# utils/aio.py
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import threading
+from sqlalchemy.engine import make_url
+from utils.database import install_sqlite_pragmas
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+# 1. Event Loop
+class EventLoopThread:
+    """
+    One event loop on a daemon thread, shared by every async view in the
+    process. Flask's default runs each async view in a fresh loop, so
+    nothing async (pooled DB connections included) can outlive a request;
+    here coroutines from all request threads interleave on the same loop.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.loop is not None:
+            return
+        with self._lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-views", daemon=True).start()
+                self.loop = loop
+
+    def run(self, coro):
+        """Run a coroutine on the loop and block the calling thread for its result."""
+        self.start()
+        # the task runs in the caller's context, so request/app globals work inside it
+        context = contextvars.copy_context()
+        result = concurrent.futures.Future()
+
+        def finish(task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        def submit():
+            self.loop.create_task(coro, context=context).add_done_callback(finish)
+
+        self.loop.call_soon_threadsafe(submit)
+        return result.result()
+
+    def async_to_sync(self, func):
+        """Drop-in for Flask.async_to_sync."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func(*args, **kwargs))
+        return wrapper
+
+
+# 2. Async Engine
+def async_database_url(url):
+    """The same database through its async driver (aiosqlite / asyncpg)."""
+    url = make_url(url)
+    name = url.get_backend_name()
+    if name not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {name} databases")
+    return url.set(drivername=ASYNC_DRIVERS[name])
+
+
+class AsyncDatabase:
+    """
+    An AsyncEngine over the app's database, plus the shared event loop its
+    pooled connections live on. init_app() routes the app's async views
+    through that loop. The engine is created on first use, so the async
+    drivers are only needed by processes that serve async views.
+    """
+
+    def __init__(self, app=None):
+        self.loop = EventLoopThread()
+        self._engine = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # the sync engine's URL: Flask-SQLAlchemy resolves relative SQLite paths into instance/
+        with app.app_context():
+            self.url = app.extensions["sqlalchemy"].engine.url
+        self.pragmas = app.config.get("SQLITE_PRAGMAS") if self.url.get_backend_name() == "sqlite" else None
+        app.async_to_sync = self.loop.async_to_sync
+        app.extensions["async_db"] = self
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    # optional dependencies: SQLAlchemy's asyncio extension and the async driver
+                    from sqlalchemy.ext.asyncio import create_async_engine
+                    engine = create_async_engine(async_database_url(self.url))
+                    if self.pragmas:
+                        install_sqlite_pragmas(engine.sync_engine, self.pragmas)
+                    self._engine = engine
+        return self._engine
+
+    def dispose(self):
+        if self._engine is not None:
+            self.loop.run(self._engine.dispose())
+            self._engine = None
@@ -0,0 +1,182 @@
+# utils/analytics.py
+from datetime import timedelta
+import numpy as np
+from sqlalchemy import select
+from levels import POINTS_MAPPING, POINTS_PER_LEVEL, level_code
+from models import db, UserActivity
+from utils.archive import tiered
+from utils.perf import timed
+
+
+# 1. Points Matrix
+class PointsMatrix:
+    """
+    A user's logs as a (days x activities) array of points. Row i is
+    start_date + i days, column j is activity_ids[j]; missing logs are 0.
+    """
+    __slots__ = ("start_date", "activity_ids", "points")
+
+    def __init__(self, start_date, activity_ids, points):
+        self.start_date = start_date
+        self.activity_ids = list(activity_ids)
+        self.points = points
+
+    @property
+    def n_days(self):
+        return self.points.shape[0]
+
+    @property
+    def days(self):
+        return [self.start_date + timedelta(days=i) for i in range(self.n_days)]
+
+    @classmethod
+    @timed("scoring")
+    def from_cells(cls, start_date, end_date, activity_ids, day_ordinals, cell_activity_ids, cell_points):
+        """Build from parallel per-log lists: date ordinals, activity ids and points."""
+        n_days = max(0, (end_date - start_date).days + 1) if start_date else 0
+        points = np.zeros((n_days, len(activity_ids)), dtype=np.int32)
+        if not n_days or not activity_ids or not day_ordinals:
+            return cls(start_date, activity_ids, points)
+
+        # activity id → column via a lookup table (-1 = not a selected activity)
+        aids = np.asarray(cell_activity_ids, dtype=np.int64)
+        lookup = np.full(max(max(activity_ids), int(aids.max())) + 1, -1, dtype=np.int64)
+        lookup[activity_ids] = np.arange(len(activity_ids))
+        cols = lookup[aids]
+        rows = np.asarray(day_ordinals, dtype=np.int64) - start_date.toordinal()
+
+        keep = (cols >= 0) & (rows >= 0) & (rows < n_days)
+        points[rows[keep], cols[keep]] = np.asarray(cell_points, dtype=np.int32)[keep]
+        return cls(start_date, activity_ids, points)
+
+    @classmethod
+    def from_rows(cls, rows, start_date, end_date, activity_ids):
+        """Build from (log_date, activity_id, level code) rows; points are code * POINTS_PER_LEVEL."""
+        return cls.from_cells(
+            start_date, end_date, activity_ids,
+            [r[0].toordinal() for r in rows],
+            [r[1] for r in rows],
+            np.asarray([r[2] or 0 for r in rows], dtype=np.int32) * POINTS_PER_LEVEL,
+        )
+
+    @classmethod
+    def from_summary(cls, days, summary, activity_ids):
+        """Build from the summary[date][activity_id] = status pivot used by the dashboard."""
+        if not days:
+            return cls.from_cells(None, None, activity_ids, [], [], [])
+        return cls.from_cells(
+            days[0], days[-1], activity_ids,
+            [d.toordinal() for d, logs in summary.items() for _ in logs],
+            [aid for logs in summary.values() for aid in logs],
+            [POINTS_MAPPING.get(status, 0) for logs in summary.values() for status in logs.values()],
+        )
+
+
+def points_query(user_id, start_date=None, end_date=None):
+    """(log_date, activity_id, level code) of the user's logs (hot and archived) on their selected activities."""
+    def build(logs):
+        query = (
+            select(logs.c.log_date, logs.c.activity_id, level_code(logs.c.status).label("level"))
+            .join(UserActivity, (UserActivity.user_id == logs.c.user_id) &
+                                (UserActivity.activity_id == logs.c.activity_id))
+            .where(logs.c.user_id == user_id)
+        )
+        if start_date:
+            query = query.where(logs.c.log_date >= start_date)
+        if end_date:
+            query = query.where(logs.c.log_date <= end_date)
+        return query
+    return tiered(build)
+
+
+def load_points_matrix(user, start_date=None, end_date=None):
+    """
+    One query for the user's logs on their selected activities, as a
+    PointsMatrix. With both dates given the matrix spans the full window.
+    """
+    rows = db.session.execute(points_query(user.id, start_date, end_date)).all()
+    return points_matrix(rows, [ua.activity_id for ua in user.user_activities], start_date, end_date)
+
+
+def points_matrix(rows, activity_ids, start_date=None, end_date=None):
+    """PointsMatrix from points_query rows (also used by the async API)."""
+    if not rows and not (start_date and end_date):
+        return PointsMatrix(start_date, activity_ids, np.zeros((0, len(activity_ids)), dtype=np.int32))
+    start = start_date or min(r.log_date for r in rows)
+    end = end_date or max(r.log_date for r in rows)
+    return PointsMatrix.from_rows(rows, start, end, activity_ids)
+
+
+# 2. Daily Totals & Streaks
+def daily_totals(matrix):
+    return matrix.points.sum(axis=1)
+
+
+def streaks(totals):
+    """
+    (longest, current) runs of consecutive scored days (total > 0). The
+    current run ends on the last day, or the day before if the last day
+    (usually today) has nothing logged yet.
+    """
+    active = np.asarray(totals) > 0
+    if not active.any():
+        return 0, 0
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    last = len(active)
+    current = int(lengths[-1]) if ends[-1] >= last - (0 if active[-1] else 1) else 0
+    return int(lengths.max()), current
+
+
+def rolling_mean(totals, window):
+    """Trailing mean over `window` days (shorter at the start of the series)."""
+    totals = np.asarray(totals, dtype=np.float64)
+    if not totals.size:
+        return totals
+    csum = np.concatenate(([0.0], np.cumsum(totals)))
+    idx = np.arange(1, totals.size + 1)
+    lo = np.maximum(0, idx - window)
+    return (csum[idx] - csum[lo]) / (idx - lo)
+
+
+# 3. Activity Rankings
+def activity_stats(matrix):
+    """Per-activity mean points and consistency (share of days with points)."""
+    if not matrix.n_days:
+        zeros = np.zeros(len(matrix.activity_ids))
+        return zeros, zeros
+    return matrix.points.mean(axis=0), (matrix.points > 0).mean(axis=0)
+
+
+def best_and_worst(matrix):
+    """Activity ids with the highest / lowest mean; ties go to the earliest column."""
+    if not matrix.activity_ids:
+        return None, None
+    means, _ = activity_stats(matrix)
+    return matrix.activity_ids[int(np.argmax(means))], matrix.activity_ids[int(np.argmin(means))]
+
+
+# 4. Summary
+@timed("scoring")
+def summarize(matrix):
+    """Every dashboard number derived from one matrix."""
+    totals = daily_totals(matrix)
+    longest, current = streaks(totals)
+    means, consistency = activity_stats(matrix)
+    best, worst = best_and_worst(matrix)
+    avg_7d, avg_30d = rolling_mean(totals, 7), rolling_mean(totals, 30)
+    return {
+        "totals": totals,
+        "overall_score": int(totals.sum()),
+        "best_score": int(totals.max()) if totals.size else 0,
+        "longest_streak": longest,
+        "current_streak": current,
+        "avg_7d": round(float(avg_7d[-1]), 1) if totals.size else 0.0,
+        "avg_30d": round(float(avg_30d[-1]), 1) if totals.size else 0.0,
+        "activity_means": dict(zip(matrix.activity_ids, means.round(2).tolist())),
+        "activity_consistency": dict(zip(matrix.activity_ids, consistency.round(3).tolist())),
+        "best_activity_id": best,
+        "worst_activity_id": worst,
+    }
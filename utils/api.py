@@ -0,0 +1,148 @@
+# utils/api.py
+import hashlib
+from datetime import date, datetime, time, timezone
+from sqlalchemy import select, update
+from levels import POINTS_MAPPING
+from models import User, DailyLog
+from utils.analytics import points_query, points_matrix
+from utils.archive import take_archived, tiered
+from utils.dashboard import dashboard_stats, trend_window, trend_from_matrix
+from utils.logs import upsert_statement
+
+# Everything here runs on the shared event loop (utils.aio) with an
+# AsyncConnection: no calls into the sync Flask-SQLAlchemy session.
+
+
+# 1. Validators (ETag / Last-Modified)
+async def fetch_log_version(conn, user_id):
+    """(log_version, logs_updated_at) of the user: everything a conditional GET needs."""
+    users = User.__table__
+    row = (await conn.execute(
+        select(users.c.log_version, users.c.logs_updated_at).where(users.c.id == user_id)
+    )).first()
+    return (row.log_version or 0, row.logs_updated_at) if row else (0, None)
+
+
+def api_etag(user_id, version, today, *params):
+    """Tag for a weak ETag: the payload only changes with the user's logs, the day and the query."""
+    query = hashlib.sha1(repr(params).encode()).hexdigest()[:12]
+    return f"{user_id}-{version}-{today.isoformat()}-{query}"
+
+
+def api_last_modified(updated_at, today):
+    """The last log write, but never before today's midnight (day-relative numbers change then)."""
+    midnight = datetime.combine(today, time.min)
+    return max(updated_at or midnight, midnight).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+# 2. Reads
+async def fetch_day(conn, user, day):
+    """The user's selected activities with their level and the status logged on `day`."""
+    statuses = dict((await conn.execute(tiered(lambda logs: (
+        select(logs.c.activity_id, logs.c.status)
+        .where(logs.c.user_id == user.id, logs.c.log_date == day)
+    )))).all())
+    return {
+        "date": day.isoformat(),
+        "plan": {"id": user.plan.id, "name": user.plan.name} if user.plan else None,
+        "activities": [
+            {"id": ua.activity_id, "name": ua.activity.name, "level": ua.level,
+             "status": statuses.get(ua.activity_id)}
+            for ua in user.user_activities
+        ],
+    }
+
+
+async def fetch_matrix(conn, user, start_date, end_date):
+    """PointsMatrix of the user's selected activities over [start_date, end_date]."""
+    rows = (await conn.execute(points_query(user.id, start_date, end_date))).all()
+    return points_matrix(rows, [ua.activity_id for ua in user.user_activities], start_date, end_date)
+
+
+async def fetch_summary(conn, user, today):
+    """The dashboard's progress and score numbers (without the per-day grid)."""
+    if user.plan_start_date and today >= user.plan_start_date:
+        matrix = await fetch_matrix(conn, user, user.plan_start_date, today)
+    else:
+        matrix = points_matrix([], [ua.activity_id for ua in user.user_activities])
+    return {"date": today.isoformat(), **dashboard_stats(user, today, matrix)}
+
+
+async def fetch_trend(conn, user, today, series="overall", start=None, end=None, bucket="day", max_points=None):
+    """Same payload as build_trend; raises ValueError for a bad window or series."""
+    window = trend_window(user, today, start, end)
+    if window is None:
+        return {"series": series, "bucket": bucket, "dates": [], "values": [],
+                "start": None, "end": None, "prev": None, "next": None}
+    matrix = await fetch_matrix(conn, user, *window)
+    return trend_from_matrix(matrix, user.plan_start_date, today, series, bucket, max_points)
+
+
+# 3. Batch Writes
+def parse_log_batch(items, activity_ids, max_batch):
+    """
+    Validate a list of {"date", "activity_id", "status", "notes"?} objects.
+    Returns (rows, errors); errors hold {"index", "error"} and the batch is
+    only saved when there are none.
+    """
+    if not isinstance(items, list) or not items:
+        return [], [{"index": None, "error": "logs must be a non-empty list"}]
+    if len(items) > max_batch:
+        return [], [{"index": None, "error": f"at most {max_batch} logs per request"}]
+
+    rows, errors, seen = [], [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "expected an object"})
+            continue
+        try:
+            log_date = date.fromisoformat(item.get("date") or "")
+        except (TypeError, ValueError):
+            errors.append({"index": index, "error": "date must be YYYY-MM-DD"})
+            continue
+        activity_id, status = item.get("activity_id"), item.get("status")
+        if not isinstance(activity_id, int) or activity_id not in activity_ids:
+            errors.append({"index": index, "error": "activity_id is not one of your activities"})
+        elif status not in POINTS_MAPPING:
+            errors.append({"index": index, "error": f"status must be one of {sorted(POINTS_MAPPING)}"})
+        elif not isinstance(item.get("notes", ""), (str, type(None))):
+            errors.append({"index": index, "error": "notes must be a string or null"})
+        elif (log_date, activity_id) in seen:
+            errors.append({"index": index, "error": "duplicate date and activity_id"})
+        else:
+            seen.add((log_date, activity_id))
+            row = {"activity_id": activity_id, "log_date": log_date, "status": status}
+            if "notes" in item:
+                row["notes"] = item["notes"]
+            rows.append(row)
+    return rows, errors
+
+
+async def save_log_batch(conn, user_id, rows):
+    """
+    Upsert the rows and bump the user's log_version in the caller's
+    transaction. Rows carrying "notes" overwrite notes; the others keep
+    them. Archived logs of the written dates move back to DailyLog first
+    (as in utils.logs.upsert_logs). Returns the new log_version.
+    """
+    dialect = conn.dialect.name
+    first, *rest = take_archived(conn.dialect, [user_id], {row["log_date"] for row in rows})
+    archived = (await conn.execute(first)).mappings().all()
+    if archived:
+        for statement in rest:
+            await conn.execute(statement)
+        await conn.execute(DailyLog.__table__.insert(), [dict(row) for row in archived])
+    with_notes = [dict(row, user_id=user_id) for row in rows if "notes" in row]
+    status_only = [dict(row, user_id=user_id) for row in rows if "notes" not in row]
+    for columns, group in ((("status",), status_only), (("status", "notes"), with_notes)):
+        if group:
+            # one executemany per group: every row in it has the same keys
+            await conn.execute(upsert_statement(dialect, columns), group)
+
+    users = User.__table__
+    bump = update(users).where(users.c.id == user_id) \
+        .values(log_version=users.c.log_version + 1, logs_updated_at=datetime.utcnow())
+    if conn.dialect.update_returning:
+        return (await conn.execute(bump.returning(users.c.log_version))).scalar_one()
+    await conn.execute(bump)
+    return (await conn.execute(select(users.c.log_version).where(users.c.id == user_id))).scalar_one()
@@ -0,0 +1,144 @@
+# utils/archive.py
+from sqlalchemy import delete, exists, func, select, text, union_all
+from sqlalchemy.exc import OperationalError
+from levels import NOT_DONE
+from models import db, User, DailyLog, ArchivedLog
+
+LOG_COLUMNS = ("user_id", "activity_id", "log_date", "status", "notes")
+LOG_TABLES = (DailyLog.__table__, ArchivedLog.__table__)   # hot, archive
+ARCHIVE_CHUNK = 1000   # users per archiving transaction
+RESTORE_CHUNK = 500    # users per restore statement
+
+
+# 1. Reads over Both Tiers
+def tiered(build):
+    """
+    UNION ALL of build(table) over the hot and archive tables; build gets a
+    table with DailyLog's columns and returns a SELECT. A user's date lives
+    in one tier only, so groups per (user, date) come out whole.
+    """
+    return union_all(*(build(table) for table in LOG_TABLES))
+
+
+def all_logs():
+    """DailyLog-shaped subquery over both tiers (filters on it reach each table's index)."""
+    return tiered(lambda table: select(*(table.c[name] for name in LOG_COLUMNS))).subquery("logs")
+
+
+def logged_activity(activity_id):
+    """EXISTS: some log, hot or archived, references the activity."""
+    return (exists().where(DailyLog.activity_id == activity_id)
+            | exists().where(ArchivedLog.activity_id == activity_id))
+
+
+# 2. Archiving (hot → archive)
+def archivable(before, previous_plans=True):
+    """
+    WHERE clause on DailyLog for rows older than `before`, and with
+    previous_plans also rows from before the user's current plan start
+    (earlier plan runs, which the dashboard window no longer shows).
+    """
+    hot = DailyLog.__table__
+    clause = hot.c.log_date < before
+    if previous_plans:
+        plan_start = select(User.plan_start_date).where(User.id == hot.c.user_id).scalar_subquery()
+        clause = clause | (hot.c.log_date < plan_start)
+    return clause
+
+
+def take_logs(dialect, table, clause):
+    """
+    Statements removing the logs that match clause from table and returning
+    them: DELETE ... RETURNING where the dialect has it, else SELECT ... FOR
+    UPDATE (locking the matched rows) and then DELETE, in the same transaction. The rows come from
+    the first statement; the rest run only if it found any (see take()).
+    Plain statements, so sync sessions and async connections both run them.
+    """
+    columns = [table.c[name] for name in LOG_COLUMNS]
+    if dialect.delete_returning:
+        return [delete(table).where(clause).returning(*columns)]
+    return [select(*columns).where(clause).with_for_update(), delete(table).where(clause)]
+
+
+def take(statements):
+    """Run take_logs() statements in the session; returns the removed rows."""
+    first, *rest = statements
+    rows = db.session.execute(first).mappings().all()
+    if rows:
+        for statement in rest:
+            db.session.execute(statement)
+    return rows
+
+
+def archive_logs(before, previous_plans=True, chunk_size=ARCHIVE_CHUNK):
+    """
+    Move archivable logs into the archive table, one transaction per range
+    of chunk_size user ids (each row is deleted and re-inserted within it,
+    so readers see it in exactly one tier). The DailyScore rollup, stats and
+    aggregates are left as they are: they do not change. Logs without a
+    status (older rows of the per-activity route) are archived as not_done,
+    which scores the same.
+    Returns {"logs": moved, "users": users with moved logs}.
+    """
+    hot, archive = LOG_TABLES
+    clause = archivable(before, previous_plans)
+    dialect = db.session.get_bind().dialect
+    last_user = db.session.scalar(select(func.max(hot.c.user_id))) or 0
+    moved, users = 0, set()
+    for first in range(1, last_user + 1, chunk_size):
+        rows = take(take_logs(dialect, hot, hot.c.user_id.between(first, first + chunk_size - 1) & clause))
+        if rows:
+            db.session.execute(archive.insert(), [{**row, "status": row["status"] or NOT_DONE} for row in rows])
+            moved += len(rows)
+            users.update(row["user_id"] for row in rows)
+        db.session.commit()
+    return {"logs": moved, "users": len(users)}
+
+
+# 3. Restore on Write (archive → hot)
+def take_archived(dialect, user_ids, dates):
+    """take_logs() for the archived logs of those users on those dates."""
+    archive = ArchivedLog.__table__
+    return take_logs(dialect, archive, archive.c.user_id.in_(user_ids) & archive.c.log_date.in_(dates))
+
+
+def restore_logs(rows):
+    """
+    Move archived logs back to DailyLog before `rows` (dicts with user_id
+    and log_date) are upserted, so an old date is written in the hot tier
+    and keeps the notes of its other logs. Users x dates may restore a few
+    logs nobody writes; that only leaves them hot.
+    """
+    dialect = db.session.get_bind().dialect
+    dates_by_user = {}
+    for row in rows:
+        dates_by_user.setdefault(row["user_id"], set()).add(row["log_date"])
+    users = sorted(dates_by_user)
+    for start in range(0, len(users), RESTORE_CHUNK):
+        chunk = users[start:start + RESTORE_CHUNK]
+        dates = set().union(*(dates_by_user[u] for u in chunk))
+        archived = take(take_archived(dialect, chunk, dates))
+        if archived:
+            db.session.execute(DailyLog.__table__.insert(), [dict(row) for row in archived])
+
+
+# 4. Storage Report
+def storage_report():
+    """
+    {table: {"rows", "bytes"}} for both tiers, bytes including the table's
+    indexes (SQLite dbstat; None where it is unavailable).
+    """
+    report = {table.name: {"rows": db.session.scalar(select(func.count()).select_from(table)), "bytes": None}
+              for table in LOG_TABLES}
+    if db.session.get_bind().dialect.name != "sqlite":
+        return report
+    try:
+        sizes = db.session.execute(text(
+            "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.tbl_name IN (:hot, :archive) GROUP BY m.tbl_name"
+        ), {"hot": LOG_TABLES[0].name, "archive": LOG_TABLES[1].name}).all()
+    except OperationalError:   # built without SQLITE_ENABLE_DBSTAT_VTAB
+        return report
+    for table, size in sizes:
+        report[table]["bytes"] = size
+    return report
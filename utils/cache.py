@@ -0,0 +1,163 @@
+# utils/cache.py
+import asyncio
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+# 1. In-process backend
+class LRUCache:
+    """Thread-safe LRU with a max size and per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# 2. Shared backend (multi-worker)
+class RedisCache:
+    """Pickled values in Redis, or in any client exposing get/set(ex=)/delete."""
+
+    def __init__(self, client, prefix="wellness:", ttl=300):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed for this backend
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class LocalRedis:
+    """In-memory stand-in for a Redis client, for tests and single-host runs."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+
+    def delete(self, name):
+        with self._lock:
+            self._data.pop(name, None)
+
+
+# 3. Counting front-end
+class ViewCache:
+    """Wraps a backend with get-or-build semantics and hit/miss counters (exact across threads)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()   # guards the counters only, never held around a build
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_build(self, key, build):
+        value = self.backend.get(key)
+        self._count(value is not None)
+        if value is not None:
+            return value
+        value = build()
+        self.backend.set(key, value)
+        return value
+
+    async def get_or_build_async(self, key, build):
+        """get_or_build for async views: build() is awaited, backend calls run off the event loop."""
+        value = await asyncio.to_thread(self.backend.get, key)
+        self._count(value is not None)
+        if value is not None:
+            return value
+        value = await build()
+        await asyncio.to_thread(self.backend.set, key, value)
+        return value
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+
+def make_cache(url="memory://", maxsize=1024, ttl=300, prefix="wellness:"):
+    """
+    Build a ViewCache from a URL: "memory://" (per-process LRU),
+    "local://" (LocalRedis stand-in) or "redis://host:port/db".
+    """
+    if url.startswith("memory://"):
+        backend = LRUCache(maxsize=maxsize, ttl=ttl)
+    elif url.startswith("local://"):
+        backend = RedisCache(LocalRedis(), prefix=prefix, ttl=ttl)
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        backend = RedisCache.from_url(url, prefix=prefix, ttl=ttl)
+    else:
+        raise ValueError(f"Unsupported cache URL: {url}")
+    return ViewCache(backend)
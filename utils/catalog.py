@@ -0,0 +1,243 @@
+# utils/catalog.py
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from sqlalchemy import exists, null, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import db, Plan, Activity, UserActivity, CatalogVersion
+from utils.archive import logged_activity
+from utils.migrate import add_missing_columns
+
+CATALOG_NAME = "plans"
+PLAN_FIELDS = ("name", "min_activities", "max_activities", "min_points", "max_points", "duration_days")
+ACTIVITY_FIELDS = ("level1", "level2", "level3", "recommended")
+
+
+# 1. Definitions
+def plan_files(folder):
+    """Sorted (slug, path) of the plan modules in folder ("plan_a" for plan_a.py)."""
+    return [(filename[:-3], os.path.join(folder, filename))
+            for filename in sorted(os.listdir(folder))
+            if filename.endswith(".py") and not filename.startswith("_")]
+
+
+def catalog_digest(files):
+    """sha256 over the names and contents of the plan modules."""
+    digest = hashlib.sha256()
+    for slug, path in files:
+        digest.update(slug.encode() + b"\0")
+        with open(path, "rb") as fh:
+            digest.update(fh.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def read_definition(slug, path):
+    """Execute one plan module and return its plan fields and activity list."""
+    spec = importlib.util.spec_from_file_location(f"plans.{slug}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    plan = {
+        "name": module.plan_name,
+        "min_activities": getattr(module, "min_activities", 1),
+        "max_activities": getattr(module, "max_activities", None),
+        "min_points": getattr(module, "min_points", 0),
+        "max_points": getattr(module, "max_points", None),
+        "duration_days": getattr(module, "duration_days", 30),
+    }
+    activities = [{"name": act["name"], "level1": act["level1"], "level2": act["level2"],
+                   "level3": act["level3"], "recommended": act.get("recommended")}
+                  for act in module.activities]
+    return plan, activities
+
+
+# 2. Loader
+def _assign(row, values, fields):
+    """Copy changed fields onto row; True if anything changed."""
+    changed = False
+    for field in fields:
+        if getattr(row, field) != values[field]:
+            setattr(row, field, values[field])
+            changed = True
+    return changed
+
+
+def _sync_plan(slug, definition, activities, counts):
+    plan = db.session.scalars(select(Plan).where(Plan.slug == slug)).first()
+    if plan is None:
+        # rows seeded before plans had a slug are matched by name
+        plan = db.session.scalars(
+            select(Plan).where(Plan.slug.is_(None), Plan.name == definition["name"]).order_by(Plan.id)
+        ).first()
+    if plan is None:
+        # explicit NULLs, or the column defaults (max_points=90, ...) would fill in for None
+        plan = Plan(slug=slug, **{field: null() if value is None else value for field, value in definition.items()})
+        db.session.add(plan)
+        counts["plans_added"] += 1
+    else:
+        plan.slug = slug
+        if _assign(plan, definition, PLAN_FIELDS):
+            counts["plans_updated"] += 1
+    db.session.flush()
+
+    existing = {a.name: a for a in db.session.scalars(select(Activity).where(Activity.plan_id == plan.id))}
+    for act in activities:
+        row = existing.pop(act["name"], None)
+        if row is None:
+            db.session.add(Activity(plan_id=plan.id, **act))
+            counts["activities_added"] += 1
+        elif _assign(row, act, ACTIVITY_FIELDS):
+            counts["activities_updated"] += 1
+
+    # dropped from the definition: delete unless users selected or logged it
+    for row in existing.values():
+        referenced = db.session.scalar(select(
+            exists().where(UserActivity.activity_id == row.id) | logged_activity(row.id)
+        ))
+        if not referenced:
+            db.session.delete(row)
+            counts["activities_removed"] += 1
+
+
+def load_plan_catalog(folder, force=False):
+    """
+    Bring the Plan/Activity tables in line with plans/*.py. The files are
+    hashed first; if the digest matches the one stored at the last load
+    nothing is executed or written (one SELECT). Otherwise every plan and
+    activity is upserted, by module slug and activity name, in a single
+    transaction together with the new digest. Plans removed from the folder
+    are left alone, since users may still be on them.
+
+    Returns None when skipped, else the counts of rows added/updated/removed.
+    """
+    files = plan_files(folder)
+    digest = catalog_digest(files)
+    # Core, not ORM: at startup this is the first query, and it should not pay for mapper configuration
+    versions = CatalogVersion.__table__
+    stored_digest = db.session.scalar(select(versions.c.digest).where(versions.c.name == CATALOG_NAME))
+    db.session.rollback()
+    if stored_digest == digest and not force:
+        return None
+
+    # a database created before Plan.slug existed: add the column and its index first
+    with db.engine.begin() as conn:
+        add_missing_columns(conn)
+        for index in Plan.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+    counts = dict.fromkeys(("plans_added", "plans_updated", "activities_added",
+                            "activities_updated", "activities_removed"), 0)
+    try:
+        for slug, path in files:
+            _sync_plan(slug, *read_definition(slug, path), counts)
+        stored = db.session.get(CatalogVersion, CATALOG_NAME, populate_existing=True)
+        if stored is None:
+            db.session.add(CatalogVersion(name=CATALOG_NAME, digest=digest, version=1,
+                                          loaded_at=datetime.utcnow()))
+        else:
+            stored.digest = digest
+            stored.version += 1
+            stored.loaded_at = datetime.utcnow()
+        db.session.commit()
+    except (IntegrityError, OperationalError):
+        # another process loading the same catalog got there first
+        db.session.rollback()
+        stored = db.session.get(CatalogVersion, CATALOG_NAME)
+        if stored is None or stored.digest != digest:
+            raise
+        return None
+    return counts
+
+
+# 3. In-memory Catalog
+@dataclass(frozen=True, slots=True)
+class ActivityInfo:
+    id: int
+    plan_id: int
+    name: str
+    level1: str
+    level2: str
+    level3: str
+    recommended: str
+
+
+@dataclass(frozen=True, slots=True)
+class PlanInfo:
+    id: int
+    slug: str
+    name: str
+    min_activities: int
+    max_activities: int
+    min_points: int
+    max_points: int
+    duration_days: int
+    activities: tuple            # ActivityInfo, in id order
+    activity_ids: frozenset
+
+
+class PlanCatalog:
+    """
+    Read-only copy of the Plan/Activity tables shared by every request in
+    the process. Plans only change through load_plan_catalog, which bumps
+    CatalogVersion.version, so the copy is rebuilt when that number moves;
+    it is checked at most every check_interval seconds, and requests in
+    between run no SQL at all. A rebuild swaps in a new snapshot whole, so
+    readers never see a half-loaded catalog.
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self._snapshot = None       # (version, plans tuple, {plan_id: PlanInfo})
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Reload if the stored catalog version changed (at most every check_interval seconds)."""
+        if not force and self._snapshot is not None and \
+                time.monotonic() - self._checked < self.check_interval:
+            return
+        with self._lock:
+            versions = CatalogVersion.__table__
+            version = db.session.scalar(select(versions.c.version).where(versions.c.name == CATALOG_NAME))
+            if force or self._snapshot is None or self._snapshot[0] != version:
+                plans = self._load()
+                self._snapshot = (version, plans, MappingProxyType({plan.id: plan for plan in plans}))
+            self._checked = time.monotonic()
+
+    def _load(self):
+        plan_table, activity_table = Plan.__table__, Activity.__table__
+        activities = {}
+        for row in db.session.execute(select(
+                activity_table.c.id, activity_table.c.plan_id, activity_table.c.name, activity_table.c.level1,
+                activity_table.c.level2, activity_table.c.level3, activity_table.c.recommended,
+        ).order_by(activity_table.c.id)):
+            activities.setdefault(row.plan_id, []).append(ActivityInfo(*row))
+        return tuple(
+            PlanInfo(row.id, row.slug, row.name, row.min_activities, row.max_activities, row.min_points,
+                     row.max_points, row.duration_days, tuple(activities.get(row.id, ())),
+                     frozenset(a.id for a in activities.get(row.id, ())))
+            for row in db.session.execute(select(
+                plan_table.c.id, plan_table.c.slug, plan_table.c.name, plan_table.c.min_activities,
+                plan_table.c.max_activities, plan_table.c.min_points, plan_table.c.max_points,
+                plan_table.c.duration_days,
+            ).order_by(plan_table.c.id))
+        )
+
+    @property
+    def version(self):
+        return self._snapshot[0] if self._snapshot else None
+
+    def plans(self):
+        """Every plan, in id order."""
+        self.refresh()
+        return self._snapshot[1]
+
+    def get(self, plan_id):
+        """The plan with this id, or None."""
+        self.refresh()
+        return self._snapshot[2].get(plan_id)
@@ -0,0 +1,168 @@
+# utils/dashboard.py
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db, User
+from utils.analytics import PointsMatrix, load_points_matrix, daily_totals, summarize
+from utils.logs import load_log_summary
+from utils.perf import timed
+from utils.trends import trend_payload
+
+
+# 1. View Model
+def build_dashboard(user, today, summary_days=14):
+    """
+    Compute everything dashboard.html shows besides the ORM plan/activities.
+    The scores use the whole plan window; the log grid keeps only its last
+    `summary_days` days, and earlier ones are paged in (build_log_page), as
+    is the trend chart (build_trend), so the page stays small.
+    """
+    # --- Prepare Summary Logs ---
+    all_days, summary = load_log_summary(user, today)
+    activity_ids = [ua.activity_id for ua in user.user_activities]
+    matrix = PointsMatrix.from_summary(all_days, summary, activity_ids)
+    recent = all_days[-summary_days:]
+    return {
+        "summary": {day: summary[day] for day in recent},
+        "earlier_end": recent[0] - timedelta(days=1) if recent and recent[0] > all_days[0] else None,
+        **dashboard_stats(user, today, matrix),
+    }
+
+
+def dashboard_stats(user, today, matrix):
+    """Plan progress and score numbers from the plan-window points matrix (shared with the API)."""
+    # --- Plan Progress ---
+    days_passed = (today - user.plan_start_date).days + 1 if user.plan_start_date else 0
+    total_days = user.plan.duration_days if user.plan else 0
+    completion_pct = round((days_passed / total_days) * 100, 1) if total_days else 0
+
+    # --- Scores (days x activities points matrix) ---
+    stats = summarize(matrix)
+
+    names = {ua.activity_id: ua.activity.name for ua in user.user_activities}
+    best_activity = names.get(stats["best_activity_id"])
+    worst_activity = names.get(stats["worst_activity_id"])
+
+    return {
+        # Progress stats
+        "days_passed": days_passed,
+        "total_days": total_days,
+        "completion_pct": completion_pct,
+        # Scores
+        "overall_score": stats["overall_score"],
+        "best_score": stats["best_score"],
+        "streak": stats["longest_streak"],
+        "current_streak": stats["current_streak"],
+        "avg_7d": stats["avg_7d"],
+        "avg_30d": stats["avg_30d"],
+        "best_activity": best_activity,
+        "worst_activity": worst_activity,
+    }
+
+
+# 2. Trend Series
+def build_trend(user, today, series="overall", start=None, end=None, bucket="day", max_points=None):
+    """
+    One trend series ("overall" or "activity_<id>") for the window
+    [start, end], clamped to plan start..today, bucketed and downsampled.
+    Includes the neighbouring windows of the same length for paging.
+    """
+    window = trend_window(user, today, start, end)
+    if window is None:
+        return {"series": series, "bucket": bucket, "dates": [], "values": [],
+                "start": None, "end": None, "prev": None, "next": None}
+    matrix = load_points_matrix(user, *window)
+    return trend_from_matrix(matrix, user.plan_start_date, today, series, bucket, max_points)
+
+
+def trend_window(user, today, start=None, end=None):
+    """(start, end) clamped to plan start..today, or None before the plan has begun."""
+    first = user.plan_start_date
+    if not first or today < first:
+        return None
+    end = min(end or today, today)
+    start = max(start or first, first)
+    if start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
+
+@timed("scoring")
+def trend_from_matrix(matrix, first, today, series="overall", bucket="day", max_points=None):
+    """The build_trend payload for a matrix already loaded over the window."""
+    start, end = matrix.start_date, matrix.start_date + timedelta(days=matrix.n_days - 1)
+    if series == "overall":
+        values = daily_totals(matrix)
+    else:
+        prefix, _, activity_id = series.partition("_")
+        if prefix != "activity" or not activity_id.isdigit() or int(activity_id) not in matrix.activity_ids:
+            raise ValueError(f"unknown series {series!r}")
+        values = matrix.points[:, matrix.activity_ids.index(int(activity_id))]
+
+    span = end - start
+    prev_end, next_start = start - timedelta(days=1), end + timedelta(days=1)
+    payload = trend_payload(matrix.days, values, bucket, max_points)
+    payload.update({
+        "series": series,
+        "bucket": bucket,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": matrix.n_days,
+        "prev": {"start": max(first, prev_end - span).isoformat(), "end": prev_end.isoformat()}
+                if start > first else None,
+        "next": {"start": next_start.isoformat(), "end": min(today, next_start + span).isoformat()}
+                if end < today else None,
+    })
+    return payload
+
+
+# 3. Log Grid Pages
+def build_log_page(user, end, days):
+    """
+    Log grid rows of the `days` days ending on `end` (oldest first, none
+    before the plan start) and the last day of the page before, or None.
+    """
+    dates, summary = load_log_summary(user, end, end - timedelta(days=days - 1))
+    return {
+        "days": [{"date": day.isoformat(), "logs": {str(aid): status for aid, status in summary[day].items()}}
+                 for day in dates],
+        "earlier_end": (dates[0] - timedelta(days=1)).isoformat()
+                       if dates and dates[0] > user.plan_start_date else None,
+    }
+
+
+# 4. Cache Keys
+def dashboard_cache_key(user, today, version=None):
+    """Keyed by user, last-write version and day (the view depends on `today`)."""
+    version = user.log_version if version is None else version
+    return f"dashboard:{user.id}:{version or 0}:{today.isoformat()}"
+
+
+def trend_cache_key(user, today, *params):
+    """Same versioning as the dashboard; stale keys simply age out via the TTL."""
+    return ":".join([f"trend:{user.id}:{user.log_version or 0}:{today.isoformat()}",
+                     *(str(p) for p in params)])
+
+
+def mark_logs_changed(user, cache=None, today=None):
+    """
+    Record a write to the user's log-derived data: bump log_version in SQL
+    (committed with the caller's transaction), as save_log_batch and the
+    importer do, so concurrent writers and stale cached identities never
+    reuse a version. Drops the now-stale cached view; returns the new version.
+    """
+    users = User.__table__
+    now = datetime.utcnow()
+    bump = update(users).where(users.c.id == user.id) \
+        .values(log_version=users.c.log_version + 1, logs_updated_at=now)
+    if db.session.get_bind().dialect.update_returning:
+        version = db.session.execute(bump.returning(users.c.log_version)).scalar_one()
+    else:
+        db.session.execute(bump)
+        version = db.session.scalar(select(users.c.log_version).where(users.c.id == user.id))
+    # the instance learns the new values without marking them dirty, so its flush cannot write them back
+    set_committed_value(user, "log_version", version)
+    set_committed_value(user, "logs_updated_at", now)
+    if cache is not None and today is not None:
+        cache.delete(dashboard_cache_key(user, today, version - 1))
+    return version
@@ -0,0 +1,69 @@
+# utils/database.py
+import os
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URL = "sqlite:///wellness_app.db"
+
+# Applied on every new SQLite connection. WAL lets readers run alongside the
+# single writer, NORMAL sync is durable across app crashes in WAL mode, and
+# busy_timeout makes writers wait for the lock instead of failing at once.
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,          # ms
+    "cache_size": -64000,          # negative = KiB, i.e. 64 MB page cache
+    "mmap_size": 268435456,        # 256 MB
+    "temp_store": "MEMORY",
+}
+
+
+def database_url():
+    """DATABASE_URL from the environment (Heroku-style postgres:// accepted)."""
+    url = os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def is_sqlite(url):
+    return url.startswith("sqlite")
+
+
+def configure_database(app):
+    """
+    Fill SQLALCHEMY_DATABASE_URI and SQLALCHEMY_ENGINE_OPTIONS for the app.
+    Values already present in app.config win over the defaults.
+    """
+    url = app.config.setdefault("SQLALCHEMY_DATABASE_URI", database_url())
+
+    if is_sqlite(url):
+        app.config.setdefault("SQLITE_PRAGMAS", dict(DEFAULT_SQLITE_PRAGMAS))
+        options = {
+            # the driver-level timeout also covers the lock wait on connect
+            "connect_args": {"timeout": app.config["SQLITE_PRAGMAS"].get("busy_timeout", 5000) / 1000},
+        }
+    else:
+        options = {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+            "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            "pool_pre_ping": True,
+        }
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", options)
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMAs on each new connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+    in_memory = engine.url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if name == "journal_mode" and in_memory:
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
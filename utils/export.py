@@ -0,0 +1,100 @@
+# utils/export.py
+import csv
+import io
+import json
+from sqlalchemy import case, select
+from models import db, Activity, User
+from utils.archive import tiered
+from utils.scoring import points_case
+
+EXPORT_FIELDS = ("user_id", "email", "log_date", "activity_id", "activity",
+                 "status", "level", "points", "notes")
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# 1. Query
+def export_query(user_id=None, start_date=None, end_date=None):
+    """
+    Log rows, hot and archived, with activity name, level description and
+    points. Ordered on the (user_id, log_date) index of each tier so the
+    database merges two streams without sorting the whole history first
+    (only each day's few rows are sorted).
+    """
+    def build(logs):
+        level = case(
+            (logs.c.status == "L1", Activity.level1),
+            (logs.c.status == "L2", Activity.level2),
+            (logs.c.status == "L3", Activity.level3),
+            else_=None,
+        )
+        query = (
+            select(logs.c.user_id, User.email, logs.c.log_date, logs.c.activity_id,
+                   Activity.name.label("activity"), logs.c.status, level.label("level"),
+                   points_case(logs.c.status).label("points"), logs.c.notes)
+            .join(Activity, Activity.id == logs.c.activity_id)
+            .join(User, User.id == logs.c.user_id)
+        )
+        if user_id is not None:
+            query = query.where(logs.c.user_id == user_id)
+        if start_date:
+            query = query.where(logs.c.log_date >= start_date)
+        if end_date:
+            query = query.where(logs.c.log_date <= end_date)
+        return query
+    query = tiered(build)
+    columns = query.selected_columns
+    return query.order_by(columns.user_id, columns.log_date, columns.activity_id)
+
+
+def stream_rows(query, chunk_size=1000):
+    """
+    Yield lists of at most chunk_size rows. yield_per turns on a server-side
+    cursor where the driver has one, so only one chunk is in memory at a time.
+    """
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+# 2. Encoders
+def iter_csv(chunks):
+    """Encoded CSV, a header then one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+_json = json.JSONEncoder(default=str)   # dates → ISO strings; built once, not per row
+
+
+def iter_ndjson(chunks):
+    """One JSON object per line, one string per chunk of rows."""
+    for rows in chunks:
+        yield "".join(
+            _json.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+            for row in rows
+        )
+
+
+ENCODERS = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+}
+
+
+def export_logs(fmt, user_id=None, start_date=None, end_date=None, chunk_size=1000):
+    """Generator of export text in `fmt` ("csv" or "ndjson")."""
+    chunks = stream_rows(export_query(user_id, start_date, end_date), chunk_size)
+    return ENCODERS[fmt](chunks)
@@ -0,0 +1,33 @@
+# utils/identity.py
+import pickle
+from models import db
+from utils.cache import LRUCache
+
+
+class IdentityCache:
+    """
+    Short-TTL, per-process cache of the logged-in user's row together with its
+    eagerly loaded plan and activity selections.
+
+    Entries are pickled snapshots; a hit is attached to the request session
+    with merge(load=False), which issues no SQL.
+    """
+
+    def __init__(self, maxsize=4096, ttl=30):
+        self.enabled = ttl > 0
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def load(self, user_id, query):
+        """Return the user for user_id, running `query()` only on a miss."""
+        if self.enabled:
+            snapshot = self._cache.get(user_id)
+            if snapshot is not None:
+                return db.session.merge(pickle.loads(snapshot), load=False)
+
+        user = query()
+        if user is not None and self.enabled:
+            self._cache.set(user_id, pickle.dumps(user))
+        return user
+
+    def invalidate(self, user_id):
+        self._cache.delete(str(user_id))
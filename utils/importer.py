@@ -0,0 +1,172 @@
+# utils/importer.py
+import csv
+import json
+import time
+from collections import Counter
+from datetime import date, datetime
+from sqlalchemy import select, update
+from levels import POINTS_MAPPING
+from models import db, User, UserActivity
+from utils.logs import upsert_logs
+from utils.leaderboard import refresh_leaderboard_entry
+from utils.rollups import refresh_daily_score_range
+from utils.stats import refresh_user_stats
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_SAMPLES = 100   # rejected rows kept verbatim in the report
+
+
+# 1. Readers
+def read_records(stream, fmt):
+    """Yield (line number, dict) from a text stream of CSV (with header) or NDJSON."""
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(stream), start=2):
+            yield number, record
+    elif fmt == "ndjson":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+    else:
+        raise ValueError(f"format must be one of {IMPORT_FORMATS}")
+
+
+# 2. Report
+class ImportReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.accepted = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        self.samples = []          # (line, reason)
+        self.users = {}            # user_id → (first date, last date)
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        self.reasons[reason] += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append((line, reason))
+
+    def touch(self, user_id, log_date):
+        span = self.users.get(user_id)
+        if span is None:
+            self.users[user_id] = (log_date, log_date)
+        elif log_date < span[0]:
+            self.users[user_id] = (log_date, span[1])
+        elif log_date > span[1]:
+            self.users[user_id] = (span[0], log_date)
+
+    @property
+    def rows_per_second(self):
+        return self.accepted / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "reasons": dict(self.reasons),
+            "samples": [{"line": line, "reason": reason} for line, reason in self.samples],
+            "users": len(self.users),
+            "seconds": round(self.elapsed, 2),
+            "rows_per_second": round(self.rows_per_second),
+        }
+
+
+# 3. Validation
+class _Validator:
+    """Checks one record at a time; each user's selected activities are loaded once."""
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+        self.selected = {}     # user_id → set of activity ids (None = unknown user)
+
+    def _activities(self, user_id):
+        if user_id not in self.selected:
+            if db.session.get(User, user_id) is None:
+                self.selected[user_id] = None
+            else:
+                self.selected[user_id] = set(db.session.scalars(
+                    select(UserActivity.activity_id).where(UserActivity.user_id == user_id)
+                ))
+        return self.selected[user_id]
+
+    def __call__(self, record):
+        """(row, None) for a valid record, (None, reason) otherwise."""
+        if not isinstance(record, dict):
+            return None, "malformed record"
+        try:
+            user_id = self.user_id if self.user_id is not None else int(record["user_id"])
+            activity_id = int(record["activity_id"])
+            log_date = date.fromisoformat(str(record["log_date"]))
+        except KeyError as exc:
+            return None, f"missing {exc.args[0]}"
+        except (TypeError, ValueError):
+            return None, "bad user_id, activity_id or log_date"
+
+        status = record.get("status")
+        if status not in POINTS_MAPPING:
+            return None, "unknown status"
+        selected = self._activities(user_id)
+        if selected is None:
+            return None, "unknown user"
+        if activity_id not in selected:
+            return None, "activity not selected by user"
+
+        return {"user_id": user_id, "activity_id": activity_id, "log_date": log_date,
+                "status": status, "notes": record.get("notes") or None}, None
+
+
+# 4. Import
+def import_logs(records, user_id=None, chunk_size=10000, with_notes=True):
+    """
+    Validate and upsert (line, record) pairs. With user_id set every row is
+    imported for that user and any user_id column is ignored. Each chunk is
+    one executemany upsert committed on its own, so a failure loses at most
+    one chunk; the DailyScore rollup, leaderboard entry, stats and
+    log_version of every touched user are refreshed once at the end.
+    """
+    report = ImportReport()
+    validate = _Validator(user_id)
+    update_columns = ("status", "notes") if with_notes else ("status",)
+    chunk = {}
+
+    def flush():
+        # keyed like LOG_KEY: a repeated key inside one chunk keeps its last row
+        upsert_logs(list(chunk.values()), update_columns)
+        db.session.commit()
+        chunk.clear()
+
+    for line, record in records:
+        row, reason = validate(record)
+        if reason:
+            report.reject(line, reason)
+            continue
+        chunk[row["user_id"], row["activity_id"], row["log_date"]] = row
+        report.accepted += 1
+        report.touch(row["user_id"], row["log_date"])
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    refresh_derived(report.users)
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def refresh_derived(user_ranges):
+    """Rebuild rollups over each user's imported date range, their leaderboard entries, stats and log_version."""
+    for user_id, (first, last) in user_ranges.items():
+        refresh_daily_score_range(user_id, first, last)
+        refresh_leaderboard_entry(db.session.get(User, user_id), date.today())
+        refresh_user_stats(user_id)
+    if user_ranges:
+        db.session.execute(
+            update(User).where(User.id.in_(list(user_ranges)))
+            .values(log_version=User.log_version + 1, logs_updated_at=datetime.utcnow())
+        )
+    db.session.commit()
@@ -0,0 +1,316 @@
+# utils/jobs.py
+import json
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+from models import db, Job
+
+JOB_MODES = ("thread", "worker", "inline")
+
+
+# 1. Tasks
+class Task:
+    def __init__(self, name, fn, merge=None, max_attempts=5):
+        self.name = name
+        self.fn = fn
+        self.merge = merge              # (old payload, new payload) → payload
+        self.max_attempts = max_attempts
+
+
+def _json(value):
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+# 2. Runner
+class JobRunner:
+    """
+    A job queue persisted in the Job table, run by a pool of threads in this
+    process ("thread"), by separate `flask run-jobs` processes ("worker"),
+    or at the end of the request that queued them ("inline", for tests and
+    single-process runs). No broker: workers claim rows with a conditional
+    UPDATE, so any number of threads/processes can share the table.
+
+    Jobs with a dedupe key coalesce: enqueueing while one is still queued
+    merges the payloads (Task.merge) instead of adding a row, and a worker
+    claiming a job also absorbs any duplicates queued by other processes.
+    Failures retry with exponential backoff up to max_attempts. Running jobs
+    heartbeat; one whose heartbeat stops (dead worker) is requeued.
+    """
+
+    def __init__(self, app=None):
+        self.tasks = {}
+        self._wake = threading.Event()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._last_maintenance = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get("JOBS_MODE", "thread")
+        if self.mode not in JOB_MODES:
+            raise ValueError(f"JOBS_MODE must be one of {JOB_MODES}")
+        self.workers = app.config.get("JOBS_WORKERS", 2)
+        self.poll_interval = app.config.get("JOBS_POLL_INTERVAL", 1.0)
+        # inline jobs run at the end of the same request, so they must be due at once
+        self.coalesce_delay = 0 if self.mode == "inline" else app.config.get("JOBS_COALESCE_DELAY", 0.5)
+        self.retry_base = app.config.get("JOBS_RETRY_BASE", 2.0)
+        self.stale_after = app.config.get("JOBS_STALE_AFTER", 300)
+        self.heartbeat_interval = app.config.get("JOBS_HEARTBEAT_INTERVAL", 60)
+        self.keep_finished = app.config.get("JOBS_KEEP_FINISHED", 86400)
+        if self.mode == "inline":
+            app.after_request(self._drain_after_request)
+
+    def task(self, name, merge=None, max_attempts=5):
+        """Decorator registering fn(**payload) as a task."""
+        def register(fn):
+            self.tasks[name] = Task(name, fn, merge, max_attempts)
+            return fn
+        return register
+
+    # ----- Producer -----
+    def enqueue(self, name, payload=None, key=None, user_id=None, delay=None):
+        """
+        Add a job inside the caller's transaction (it becomes visible when
+        the caller commits, together with the writes it depends on).
+        Returns the Job row, which may be an existing queued job it merged into.
+        """
+        task = self.tasks[name]
+        payload = payload or {}
+        now = datetime.utcnow()
+        delay = self.coalesce_delay if delay is None else delay
+
+        if key is not None:
+            queued = db.session.scalars(
+                select(Job).where(Job.key == key, Job.status == "queued").order_by(Job.id).limit(1)
+            ).first()
+            if queued is not None:
+                old = json.loads(queued.payload)
+                # only while still queued: a worker may claim it between the SELECT and here,
+                # and a merge into a running job would be lost
+                merged = db.session.execute(
+                    update(Job).where(Job.id == queued.id, Job.status == "queued")
+                    .values(payload=_json(task.merge(old, payload) if task.merge else payload), updated_at=now)
+                ).rowcount
+                if merged:
+                    self._notify()
+                    return queued
+
+        job = Job(name=name, key=key, payload=_json(payload), user_id=user_id,
+                  max_attempts=task.max_attempts, run_after=now + timedelta(seconds=delay),
+                  created_at=now, updated_at=now)
+        db.session.add(job)
+        self._notify()
+        return job
+
+    def _notify(self):
+        if self.mode == "thread":
+            self.start()
+            self._wake.set()
+
+    # ----- Consumer -----
+    def claim(self):
+        """Atomically mark the next due job running and return it (or None)."""
+        while True:
+            now = datetime.utcnow()
+            job_id = db.session.scalar(
+                select(Job.id).where(Job.status == "queued", Job.run_after <= now)
+                .order_by(Job.run_after, Job.id).limit(1)
+            )
+            if job_id is None:
+                db.session.rollback()
+                return None
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", attempts=Job.attempts + 1, updated_at=now)
+            ).rowcount
+            if not claimed:
+                db.session.rollback()       # another worker got it first
+                continue
+            job = db.session.get(Job, job_id, populate_existing=True)
+            self._absorb_duplicates(job)
+            db.session.commit()
+            return job
+
+    def _absorb_duplicates(self, job):
+        """Fold other queued jobs with the same key into the claimed one."""
+        if job.key is None:
+            return
+        task = self.tasks.get(job.name)
+        duplicates = db.session.scalars(
+            select(Job).where(Job.key == job.key, Job.status == "queued", Job.id != job.id)
+        ).all()
+        if not duplicates:
+            return
+        payload = json.loads(job.payload)
+        for duplicate in duplicates:
+            other = json.loads(duplicate.payload)
+            payload = task.merge(payload, other) if task and task.merge else other
+            db.session.delete(duplicate)
+        job.payload = _json(payload)
+
+    def run_job(self, job):
+        """Run a claimed job and record the outcome. Returns True on success."""
+        task = self.tasks.get(job.name)
+        job_id, name, attempts, max_attempts = job.id, job.name, job.attempts, job.max_attempts
+        heartbeat = self._heartbeat(job_id)
+        try:
+            if task is None:
+                raise LookupError(f"no task registered as {name!r}")
+            result = task.fn(**json.loads(job.payload))
+            db.session.commit()
+        except Exception:
+            heartbeat.set()
+            db.session.rollback()
+            error = traceback.format_exc(limit=5)
+            retry = attempts < max_attempts and task is not None
+            values = {"status": "queued" if retry else "failed", "last_error": error,
+                      "updated_at": datetime.utcnow()}
+            if retry:
+                values["run_after"] = datetime.utcnow() + timedelta(seconds=self.retry_base ** attempts)
+            db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+            db.session.commit()
+            self.app.logger.warning("Job %s (%s) failed, attempt %d/%d", job_id, name, attempts, max_attempts)
+            return False
+
+        heartbeat.set()
+        db.session.execute(update(Job).where(Job.id == job_id).values(
+            status="done", result=_json(result), last_error=None, updated_at=datetime.utcnow()))
+        db.session.commit()
+        return True
+
+    def _heartbeat(self, job_id):
+        """
+        Touch the running job's updated_at every heartbeat_interval from a side
+        thread, on its own connection, until the returned event is set; so
+        maintenance() requeues only jobs whose worker stopped, however long
+        they run. Not joined: a beat waiting on a lock held by the job's own
+        transaction just finds the job finished.
+        """
+        done = threading.Event()
+        engine = db.engine
+
+        def beat():
+            while not done.wait(self.heartbeat_interval):
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(update(Job).where(Job.id == job_id, Job.status == "running")
+                                     .values(updated_at=datetime.utcnow()))
+                except Exception:
+                    self.app.logger.warning("Heartbeat of job %s failed", job_id, exc_info=True)
+
+        threading.Thread(target=beat, name=f"job-heartbeat-{job_id}", daemon=True).start()
+        return done
+
+    def run_pending(self, limit=None):
+        """Run due jobs on the calling thread until none are left. Returns how many ran."""
+        ran = 0
+        while limit is None or ran < limit:
+            job = self.claim()
+            if job is None:
+                break
+            self.run_job(job)
+            ran += 1
+        return ran
+
+    def _drain_after_request(self, response):
+        self.run_pending()
+        return response
+
+    # ----- Maintenance -----
+    def maintenance(self):
+        """
+        Requeue running jobs without a heartbeat for stale_after seconds (dead
+        worker) and purge old finished jobs.
+        """
+        now = datetime.utcnow()
+        requeued = db.session.execute(
+            update(Job).where(Job.status == "running",
+                              Job.updated_at < now - timedelta(seconds=self.stale_after))
+            .values(status="queued", run_after=now, updated_at=now)
+        ).rowcount
+        purged = db.session.execute(
+            delete(Job).where(Job.status == "done",
+                              Job.updated_at < now - timedelta(seconds=self.keep_finished))
+        ).rowcount
+        db.session.commit()
+        return requeued, purged
+
+    # ----- Thread Pool -----
+    def start(self):
+        """Start the worker threads once (lazily, on the first enqueue in "thread" mode)."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self.work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop the worker threads, waiting up to `timeout` seconds each for a running job to finish."""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def work(self, once=False):
+        """Worker loop: run due jobs, then sleep until woken or the poll interval passes."""
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    if time.monotonic() - self._last_maintenance > 60:
+                        self._last_maintenance = time.monotonic()
+                        self.maintenance()
+                    ran = self.run_pending()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Job worker error")
+                    ran = 0
+                finally:
+                    db.session.remove()
+            if once:
+                return
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    # ----- Status -----
+    def status(self, recent_failures=20):
+        counts = db.session.execute(
+            select(Job.name, Job.status, func.count()).group_by(Job.name, Job.status)
+        ).all()
+        by_task = {}
+        for name, status, count in counts:
+            by_task.setdefault(name, {})[status] = count
+        failed = db.session.scalars(
+            select(Job).where(Job.status == "failed").order_by(Job.updated_at.desc()).limit(recent_failures)
+        ).all()
+        return {
+            "mode": self.mode,
+            "workers": len(self._threads),
+            "tasks": by_task,
+            "recent_failures": [job_dict(job) for job in failed],
+        }
+
+
+def job_dict(job):
+    return {
+        "id": job.id,
+        "name": job.name,
+        "key": job.key,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "payload": json.loads(job.payload),
+        "result": json.loads(job.result) if job.result else None,
+        "last_error": job.last_error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
@@ -0,0 +1,336 @@
+# utils/leaderboard.py
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import groupby
+import numpy as np
+from sqlalchemy import select
+from models import db, User, DailyScore, LeaderboardEntry
+from utils.analytics import streaks
+
+METRICS = {
+    "total_points": "Total Score",
+    "current_streak": "Current Streak",
+    "best_avg_7d": "Best 7-Day Average",
+}
+# a sync that touches more than this share of the ranked users (e.g. after a
+# rebuild) reloads every board in one sort instead of replaying row by row
+SYNC_RELOAD_FRACTION = 0.1
+SYNC_RELOAD_MIN = 100
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+# 1. Metrics
+def _metrics(plan_start_date, today, score_rows):
+    """Leaderboard metrics from (score_date, total_points) rows of one user."""
+    if not plan_start_date or today < plan_start_date:
+        return {"total_points": 0, "current_streak": 0, "best_avg_7d": 0.0}
+    totals = np.zeros((today - plan_start_date).days + 1, dtype=np.int64)
+    for score_date, total in score_rows:
+        offset = (score_date - plan_start_date).days
+        if 0 <= offset < totals.size:
+            totals[offset] = total
+
+    _, current = streaks(totals)
+    # full 7-day windows, days before the plan start counting as 0
+    windows = np.convolve(np.concatenate((np.zeros(6), totals)), np.ones(7), "valid") / 7
+    return {
+        "total_points": int(totals.sum()),
+        "current_streak": current,
+        "best_avg_7d": round(float(windows.max()), 2),
+    }
+
+
+def refresh_leaderboard_entry(user, today):
+    """
+    Recompute one user's entry from the DailyScore rollup (call after the
+    rollup refresh, inside the caller's transaction; the caller commits).
+    Returns the values for Leaderboards.record().
+    """
+    rows = db.session.execute(
+        select(DailyScore.score_date, DailyScore.total_points)
+        .where(DailyScore.user_id == user.id,
+               DailyScore.score_date >= user.plan_start_date,
+               DailyScore.score_date <= today)
+    ).all() if user.plan_start_date else []
+
+    values = {"user_id": user.id, "plan_id": user.plan_id,
+              **_metrics(user.plan_start_date, today, rows)}
+    entry = db.session.get(LeaderboardEntry, user.id) or LeaderboardEntry(user_id=user.id)
+    for name, value in values.items():
+        setattr(entry, name, value)
+    entry.as_of = today
+    entry.updated_at = datetime.utcnow()
+    db.session.add(entry)
+    return values
+
+
+# 2. Full Rebuild
+def rebuild_leaderboards(today, chunk_size=5000):
+    """
+    Recompute every entry from DailyScore in one pass over the rollup and
+    rewrite the table. Entries whose values did not change keep their
+    updated_at, so the next Leaderboards.sync() replays only real changes.
+    Returns (entries, corrected), where corrected counts stored entries that
+    disagreed with the recomputation (besides streaks that simply lapsed
+    since their last write).
+    """
+    users = db.session.execute(
+        select(User.id, User.plan_id, User.plan_start_date).order_by(User.id)
+    ).all()
+    stored = {
+        e.user_id: e
+        for e in db.session.execute(select(
+            LeaderboardEntry.user_id, LeaderboardEntry.plan_id, LeaderboardEntry.total_points,
+            LeaderboardEntry.current_streak, LeaderboardEntry.best_avg_7d, LeaderboardEntry.as_of,
+            LeaderboardEntry.updated_at))
+    }
+
+    scores = db.session.execute(
+        select(DailyScore.user_id, DailyScore.score_date, DailyScore.total_points)
+        .order_by(DailyScore.user_id, DailyScore.score_date)
+        .execution_options(yield_per=chunk_size)
+    )
+    # both streams are ordered by user id: walk them together, one user's rows at a time
+    groups = groupby(scores, key=lambda r: r.user_id)
+    group = next(groups, None)
+
+    now = datetime.utcnow()
+    entries, corrected = [], 0
+    for user_id, plan_id, plan_start_date in users:
+        while group is not None and group[0] < user_id:
+            group = next(groups, None)
+        rows = ()
+        if group is not None and group[0] == user_id:
+            rows = [(r.score_date, r.total_points) for r in group[1]]
+            group = next(groups, None)
+        values = _metrics(plan_start_date, today, rows)
+        old = stored.get(user_id)
+        if old is None or (old.plan_id, old.total_points) != (plan_id, values["total_points"]) or \
+                old.best_avg_7d != values["best_avg_7d"] or \
+                (old.as_of == today and old.current_streak != values["current_streak"]):
+            corrected += 1
+        unchanged = old is not None and old.plan_id == plan_id and \
+            all(getattr(old, metric) == values[metric] for metric in METRICS)
+        entries.append({"user_id": user_id, "plan_id": plan_id, "as_of": today,
+                        "updated_at": old.updated_at if unchanged else now, **values})
+
+    db.session.execute(LeaderboardEntry.__table__.delete())
+    for start in range(0, len(entries), chunk_size):
+        db.session.execute(LeaderboardEntry.__table__.insert(), entries[start:start + chunk_size])
+    db.session.commit()
+    return len(entries), corrected
+
+
+# 3. Rankings
+class SortedRanking:
+    """
+    In-process ranking: a sorted list of (-score, member) keys. rank() is a
+    bisect, O(log n); add/remove shift the list in C (memmove), which stays
+    cheap well past a million members. Ties rank by member (user id).
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._scores = {}
+
+    def load(self, pairs):
+        """Replace the board with (member, score) pairs: one sort instead of n inserts."""
+        self._scores = dict(pairs)
+        self._keys = sorted((-score, member) for member, score in self._scores.items())
+
+    def add(self, member, score):
+        self.remove(member)
+        self._scores[member] = score
+        insort(self._keys, (-score, member))
+
+    def remove(self, member):
+        score = self._scores.pop(member, None)
+        if score is not None:
+            del self._keys[bisect_left(self._keys, (-score, member))]
+
+    def rank(self, member):
+        """0-based position, or None if the member is not ranked."""
+        score = self._scores.get(member)
+        return None if score is None else bisect_left(self._keys, (-score, member))
+
+    def score(self, member):
+        return self._scores.get(member)
+
+    def page(self, start, stop):
+        return [(member, -neg) for neg, member in self._keys[start:stop]]
+
+    def size(self):
+        return len(self._keys)
+
+
+class RedisRanking:
+    """The same interface on a Redis sorted set (ZREVRANK is O(log n)), shared by all workers."""
+
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+
+    def load(self, pairs, batch=10000):
+        pipe = self.client.pipeline()
+        pipe.delete(self.key)
+        pairs = list(pairs)
+        for start in range(0, len(pairs), batch):
+            pipe.zadd(self.key, dict(pairs[start:start + batch]))
+        pipe.execute()
+
+    def add(self, member, score):
+        self.client.zadd(self.key, {member: score})
+
+    def remove(self, member):
+        self.client.zrem(self.key, member)
+
+    def rank(self, member):
+        return self.client.zrevrank(self.key, member)
+
+    def score(self, member):
+        return self.client.zscore(self.key, member)
+
+    def page(self, start, stop):
+        return [(int(member), score) for member, score in
+                self.client.zrevrange(self.key, start, stop - 1, withscores=True)]
+
+    def size(self):
+        return self.client.zcard(self.key)
+
+
+class Leaderboards:
+    """
+    One ranking per metric, globally and per plan, fed from LeaderboardEntry.
+    Writes in this process are applied at once via record(); rows written
+    elsewhere (other workers, CLI imports, rebuilds) are picked up by sync(),
+    which reads only entries updated since the previous sync.
+    """
+
+    def __init__(self, make_ranking, sync_interval=5):
+        self.make_ranking = make_ranking
+        self.sync_interval = sync_interval
+        self._boards = {}
+        self._plans = {}            # user_id → plan_id currently ranked under
+        self._synced_at = None      # DB time of the newest entry seen
+        self._overlap = {}          # user_id → updated_at of entries seen within the overlap window
+        self._checked = 0.0
+        self._lock = threading.RLock()
+
+    def board(self, metric, plan_id=None):
+        key = (metric, plan_id)
+        if key not in self._boards:
+            self._boards[key] = self.make_ranking(f"leaderboard:{metric}:{plan_id or 'all'}")
+        return self._boards[key]
+
+    def record(self, values):
+        """Apply one entry's values ({"user_id", "plan_id", metric: score, ...})."""
+        user_id, plan_id = values["user_id"], values["plan_id"]
+        with self._lock:
+            old_plan = self._plans.get(user_id)
+            for metric in METRICS:
+                self.board(metric).add(user_id, values[metric])
+                if old_plan is not None and old_plan != plan_id:
+                    self.board(metric, old_plan).remove(user_id)
+                if plan_id is not None:
+                    self.board(metric, plan_id).add(user_id, values[metric])
+            self._plans[user_id] = plan_id
+
+    def sync(self, force=False):
+        """
+        Pull entries changed since the last sync (at most every sync_interval
+        seconds). Many changes at once reload the boards in bulk: replaying
+        each through record() would insort them one by one, O(n²) overall.
+        """
+        if not force and time.monotonic() - self._checked < self.sync_interval:
+            return
+        with self._lock:
+            self._checked = time.monotonic()
+            query = select(LeaderboardEntry.user_id, LeaderboardEntry.plan_id, LeaderboardEntry.updated_at,
+                           *(getattr(LeaderboardEntry, metric) for metric in METRICS)) \
+                .order_by(LeaderboardEntry.updated_at)
+            if self._synced_at is None:
+                entries = db.session.execute(query).all()
+                self._load(entries)
+            else:
+                # a little overlap so rows committed out of timestamp order are not missed;
+                # rows already applied in it are skipped
+                entries = db.session.execute(
+                    query.where(LeaderboardEntry.updated_at >= self._synced_at - SYNC_OVERLAP)
+                ).all()
+                changed = [e for e in entries if self._overlap.get(e.user_id) != e.updated_at]
+                if len(changed) > max(SYNC_RELOAD_MIN, SYNC_RELOAD_FRACTION * len(self._plans)):
+                    self._load(db.session.execute(query).all())
+                else:
+                    for entry in changed:
+                        self.record(entry._asdict())
+            if entries:
+                self._synced_at = entries[-1].updated_at
+                self._overlap = {e.user_id: e.updated_at for e in entries
+                                 if e.updated_at >= self._synced_at - SYNC_OVERLAP}
+
+    def _load(self, entries):
+        """Build every board in bulk from all entries (first sync, or many changes at once)."""
+        by_plan = {}
+        for entry in entries:
+            by_plan.setdefault(entry.plan_id, []).append(entry)
+        for metric, plan_id in list(self._boards):
+            if plan_id is not None and plan_id not in by_plan:
+                self.board(metric, plan_id).load(())   # nobody left on that plan
+        for metric in METRICS:
+            self.board(metric).load((e.user_id, getattr(e, metric)) for e in entries)
+            for plan_id, plan_entries in by_plan.items():
+                if plan_id is not None:
+                    self.board(metric, plan_id).load((e.user_id, getattr(e, metric)) for e in plan_entries)
+        self._plans = {e.user_id: e.plan_id for e in entries}
+
+    def rank(self, metric, user_id, plan_id=None):
+        """1-based rank, or None if the user is not on that board."""
+        self.sync()
+        with self._lock:
+            position = self.board(metric, plan_id).rank(user_id)
+        return None if position is None else position + 1
+
+    def page(self, metric, plan_id=None, page=1, per_page=25):
+        """([(rank, user_id, score)], total) for one page of a board."""
+        self.sync()
+        start = (page - 1) * per_page
+        with self._lock:
+            board = self.board(metric, plan_id)
+            rows, total = board.page(start, start + per_page), board.size()
+        return [(start + i + 1, user_id, score) for i, (user_id, score) in enumerate(rows)], total
+
+
+def make_leaderboards(url="memory://", sync_interval=5, prefix="wellness:"):
+    """Leaderboards over "memory://" (per-process sorted lists) or "redis://host:port/db"."""
+    if url.startswith("memory://"):
+        return Leaderboards(lambda key: SortedRanking(), sync_interval)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optional dependency, only needed for this backend
+        client = redis.Redis.from_url(url)
+        return Leaderboards(lambda key: RedisRanking(client, prefix + key), sync_interval)
+    raise ValueError(f"Unsupported leaderboard URL: {url}")
+
+
+# 4. Periodic Rebuild
+def start_periodic_rebuild(app, interval, leaderboards=None):
+    """Daemon thread running rebuild_leaderboards every `interval` seconds."""
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    entries, corrected = rebuild_leaderboards(datetime.now().date())
+                    app.logger.info("Leaderboards rebuilt: %d entries, %d corrected", entries, corrected)
+                    if leaderboards is not None:
+                        leaderboards.sync(force=True)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Leaderboard rebuild failed")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name="leaderboard-rebuild", daemon=True)
+    thread.start()
+    return thread
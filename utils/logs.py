@@ -0,0 +1,132 @@
+# utils/logs.py
+from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, DailyLog
+from utils.archive import restore_logs, tiered
+
+LOG_KEY = ("user_id", "activity_id", "log_date")
+
+
+# 1. Plan Window
+def plan_days(user, end_date, start_date=None):
+    """Every date from the user's plan start (or start_date, if later) up to end_date (inclusive)."""
+    if not user.plan_start_date:
+        return []
+    first = max(user.plan_start_date, start_date) if start_date else user.plan_start_date
+    if end_date < first:
+        return []
+    return [first + timedelta(days=i) for i in range((end_date - first).days + 1)]
+
+
+# 2. Range Loader
+def load_logs(user_id, start_date, end_date):
+    """
+    (log_date, activity_id, status) rows for a user between two dates
+    (inclusive), in one query over the hot and archived logs. Plain rows,
+    not ORM objects: long histories would otherwise spend most of their
+    time building DailyLog instances.
+    """
+    query = tiered(lambda logs: (
+        select(logs.c.log_date, logs.c.activity_id, logs.c.status)
+        .where(logs.c.user_id == user_id,
+               logs.c.log_date >= start_date,
+               logs.c.log_date <= end_date)
+    ))
+    return db.session.execute(query.order_by(query.selected_columns.log_date)).all()
+
+
+# 3. Summary Pivot
+def load_log_summary(user, end_date, start_date=None):
+    """
+    Return (days, summary) for the user's plan window (from start_date
+    when given), where summary[date][activity_id] = status. Days without
+    logs map to {}.
+    """
+    days = plan_days(user, end_date, start_date)
+    summary = {d: {} for d in days}
+    if not days:
+        return days, summary
+
+    for log_date, activity_id, status in load_logs(user.id, days[0], days[-1]):
+        summary[log_date][activity_id] = status
+    return days, summary
+
+
+# 4. Bulk Upsert
+def upsert_logs(rows, update=("status",)):
+    """
+    Insert or update many logs in one executemany. Each row is a dict with
+    user_id, activity_id, log_date and status (plus notes if updated);
+    on conflict only the columns in `update` are overwritten. Archived
+    logs of the written dates move back to DailyLog first.
+    """
+    if not rows:
+        return
+    restore_logs(rows)
+
+    stmt = upsert_statement(db.session.get_bind().dialect.name, update)
+    if stmt is not None:
+        # executemany rather than one multi-VALUES statement: no bind-parameter
+        # limit, so imports can pass large chunks
+        db.session.execute(stmt, rows)
+        return
+
+    _upsert_logs_portable(rows, update)
+
+
+def upsert_statement(dialect, update=("status",)):
+    """INSERT ... ON CONFLICT (LOG_KEY) DO UPDATE for SQLite/PostgreSQL, else None."""
+    if dialect not in ("sqlite", "postgresql"):
+        return None
+    insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+    stmt = insert(DailyLog.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=list(LOG_KEY),
+        set_={column: stmt.excluded[column] for column in update}
+    )
+
+
+def _upsert_logs_portable(rows, update):
+    """Fallback for databases without ON CONFLICT: one SELECT, then bulk UPDATE/INSERT."""
+    table = DailyLog.__table__
+    keys = {tuple(row[k] for k in LOG_KEY) for row in rows}
+    user_ids = {k[0] for k in keys}
+    dates = {k[2] for k in keys}
+    existing = {
+        (r.user_id, r.activity_id, r.log_date): r.id
+        for r in db.session.execute(
+            select(table.c.id, table.c.user_id, table.c.activity_id, table.c.log_date)
+            .where(table.c.user_id.in_(user_ids), table.c.log_date.in_(dates))
+        )
+    }
+
+    updates, inserts = [], []
+    for row in rows:
+        log_id = existing.get(tuple(row[k] for k in LOG_KEY))
+        if log_id is None:
+            inserts.append(row)
+        else:
+            updates.append({"id": log_id, **{column: row[column] for column in update}})
+
+    if updates:
+        db.session.bulk_update_mappings(DailyLog, updates)
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+
+
+# 5. Save Service
+def save_day_logs(user_id, log_date, statuses, notes=None):
+    """
+    Save {activity_id: status} for one user and date in a single upsert.
+    Notes are written only when given as {activity_id: notes}.
+    """
+    update = ("status",) if notes is None else ("status", "notes")
+    rows = []
+    for activity_id, status in statuses.items():
+        row = {"user_id": user_id, "activity_id": activity_id,
+               "log_date": log_date, "status": status}
+        if notes is not None:
+            row["notes"] = notes.get(activity_id)
+        rows.append(row)
+    upsert_logs(rows, update)
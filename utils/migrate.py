@@ -0,0 +1,184 @@
+# utils/migrate.py
+from datetime import date
+from sqlalchemy import String, inspect, text
+from sqlalchemy.schema import CreateTable
+from levels import CODES, NOT_DONE
+from models import (
+    db, User, DailyLog, ArchivedLog, DailyScore, LeaderboardEntry, UserActivity, UserStats, PlanDailyStat
+)
+from utils.aggregates import rebuild_aggregates
+from utils.leaderboard import rebuild_leaderboards
+from utils.rollups import rebuild_all_daily_scores
+from utils.stats import rebuild_user_stats
+
+
+# Duplicate rows are collapsed onto the lowest id, which is the row the
+# old first()-based upserts kept updating.
+DEDUPE_STATEMENTS = [
+    """
+    DELETE FROM daily_log WHERE id NOT IN (
+        SELECT MIN(id) FROM daily_log GROUP BY user_id, activity_id, log_date
+    )
+    """,
+    """
+    DELETE FROM user_activity WHERE id NOT IN (
+        SELECT MIN(id) FROM user_activity GROUP BY user_id, activity_id
+    )
+    """,
+]
+
+
+def add_missing_columns(conn):
+    """ALTER TABLE ... ADD COLUMN for model columns an existing table lacks."""
+    inspector = inspect(conn)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            conn.execute(text(ddl))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def widen_ddl(dialect, table, column):
+    """ALTER statement giving an existing column the model's (longer) string type."""
+    quote = dialect.identifier_preparer.quote
+    type_sql = column.type.compile(dialect=dialect)
+    if dialect.name in ("mysql", "mariadb"):
+        return f"ALTER TABLE {quote(table.name)} MODIFY {quote(column.name)} {type_sql}" + \
+            ("" if column.nullable else " NOT NULL")
+    return f"ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column.name)} TYPE {type_sql}"
+
+
+def widen_string_columns(conn):
+    """
+    Lengthen VARCHAR columns that an existing table declares shorter than
+    the model (e.g. User.password, 150 → 255 for scrypt hashes). SQLite
+    does not enforce VARCHAR lengths, so there is nothing to do there.
+    """
+    if conn.dialect.name == "sqlite":
+        return []
+    inspector = inspect(conn)
+    widened = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            current = existing.get(column.name)
+            if isinstance(column.type, String) and column.type.length and isinstance(current, String) \
+                    and current.length and current.length < column.type.length:
+                conn.execute(text(widen_ddl(conn.dialect, table, column)))
+                widened.append(f"{table.name}.{column.name}")
+    return widened
+
+
+# Level columns that older versions stored as names ("L1"), now integer codes (levels.py)
+LEVEL_COLUMNS = ((DailyLog, "status"), (ArchivedLog, "status"), (UserActivity, "level"))
+
+
+def _level_code_sql(column):
+    """CASE turning a stored level name into its code; unknown names become not_done (they scored 0 before too)."""
+    whens = " ".join(f"WHEN {column} = '{name}' THEN {code}" for name, code in CODES.items())
+    return f"CASE WHEN {column} IS NULL THEN NULL {whens} ELSE {NOT_DONE} END"
+
+
+def _rebuild_sqlite_table(conn, table, expressions):
+    """
+    SQLite cannot change a column's type: rename the table, create it anew
+    from the model, copy the rows (selecting expressions[column] where
+    given), drop the old copy and build the indexes once the rows are in.
+    """
+    old = f"{table.name}__old"
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+    for index in table.indexes:   # the renamed table keeps them under their names
+        conn.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+    conn.execute(CreateTable(table))
+    columns = [column.name for column in table.columns]
+    conn.execute(text(
+        f'INSERT INTO "{table.name}" ({", ".join(columns)}) '
+        f'SELECT {", ".join(expressions.get(name, name) for name in columns)} FROM "{old}"'
+    ))
+    conn.execute(text(f'DROP TABLE "{old}"'))
+    for index in table.indexes:
+        index.create(conn)
+
+
+def convert_level_columns(conn):
+    """
+    Rewrite LEVEL_COLUMNS still typed as strings into integer codes, in
+    place (ALTER ... USING) or by a table rebuild on SQLite. Returns
+    {table: rows whose name was unknown} for the converted tables.
+    """
+    inspector = inspect(conn)
+    converted = {}
+    for model, name in LEVEL_COLUMNS:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        column = next(c for c in inspector.get_columns(table.name) if c["name"] == name)
+        if not isinstance(column["type"], String):
+            continue
+        known = ", ".join(f"'{level}'" for level in CODES)
+        converted[table.name] = conn.execute(text(
+            f'SELECT COUNT(*) FROM "{table.name}" WHERE {name} IS NOT NULL AND {name} NOT IN ({known})'
+        )).scalar()
+        if conn.dialect.name == "sqlite":
+            _rebuild_sqlite_table(conn, table, {name: _level_code_sql(name)})
+        else:
+            conn.execute(text(
+                f'ALTER TABLE "{table.name}" ALTER COLUMN {name} TYPE SMALLINT USING {_level_code_sql(name)}'
+            ))
+    return converted
+
+
+def upgrade_database():
+    """
+    Bring an existing database up to the current models in place: create
+    missing tables and columns, widen string columns, store levels as
+    integer codes, drop duplicate rows, build missing indexes. Returns
+    {"daily_log": removed, "user_activity": removed, "levels": {table:
+    unknown names}, "widened": ["table.column"]} where "levels" lists the
+    tables converted by this run.
+    """
+    inspector = inspect(db.engine)
+    needs_backfill = not inspector.has_table(DailyScore.__tablename__)
+    needs_rankings = not inspector.has_table(LeaderboardEntry.__tablename__)
+    needs_stats = not inspector.has_table(UserStats.__tablename__)
+    needs_aggregates = not inspector.has_table(PlanDailyStat.__tablename__)
+    db.create_all()
+
+    removed = {}
+    with db.engine.begin() as conn:
+        add_missing_columns(conn)
+        widened = widen_string_columns(conn)
+        for table, statement in zip(("daily_log", "user_activity"), DEDUPE_STATEMENTS):
+            removed[table] = conn.execute(text(statement)).rowcount
+        levels = convert_level_columns(conn)
+
+        for model in (User, DailyLog, ArchivedLog, DailyScore, UserActivity):
+            for index in model.__table__.indexes:
+                index.create(conn, checkfirst=True)
+
+    # A new rollup table starts empty, and deleted duplicates may have been counted;
+    # unknown statuses turned not_done change the per-level counts (not the points)
+    deduped = any(removed.values())
+    relabelled = levels.get(DailyLog.__tablename__) or levels.get(ArchivedLog.__tablename__)
+    if needs_backfill or deduped or relabelled:
+        rebuild_all_daily_scores()
+    if needs_rankings or needs_backfill or deduped:
+        rebuild_leaderboards(date.today())
+    if needs_stats or deduped:
+        rebuild_user_stats()
+    if needs_aggregates or needs_backfill or deduped or relabelled:
+        rebuild_aggregates()
+    return {**removed, "levels": levels, "widened": widened}
@@ -0,0 +1,185 @@
+# utils/perf.py
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from functools import wraps
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+# Flipped on by PerfMonitor.init_app; while False the hooks below are never
+# registered and timed() is a single global check.
+_active = False
+
+
+# 1. Section Timing
+def timed(section):
+    """
+    Decorator adding a function's wall time to the current request's
+    `section`; a timed call inside another of the same section is not
+    counted twice.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            stats = g.get("_perf") if _active and has_request_context() else None
+            if stats is None or section in stats.open_sections:
+                return fn(*args, **kwargs)
+            stats.open_sections.add(section)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.sections[section] += time.perf_counter() - started
+                stats.open_sections.discard(section)
+        return wrapper
+    return decorate
+
+
+# 2. Per-request Stats
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()       # statement shape → executions
+        self.slowest = []                 # (seconds, statement)
+        self.sections = defaultdict(float)
+        self.open_sections = set()        # sections being timed right now
+        self._render_started = None
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Normalize a (parameterized) SQL statement for repeat detection."""
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+# 3. Monitor
+class PerfMonitor:
+    """
+    Opt-in request instrumentation (PERF_INSTRUMENTATION): SQL count/time,
+    slowest statements, template and scoring time, N+1 detection. Adds a
+    Server-Timing header; report() backs the admin-only /debug/perf.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = defaultdict(lambda: {
+                "requests": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "queries": 0, "sql_ms": 0.0, "template_ms": 0.0, "scoring_ms": 0.0,
+            })
+            self.slow_statements = []
+            self.n_plus_one = deque(maxlen=50)
+
+    def init_app(self, app, engine):
+        global _active
+        if not app.config.get("PERF_INSTRUMENTATION"):
+            return
+        self.enabled = _active = True
+        self.n_plus_one_threshold = app.config.get("PERF_N_PLUS_ONE_THRESHOLD", 5)
+        self.keep_slowest = app.config.get("PERF_SLOW_STATEMENTS", 10)
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # ----- Hooks -----
+    def _before_request(self):
+        g._perf = RequestStats()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and g.get("_perf") is not None:
+            conn.info.setdefault("_perf_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = g.get("_perf") if has_request_context() else None
+        started = conn.info.get("_perf_started")
+        if stats is None or not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        stats.query_count += 1
+        stats.sql_time += elapsed
+        shape = statement_shape(statement)
+        stats.statements[shape] += 1
+        stats.slowest.append((elapsed, shape))
+
+    def _before_render(self, sender, template, context, **extra):
+        stats = g.get("_perf")
+        if stats is not None:
+            stats._render_started = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        stats = g.get("_perf")
+        if stats is not None and stats._render_started is not None:
+            stats.sections["template"] += time.perf_counter() - stats._render_started
+            stats._render_started = None
+
+    def _after_request(self, response):
+        stats = g.pop("_perf", None)
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        sections = dict(stats.sections)
+        response.headers["Server-Timing"] = ", ".join(
+            [f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.query_count} queries"'] +
+            [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sections.items()] +
+            [f"total;dur={total * 1000:.1f}"]
+        )
+        self._record(request.endpoint or request.path, total, stats, sections)
+        return response
+
+    # ----- Aggregation -----
+    def _record(self, endpoint, total, stats, sections):
+        repeated = {shape: n for shape, n in stats.statements.items()
+                    if n > self.n_plus_one_threshold}
+        slowest = sorted(stats.slowest, reverse=True)[:self.keep_slowest]
+        with self._lock:
+            agg = self.endpoints[endpoint]
+            agg["requests"] += 1
+            agg["total_ms"] += total * 1000
+            agg["max_ms"] = max(agg["max_ms"], total * 1000)
+            agg["queries"] += stats.query_count
+            agg["sql_ms"] += stats.sql_time * 1000
+            agg["template_ms"] += sections.get("template", 0) * 1000
+            agg["scoring_ms"] += sections.get("scoring", 0) * 1000
+
+            for shape, count in repeated.items():
+                self.n_plus_one.append({"endpoint": endpoint, "count": count, "statement": shape})
+            self.slow_statements = sorted(
+                self.slow_statements + [(s, shape, endpoint) for s, shape in slowest],
+                reverse=True
+            )[:self.keep_slowest]
+
+    def report(self):
+        with self._lock:
+            endpoints = {}
+            for name, agg in self.endpoints.items():
+                n = agg["requests"]
+                endpoints[name] = {
+                    "requests": n,
+                    "avg_ms": round(agg["total_ms"] / n, 2),
+                    "max_ms": round(agg["max_ms"], 2),
+                    "avg_queries": round(agg["queries"] / n, 1),
+                    "avg_sql_ms": round(agg["sql_ms"] / n, 2),
+                    "avg_template_ms": round(agg["template_ms"] / n, 2),
+                    "avg_scoring_ms": round(agg["scoring_ms"] / n, 2),
+                }
+            return {
+                "endpoints": endpoints,
+                "slowest_statements": [
+                    {"ms": round(s * 1000, 3), "endpoint": endpoint, "statement": shape}
+                    for s, shape, endpoint in self.slow_statements
+                ],
+                "n_plus_one": list(self.n_plus_one),
+            }
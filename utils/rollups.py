@@ -0,0 +1,106 @@
+# utils/rollups.py
+from sqlalchemy import func, case, select, insert, delete
+from models import db, DailyScore, UserActivity
+from utils.archive import tiered
+from utils.scoring import points_case
+
+
+def _count_status(logs, status):
+    return func.sum(case((logs.c.status == status, 1), else_=0))
+
+
+def _score_rows(user_id, dates=None, start_date=None, end_date=None):
+    """SELECT producing DailyScore rows from the user's logs, hot and archived (selected activities only)."""
+    def build(logs):
+        query = (
+            select(
+                logs.c.user_id,
+                logs.c.log_date,
+                func.sum(points_case(logs.c.status)),
+                _count_status(logs, "not_done"),
+                _count_status(logs, "L1"),
+                _count_status(logs, "L2"),
+                _count_status(logs, "L3"),
+            )
+            .join(UserActivity, (UserActivity.user_id == logs.c.user_id) &
+                                (UserActivity.activity_id == logs.c.activity_id))
+            .group_by(logs.c.user_id, logs.c.log_date)
+        )
+        if user_id is not None:
+            query = query.where(logs.c.user_id == user_id)
+        if dates is not None:
+            query = query.where(logs.c.log_date.in_(dates))
+        if start_date:
+            query = query.where(logs.c.log_date >= start_date)
+        if end_date:
+            query = query.where(logs.c.log_date <= end_date)
+        return query
+    return tiered(build)
+
+
+# 1. Incremental Refresh
+def refresh_daily_scores(user_id, dates):
+    """
+    Recompute the rollup rows for the given dates from the logs.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    dates = list(dates)
+    if not dates:
+        return
+    db.session.flush()
+    db.session.execute(
+        delete(DailyScore).where(DailyScore.user_id == user_id,
+                                 DailyScore.score_date.in_(dates))
+    )
+    _insert_scores(_score_rows(user_id, dates))
+
+
+def refresh_daily_score_range(user_id, start_date, end_date):
+    """Same as refresh_daily_scores for every date in [start_date, end_date], e.g. after an import."""
+    db.session.flush()
+    db.session.execute(
+        delete(DailyScore).where(DailyScore.user_id == user_id,
+                                 DailyScore.score_date >= start_date,
+                                 DailyScore.score_date <= end_date)
+    )
+    _insert_scores(_score_rows(user_id, start_date=start_date, end_date=end_date))
+
+
+# 2. Full Rebuild (per user)
+def rebuild_daily_scores(user_id):
+    """Recompute every rollup row for a user, e.g. after the activity selection changes."""
+    db.session.flush()
+    db.session.execute(delete(DailyScore).where(DailyScore.user_id == user_id))
+    _insert_scores(_score_rows(user_id))
+
+
+# 3. Full Rebuild (all users)
+def rebuild_all_daily_scores():
+    """Backfill the whole rollup table from the existing logs."""
+    db.session.execute(delete(DailyScore))
+    _insert_scores(_score_rows(None))
+    db.session.commit()
+    return DailyScore.query.count()
+
+
+def _insert_scores(rows):
+    db.session.execute(
+        insert(DailyScore).from_select(
+            ["user_id", "score_date", "total_points",
+             "not_done_count", "l1_count", "l2_count", "l3_count"],
+            rows
+        )
+    )
+
+
+# 4. Reads
+def daily_totals(user_id, start_date, end_date):
+    """Return {date: total_points} for a user between two dates (inclusive)."""
+    rows = (
+        db.session.query(DailyScore.score_date, DailyScore.total_points)
+        .filter(DailyScore.user_id == user_id,
+                DailyScore.score_date >= start_date,
+                DailyScore.score_date <= end_date)
+        .all()
+    )
+    return {score_date: total for score_date, total in rows}
@@ -1,94 +1,126 @@
 # utils/scoring.py
-from datetime import date, timedelta
-from models import DailyLog, POINTS_MAPPING, db
-from sqlalchemy import func
+from datetime import date
+from levels import POINTS_PER_LEVEL, level_code
+from models import DailyLog, UserActivity, Activity, db
+from sqlalchemy import func, and_, distinct
+from utils.analytics import load_points_matrix, daily_totals, streaks
+from utils.archive import all_logs
+from utils.perf import timed
+
+
+# 0. Points Expression
+def points_case(status_column=DailyLog.status):
+    """SQL expression for a status column's points: its level code times POINTS_PER_LEVEL (NULL scores 0)."""
+    return func.coalesce(level_code(status_column), 0) * POINTS_PER_LEVEL
+
+
+def _in_window(query, logs, start_date=None, end_date=None):
+    """Restrict a query on all_logs() to an optional date window (inclusive)."""
+    if start_date:
+        query = query.filter(logs.c.log_date >= start_date)
+    if end_date:
+        query = query.filter(logs.c.log_date <= end_date)
+    return query
+
 
 # 1. Daily Score
+@timed("scoring")
 def calculate_daily_score(user, log_date=None):
     """Calculate total points for a user on a given date."""
     if not log_date:
         log_date = date.today()
 
-    logs = DailyLog.query.filter_by(user_id=user.id, log_date=log_date).all()
-    return sum(log.get_points() for log in logs)
+    logs = all_logs()
+    total = (
+        db.session.query(func.sum(points_case(logs.c.status)))
+        .filter(logs.c.user_id == user.id, logs.c.log_date == log_date)
+        .scalar()
+    )
+    return total or 0
 
 
 # 2. Overall Score
-def calculate_overall_score(user):
+@timed("scoring")
+def calculate_overall_score(user, start_date=None, end_date=None):
     """Total points accumulated across all days."""
-    logs = DailyLog.query.filter_by(user_id=user.id).all()
-    return sum(log.get_points() for log in logs)
+    logs = all_logs()
+    query = db.session.query(func.sum(points_case(logs.c.status))).filter(logs.c.user_id == user.id)
+    return _in_window(query, logs, start_date, end_date).scalar() or 0
 
 
 # 3. Best Daily Score Till Now
-def best_daily_score(user):
+@timed("scoring")
+def best_daily_score(user, start_date=None, end_date=None):
     """Return best (max) daily score user has achieved."""
-    scores = (
-        db.session.query(DailyLog.log_date, func.sum().label("total_points"))
-        .with_entities(DailyLog.log_date, func.sum(func.coalesce(func.nullif(func.replace(DailyLog.status, 'not_done', '0'), ''), 0)))
-        .filter(DailyLog.user_id == user.id)
-        .group_by(DailyLog.log_date)
-        .all()
-    )
-    if not scores:
-        return 0
-    return max([sum(POINTS_MAPPING.get(log.status, 0) for log in DailyLog.query.filter_by(user_id=user.id, log_date=day).all()) for day, _ in scores])
+    logs = all_logs()
+    daily = _in_window(
+        db.session.query(func.sum(points_case(logs.c.status)).label("total_points"))
+        .filter(logs.c.user_id == user.id),
+        logs, start_date, end_date
+    ).group_by(logs.c.log_date).subquery()
+
+    return db.session.query(func.max(daily.c.total_points)).scalar() or 0
 
 
 # 4. Activity-Level Score
-def calculate_activity_score(user, activity_id):
+@timed("scoring")
+def calculate_activity_score(user, activity_id, start_date=None, end_date=None):
     """Cumulative score for a specific activity."""
-    logs = DailyLog.query.filter_by(user_id=user.id, activity_id=activity_id).all()
-    return sum(log.get_points() for log in logs)
+    logs = all_logs()
+    query = (
+        db.session.query(func.sum(points_case(logs.c.status)))
+        .filter(logs.c.user_id == user.id, logs.c.activity_id == activity_id)
+    )
+    return _in_window(query, logs, start_date, end_date).scalar() or 0
 
 
 # 5. Best & Worst Activities
-def best_and_worst_activities(user):
-    """Return best and worst performing activity names."""
-    from models import Activity  # avoid circular import
-
+@timed("scoring")
+def best_and_worst_activities(user, start_date=None, end_date=None):
+    """
+    Return best and worst performing activity names among the user's selected
+    activities. Activities with no logs count as 0; ties go to the earliest selection.
+    Over a shared window totals rank like the per-day means in utils/analytics.py.
+    """
+    logs = all_logs()
+    log_filter = and_(logs.c.user_id == UserActivity.user_id,
+                      logs.c.activity_id == UserActivity.activity_id)
+    if start_date:
+        log_filter = and_(log_filter, logs.c.log_date >= start_date)
+    if end_date:
+        log_filter = and_(log_filter, logs.c.log_date <= end_date)
+
+    total_points = func.coalesce(func.sum(points_case(logs.c.status)), 0).label("total_points")
     activities = (
-        db.session.query(Activity, func.sum().label("total_points"))
-        .join(DailyLog, DailyLog.activity_id == Activity.id)
-        .filter(DailyLog.user_id == user.id)
-        .group_by(Activity.id)
+        db.session.query(Activity.name, total_points)
+        .select_from(UserActivity)
+        .join(Activity, Activity.id == UserActivity.activity_id)
+        .outerjoin(logs, log_filter)
+        .filter(UserActivity.user_id == user.id)
+        .group_by(UserActivity.id, Activity.name)
+        .order_by(total_points.desc(), UserActivity.id)
         .all()
     )
 
     if not activities:
         return None, None
 
-    best = max(activities, key=lambda x: x[1])
-    worst = min(activities, key=lambda x: x[1])
-
-    return best[0].name, worst[0].name
+    # Rows arrive best-first; the worst is the first row holding the lowest total.
+    worst_total = activities[-1].total_points
+    worst = next(row for row in activities if row.total_points == worst_total)
+    return activities[0].name, worst.name
 
 
 # 6. Consistency Streaks
+@timed("scoring")
 def streak_count(user):
-    """Return longest streak of consecutive days user has logged something."""
-    logs = (
-        DailyLog.query.filter_by(user_id=user.id)
-        .with_entities(DailyLog.log_date)
-        .distinct()
-        .order_by(DailyLog.log_date)
-        .all()
-    )
-    dates = [l.log_date for l in logs]
-
-    if not dates:
-        return 0
-
-    longest, current = 1, 1
-    for i in range(1, len(dates)):
-        if dates[i] == dates[i-1] + timedelta(days=1):
-            current += 1
-            longest = max(longest, current)
-        else:
-            current = 1
+    """Return longest streak of consecutive scored days (same definition as the dashboard)."""
+    longest, _ = streaks(daily_totals(load_points_matrix(user)))
     return longest
 
 
 # 7. Days Completed
+@timed("scoring")
 def days_completed(user):
-    return DailyLog.query.filter_by(user_id=user.id).with_entities(DailyLog.log_date).distinct().count()
+    logs = all_logs()
+    return db.session.query(func.count(distinct(logs.c.log_date))).filter(logs.c.user_id == user.id).scalar()
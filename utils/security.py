@@ -0,0 +1,84 @@
+# utils/security.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool's queue is full (backpressure)."""
+
+
+class PasswordHasher:
+    """
+    Password hashing on a bounded worker pool, off the request thread.
+
+    `method` is a werkzeug method string ("pbkdf2:sha256:600000",
+    "scrypt:32768:8:1") or "bcrypt" (uses the given Flask-Bcrypt instance and
+    its BCRYPT_LOG_ROUNDS). The KDFs release the GIL, so a thread pool runs
+    them in parallel. At most `workers + max_pending` calls are admitted at a
+    time; beyond that HasherBusy is raised instead of queueing without bound.
+    """
+
+    def __init__(self, method="pbkdf2:sha256:600000", workers=2, max_pending=32,
+                 timeout=10, bcrypt=None):
+        if method == "bcrypt" and bcrypt is None:
+            raise ValueError("method='bcrypt' needs a Flask-Bcrypt instance")
+        self.method = method
+        self.timeout = timeout
+        self._bcrypt = bcrypt
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        # werkzeug expands defaults (e.g. iterations) into the stored prefix; one
+        # hash here, on the calling thread, so needs_rehash never waits for the pool
+        self._method_prefix = None if method == "bcrypt" else \
+            generate_password_hash("", method=method).split("$", 1)[0]
+
+    # ----- Pool -----
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.timeout)
+
+    # ----- Hash / Verify -----
+    def _hash(self, password):
+        if self.method == "bcrypt":
+            return self._bcrypt.generate_password_hash(password).decode("utf-8")
+        return generate_password_hash(password, method=self.method)
+
+    @staticmethod
+    def _verify(bcrypt, hashed, password):
+        if _is_bcrypt(hashed):
+            return bcrypt is not None and bcrypt.check_password_hash(hashed, password)
+        return check_password_hash(hashed, password)
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, hashed, password):
+        return self._run(self._verify, self._bcrypt, hashed, password)
+
+    # ----- Rehash -----
+    def needs_rehash(self, hashed):
+        """True when `hashed` was made with a different algorithm or work factor."""
+        if self.method == "bcrypt":
+            return not _is_bcrypt(hashed) or _bcrypt_rounds(hashed) != self._bcrypt._log_rounds
+        if _is_bcrypt(hashed):
+            return True
+        return hashed.split("$", 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+def _is_bcrypt(hashed):
+    return hashed.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def _bcrypt_rounds(hashed):
+    return int(hashed.split("$")[2])
@@ -0,0 +1,104 @@
+# utils/stats.py
+from datetime import datetime
+from itertools import groupby
+import numpy as np
+from sqlalchemy import func, select
+from models import db, UserStats
+from utils.analytics import streaks
+from utils.archive import tiered
+from utils.scoring import points_case
+
+STAT_FIELDS = ("days_logged", "total_points", "longest_streak", "current_streak",
+               "streak_end_date", "last_log_date")
+STREAK_MILESTONES = (7, 30, 100)   # days
+
+
+# 1. Computation
+def _day_points(user_id=None):
+    """(user_id, log_date, points) per logged day (hot and archived), ordered by user and date."""
+    def build(logs):
+        query = (
+            select(logs.c.user_id, logs.c.log_date, func.sum(points_case(logs.c.status)))
+            .group_by(logs.c.user_id, logs.c.log_date)
+        )
+        if user_id is not None:
+            query = query.where(logs.c.user_id == user_id)
+        return query
+    query = tiered(build)
+    return query.order_by(query.selected_columns.user_id, query.selected_columns.log_date)
+
+
+def compute_stats(days):
+    """UserStats values from one user's (log_date, points) rows, in date order."""
+    scored = [log_date for log_date, points in days if points > 0]
+    longest = current = 0
+    if scored:
+        active = np.zeros((scored[-1] - scored[0]).days + 1, dtype=np.int8)
+        active[[(d - scored[0]).days for d in scored]] = 1
+        # the series ends on a scored day, so `current` is the run ending there
+        longest, current = streaks(active)
+    return {
+        "days_logged": len(days),
+        "total_points": int(sum(points for _, points in days)),
+        "longest_streak": longest,
+        "current_streak": current,
+        "streak_end_date": scored[-1] if scored else None,
+        "last_log_date": days[-1][0] if days else None,
+    }
+
+
+# 2. Per-user Refresh
+def refresh_user_stats(user_id):
+    """
+    Recompute one user's row from their logs (one grouped query over the
+    user's index range). Runs inside the caller's transaction; the caller commits.
+    """
+    db.session.flush()
+    days = [(row.log_date, row[2]) for row in db.session.execute(_day_points(user_id))]
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+    for name, value in compute_stats(days).items():
+        setattr(stats, name, value)
+    stats.updated_at = datetime.utcnow()
+    db.session.add(stats)
+    return stats
+
+
+# 3. Full Rebuild (repair)
+def rebuild_user_stats(chunk_size=5000):
+    """
+    Recompute every row in one pass over the logs and rewrite the table.
+    Returns (rows, corrected), corrected counting stored rows that were
+    missing or disagreed with the recomputation.
+    """
+    stored = {row.user_id: tuple(row[1:]) for row in db.session.execute(
+        select(UserStats.user_id, *(getattr(UserStats, name) for name in STAT_FIELDS)))}
+
+    now = datetime.utcnow()
+    rows, corrected = [], 0
+    days = db.session.execute(_day_points().execution_options(yield_per=chunk_size))
+    for user_id, group in groupby(days, key=lambda r: r.user_id):
+        values = compute_stats([(r.log_date, r[2]) for r in group])
+        if stored.pop(user_id, None) != tuple(values[name] for name in STAT_FIELDS):
+            corrected += 1
+        rows.append({"user_id": user_id, "updated_at": now, **values})
+    corrected += len(stored)   # rows of users who no longer have logs
+
+    db.session.execute(UserStats.__table__.delete())
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(UserStats.__table__.insert(), rows[start:start + chunk_size])
+    db.session.commit()
+    return len(rows), corrected
+
+
+# 4. Profile
+def profile_stats(stats, today):
+    """
+    What profile.html shows as lifetime figures, from the user's row (None =
+    nothing logged yet). Unlike the dashboard (utils/analytics), which
+    scores the current plan window and selected activities, these count
+    every log: earlier plans and unselected activities included.
+    """
+    values = {name: getattr(stats, name) for name in STAT_FIELDS} if stats else compute_stats([])
+    values["current_streak"] = stats.streak_on(today) if stats else 0
+    values["next_milestone"] = next((m for m in STREAK_MILESTONES if m > values["current_streak"]), None)
+    return values
@@ -0,0 +1,78 @@
+# utils/trends.py
+from datetime import date
+import numpy as np
+
+BUCKETS = ("day", "week", "month")
+
+
+# 1. Calendar Bucketing
+def bucket_series(days, values, bucket):
+    """
+    Average daily values per ISO week (labelled by its Monday) or calendar
+    month (labelled by its 1st). "day" returns the series unchanged.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if bucket == "day" or not len(days):
+        return list(days), values
+
+    ordinals = np.array([d.toordinal() for d in days], dtype=np.int64)
+    if bucket == "week":
+        weekdays = np.array([d.weekday() for d in days], dtype=np.int64)
+        keys = ordinals - weekdays
+        label = date.fromordinal
+    elif bucket == "month":
+        keys = np.array([d.year * 12 + d.month - 1 for d in days], dtype=np.int64)
+        label = lambda key: date(key // 12, key % 12 + 1, 1)
+    else:
+        raise ValueError(f"bucket must be one of {BUCKETS}")
+
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values)
+    counts = np.bincount(inverse)
+    return [label(int(k)) for k in unique_keys], sums / counts
+
+
+# 2. Downsampling
+def lttb_indices(y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: pick `threshold` indices of an evenly
+    spaced series that keep its visual shape (first and last always kept).
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    # interior points split into threshold-2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+# 3. Payload
+def trend_payload(days, values, bucket="day", max_points=None):
+    """JSON-ready {"dates", "values"} after bucketing and optional LTTB downsampling."""
+    labels, series = bucket_series(days, values, bucket)
+    if max_points and len(series) > max_points:
+        keep = lttb_indices(series, max_points)
+        labels = [labels[i] for i in keep]
+        series = series[keep]
+    return {
+        "dates": [d.isoformat() for d in labels],
+        "values": [round(v, 2) if bucket != "day" else int(v) for v in series.tolist()],
+    }